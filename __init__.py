@@ -21,12 +21,13 @@ from . import properties
 from . import sockets
 from . import operators
 from . import override_handler # The override handler is still a key feature
-from .engine import entry_point
+from .engine import entry_point, scheduler, materializer, applied_values, snapshot_queue
 
 # --- V5.3 Node Imports ---
 from .nodes import (
     create_primitive,
     import_node,
+    reference,
     scene,
     collection,
     select,
@@ -35,11 +36,13 @@ from .nodes import (
     difference_selection,
     merge,
     set_property,
+    attribute_expression,
     prune,
     parent,
     set_collection,
     parent_collection,
     create_scene_list,
+    wedge,
     batch_render,
     string,
     join_strings,
@@ -53,6 +56,49 @@ class DatablockTree(bpy.types.NodeTree):
     fn_declared_state_map: bpy.props.CollectionProperty(type=properties.FNDeclaredStateItem)
     fn_override_map: bpy.props.CollectionProperty(type=properties.FNOverrideItem)
     fn_initial_state_map: bpy.props.CollectionProperty(type=properties.FNInitialStateItem)
+    fn_gc_incremental: bpy.props.BoolProperty(
+        name="Collect Stale State",
+        description="Remove snapshot and override entries of destroyed datablocks after each sync",
+        default=True
+    )
+    fn_gc_grace_period: bpy.props.FloatProperty(
+        name="Grace Period",
+        description="Seconds an unreachable entry is kept before being collected, so re-created datablocks keep their overrides",
+        default=0.0, min=0.0
+    )
+    fn_payload_loading: bpy.props.EnumProperty(
+        name="Load Payloads",
+        description="Which deferred payloads (referenced files, deferred imports) are loaded when the scene is materialized",
+        items=[
+            ('ACTIVE', "Active", "Load the payloads marked active"),
+            ('ALL', "All", "Load every payload"),
+            ('NONE', "None", "Keep every payload unloaded; only the placeholders are materialized"),
+        ],
+        default='ACTIVE',
+        update=lambda s, c: s.update_tag()
+    )
+    fn_instance_repeats: bpy.props.BoolProperty(
+        name="Instance Repeated Hierarchies",
+        description="Materialize identical object hierarchies once, as a prototype collection, and their repeats as collection instances",
+        default=False,
+        update=lambda s, c: s.update_tag()
+    )
+    fn_instance_min_count: bpy.props.IntProperty(
+        name="Min Repeats",
+        description="Number of identical hierarchies needed before they are instanced",
+        default=2, min=2,
+        update=lambda s, c: s.update_tag()
+    )
+    fn_time_sliced: bpy.props.BoolProperty(
+        name="Build in Time Slices",
+        description="Materialize the scene over several short slices, so the interface stays responsive while large scenes build",
+        default=False
+    )
+    fn_time_budget: bpy.props.FloatProperty(
+        name="Slice Budget (ms)",
+        description="Time spent materializing before handing control back to the interface",
+        default=20.0, min=1.0, max=1000.0
+    )
 
 # --- UI ---
 class DATABLOCK_PT_panel(bpy.types.Panel):
@@ -64,7 +110,28 @@ class DATABLOCK_PT_panel(bpy.types.Panel):
     def poll(cls, context):
         return context.space_data and hasattr(context.space_data, 'tree_type') and context.space_data.tree_type == 'DatablockTreeType'
     def draw(self, context):
-        pass
+        tree = context.space_data.edit_tree
+        if not tree:
+            return
+        layout = self.layout
+        layout.prop(tree, "fn_gc_incremental")
+        layout.prop(tree, "fn_gc_grace_period")
+        layout.operator("fn.collect_garbage")
+        layout.prop(tree, "fn_payload_loading")
+        layout.prop(tree, "fn_instance_repeats")
+        row = layout.row()
+        row.enabled = tree.fn_instance_repeats
+        row.prop(tree, "fn_instance_min_count")
+        layout.prop(tree, "fn_time_sliced")
+        row = layout.row()
+        row.enabled = tree.fn_time_sliced
+        row.prop(tree, "fn_time_budget")
+        run = scheduler.active_run()
+        if run and run.progress:
+            step, done, total = run.progress
+            row = layout.row(align=True)
+            row.label(text=f"{step.title()}: {done}/{total}")
+            row.operator("fn.cancel_sync", text="", icon='CANCEL')
 
 # --- V5.3 Node Categories ---
 node_categories = [
@@ -72,7 +139,7 @@ node_categories = [
         NodeItem(scene.FN_scene.bl_idname),
         NodeItem(import_node.FN_import.bl_idname),
         NodeItem(create_primitive.FN_create_primitive.bl_idname),
-        # NodeItem(reference.FN_reference.bl_idname), # Will be added later
+        NodeItem(reference.FN_reference.bl_idname),
     ]),
     NodeCategory("SELECTION", "Selection", items=[
         NodeItem(select.FN_select.bl_idname),
@@ -85,6 +152,7 @@ node_categories = [
     ]),
     NodeCategory("MODIFIERS", "Modifiers", items=[
         NodeItem(set_property.FN_set_property.bl_idname),
+        NodeItem(attribute_expression.FN_attribute_expression.bl_idname),
         NodeItem(prune.FN_prune.bl_idname),
         NodeItem(parent.FN_parent.bl_idname),
         NodeItem(set_collection.FN_set_collection.bl_idname),
@@ -96,6 +164,7 @@ node_categories = [
     ]),
     NodeCategory("EXECUTORS", "Executors", items=[
         NodeItem(create_scene_list.FN_create_scene_list.bl_idname),
+        NodeItem(wedge.FN_wedge.bl_idname),
         NodeItem(batch_render.FN_batch_render.bl_idname),
     ]),
 ]
@@ -108,6 +177,7 @@ classes_to_register = (
     # Input Nodes
     scene.FN_scene,
     import_node.FN_import,
+    reference.FN_reference,
     create_primitive.FN_create_primitive,
     # collection.FN_collection, # This is a generator, should be in Create Primitive
     
@@ -122,6 +192,7 @@ classes_to_register = (
     
     # Modifier Nodes
     set_property.FN_set_property,
+    attribute_expression.FN_attribute_expression,
     prune.FN_prune,
     parent.FN_parent,
     set_collection.FN_set_collection,
@@ -133,7 +204,7 @@ classes_to_register = (
 
     # Executor Nodes
     create_scene_list.FN_create_scene_list,
-) + batch_render._classes # batch_render includes an operator
+) + wedge._classes + batch_render._classes # batch_render includes an operator
 
 def register():
     logger.log("[FN_Register] Registering V5.3 Engine...")
@@ -148,6 +219,8 @@ def register():
     register_node_categories("DATABLOCK_NODES", node_categories)
     
     override_handler.register()
+    applied_values.register()
+    snapshot_queue.register()
     if entry_point.depsgraph_update_handler not in bpy.app.handlers.depsgraph_update_post:
         bpy.app.handlers.depsgraph_update_post.append(entry_point.depsgraph_update_handler)
 
@@ -157,6 +230,10 @@ def unregister():
     if entry_point.depsgraph_update_handler in bpy.app.handlers.depsgraph_update_post:
         bpy.app.handlers.depsgraph_update_post.remove(entry_point.depsgraph_update_handler)
     override_handler.unregister()
+    applied_values.unregister()
+    snapshot_queue.unregister()
+    scheduler.cancel()
+    materializer.shutdown_preparation()
         
     unregister_node_categories("DATABLOCK_NODES")
     
@@ -0,0 +1,73 @@
+"""
+Last values the materializer applied, per datablock and property path.
+
+Each datablock has an update epoch, bumped whenever the depsgraph reports it as updated
+(by the user, a script or our own writes). A remembered value is only trusted while the
+epoch it was recorded in is current: for a prim whose properties didn't change since the
+last sync, and whose datablock wasn't touched since, no RNA is read at all.
+
+Some changes never reach the depsgraph updates: animation and drivers evaluated on frame
+change, or writes made by other code before the depsgraph is evaluated. Frame changes, undo,
+redo and file loads forget everything; code that syncs several times within one operator
+(like the variants of a batch) touches the datablocks it syncs again.
+"""
+import bpy
+
+# { uuid: epoch }
+_epochs = {}
+# { uuid: (epoch, { property path parts: value }) }
+_applied = {}
+_MISSING = object()
+
+def touch(uuid_str):
+    """Marks a datablock as modified from outside: its remembered values are re-read."""
+    _epochs[uuid_str] = _epochs.get(uuid_str, 0) + 1
+
+def forget(uuid_str):
+    """Drops what is remembered for a datablock (e.g. it was just created from scratch)."""
+    _applied.pop(uuid_str, None)
+
+def clear():
+    _applied.clear()
+    _epochs.clear()
+
+def is_applied(uuid_str, parts, value):
+    """True if `value` is what was last applied to this path, and the datablock wasn't touched since."""
+    entry = _applied.get(uuid_str)
+    if entry is None or entry[0] != _epochs.get(uuid_str, 0):
+        return False
+    applied = entry[1].get(parts, _MISSING)
+    if applied is _MISSING:
+        return False
+    if applied is value:
+        return True
+    try:
+        return bool(applied == value)
+    except (TypeError, ValueError):
+        return False
+
+def record(uuid_str, parts, value):
+    epoch = _epochs.get(uuid_str, 0)
+    entry = _applied.get(uuid_str)
+    if entry is None or entry[0] != epoch:
+        entry = _applied[uuid_str] = (epoch, {})
+    entry[1][parts] = value
+
+@bpy.app.handlers.persistent
+def _on_external_reset(*args):
+    clear()
+
+_HANDLERS = ('load_post', 'undo_post', 'redo_post', 'frame_change_post')
+
+def register():
+    for name in _HANDLERS:
+        handlers = getattr(bpy.app.handlers, name)
+        if _on_external_reset not in handlers:
+            handlers.append(_on_external_reset)
+
+def unregister():
+    for name in _HANDLERS:
+        handlers = getattr(bpy.app.handlers, name)
+        if _on_external_reset in handlers:
+            handlers.remove(_on_external_reset)
+    clear()
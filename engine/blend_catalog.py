@@ -0,0 +1,176 @@
+"""
+Catalog cache for .blend libraries.
+
+A catalog lists the names of the IDs stored in a .blend file, per category. Catalogs are
+keyed by absolute path, modification time and size, held in memory and persisted to a
+local cache directory, so an unchanged file is never opened again, even across sessions.
+
+Catalogs are read either by Blender (`bpy.data.libraries.load`) or by the pure-Python
+block reader, which can catalog many files in parallel worker processes.
+"""
+import os
+import sys
+import json
+import site
+import hashlib
+import tempfile
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import bpy
+from .. import logger
+from . import blend_reader
+
+CATALOG_CATEGORIES = ('scenes', 'collections', 'objects')
+
+# { absolute path: (signature, catalog) }
+_MEMORY_CACHE = {}
+
+def get_cache_dir():
+    cache_dir = os.path.join(tempfile.gettempdir(), "datablock_nodes", "catalogs")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+def resolve_path(filepath):
+    """Absolute, normalized path of a (possibly blend-relative) file path."""
+    return os.path.normpath(os.path.abspath(bpy.path.abspath(filepath)))
+
+def file_signature(abspath):
+    """(mtime in ns, size) of a file, or None if it can't be read."""
+    try:
+        stat = os.stat(abspath)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _cache_file(abspath):
+    name = hashlib.blake2b(abspath.encode('utf-8'), digest_size=16).hexdigest()
+    return os.path.join(get_cache_dir(), f"{name}.json")
+
+def _load_from_disk(abspath, signature):
+    try:
+        with open(_cache_file(abspath), 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if entry.get('path') != abspath or tuple(entry.get('signature', ())) != signature:
+        return None
+    return entry.get('catalog')
+
+def _save_to_disk(abspath, signature, catalog):
+    cache_file = _cache_file(abspath)
+    temp_file = f"{cache_file}.tmp"
+    try:
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({'path': abspath, 'signature': list(signature), 'catalog': catalog}, f)
+        os.replace(temp_file, cache_file)
+    except OSError as e:
+        logger.log(f"[BlendCatalog] WARNING: Could not persist catalog for {abspath}: {e}")
+
+def _read_catalog(abspath, use_block_reader=False):
+    """Lists the IDs of a library. This is the slow path."""
+    if use_block_reader:
+        return blend_reader.read_catalog(abspath)
+    with bpy.data.libraries.load(abspath, link=False) as (data_from, data_to):
+        return {category: list(getattr(data_from, category)) for category in CATALOG_CATEGORIES}
+
+def _get_cached(abspath, signature):
+    cached = _MEMORY_CACHE.get(abspath)
+    if cached and cached[0] == signature:
+        return cached[1]
+    catalog = _load_from_disk(abspath, signature)
+    if catalog is not None:
+        _MEMORY_CACHE[abspath] = (signature, catalog)
+    return catalog
+
+def _store(abspath, signature, catalog):
+    _save_to_disk(abspath, signature, catalog)
+    _MEMORY_CACHE[abspath] = (signature, catalog)
+
+def get_catalog(filepath, use_block_reader=False):
+    """
+    Returns (signature, catalog) for a .blend file, or (None, None) if it can't be read.
+    `signature` identifies the version of the file the catalog was read from.
+    """
+    abspath = resolve_path(filepath)
+    signature = file_signature(abspath)
+    if signature is None:
+        return None, None
+
+    catalog = _get_cached(abspath, signature)
+    if catalog is None:
+        logger.log(f"[BlendCatalog] Reading catalog of {abspath}")
+        catalog = _read_catalog(abspath, use_block_reader)
+        _store(abspath, signature, catalog)
+    return signature, catalog
+
+# Name of the block reader in the worker processes, which import it by file path: the
+# addon package itself can't be imported there (it needs bpy).
+_READER_MODULE = "blend_reader"
+
+def _standalone_reader():
+    """The block reader loaded as a top-level module, so its functions pickle by a name the workers can import."""
+    module = sys.modules.get(_READER_MODULE)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(_READER_MODULE, blend_reader.__file__)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[_READER_MODULE] = module
+        spec.loader.exec_module(module)
+    elif getattr(module, '__file__', None) != blend_reader.__file__:
+        return None  # The name is taken by another module
+    return module
+
+def get_catalogs(filepaths, max_workers=None):
+    """
+    Returns {absolute path: (signature, catalog)} for many .blend files.
+    Cached catalogs are reused; the others are read with the pure-Python block reader in
+    parallel worker processes (the reader is CPU-bound). Workers are spawned, not forked,
+    since forking Blender is unsafe. Unreadable files are left out.
+    """
+    results = {}
+    missing = []
+    for filepath in filepaths:
+        abspath = resolve_path(filepath)
+        signature = file_signature(abspath)
+        if signature is None:
+            continue
+        catalog = _get_cached(abspath, signature)
+        if catalog is None:
+            missing.append((abspath, signature))
+        else:
+            results[abspath] = (signature, catalog)
+
+    if not missing:
+        return results
+
+    reader = _standalone_reader()
+    worker_count = min(len(missing), max_workers or os.cpu_count() or 1)
+    if reader is None or worker_count < 2:
+        for abspath, signature in missing:
+            try:
+                catalog = blend_reader.read_catalog(abspath)
+            except Exception as e:
+                logger.log(f"[BlendCatalog] WARNING: Could not read {abspath}: {e}")
+                continue
+            _store(abspath, signature, catalog)
+            results[abspath] = (signature, catalog)
+        return results
+
+    logger.log(f"[BlendCatalog] Reading {len(missing)} catalogs on {worker_count} processes")
+    with ProcessPoolExecutor(
+        max_workers=worker_count, mp_context=multiprocessing.get_context('spawn'),
+        initializer=site.addsitedir, initargs=(os.path.dirname(blend_reader.__file__),)
+    ) as pool:
+        futures = {pool.submit(reader.read_catalog, abspath): (abspath, signature) for abspath, signature in missing}
+        for future, (abspath, signature) in futures.items():
+            try:
+                catalog = future.result()
+            except Exception as e:
+                logger.log(f"[BlendCatalog] WARNING: Could not read {abspath}: {e}")
+                continue
+            _store(abspath, signature, catalog)
+            results[abspath] = (signature, catalog)
+    return results
+
+def clear_memory_cache():
+    _MEMORY_CACHE.clear()
@@ -0,0 +1,227 @@
+"""
+Pure-Python reader for the ID catalog of .blend files.
+
+Lists the names of the scenes, collections and objects stored in a .blend file by walking
+its file-blocks, without Blender. Only block headers, the first bytes of each ID block and
+the DNA block are read: uncompressed files are memory-mapped, compressed files (gzip, or
+zstd when the `zstandard` module is available) are streamed without being decompressed
+into memory as a whole.
+
+This module must not import bpy, so that it can run in worker processes.
+"""
+import io
+import os
+import re
+import gzip
+import mmap
+import struct
+
+# ID codes of the file-blocks we catalog, and the catalog category they belong to.
+ID_CATEGORIES = {
+    b'SC': 'scenes',
+    b'GR': 'collections',
+    b'OB': 'objects',
+}
+
+_GZIP_MAGIC = b'\x1f\x8b'
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+# Bytes kept from the start of each ID block: enough to reach ID.name in every known layout.
+_ID_PREFIX_SIZE = 1024
+
+class BlendFileError(Exception):
+    pass
+
+class _Header:
+    def __init__(self, data):
+        if not data.startswith(b'BLENDER'):
+            raise BlendFileError("Not a .blend file")
+        if data[7:9].isdigit():
+            # Blender 5.0+ header: BLENDER17-01v0500 (header size, format version, endianness, version)
+            self.size = int(data[7:9])
+            self.pointer_size = 8 if data[9:10] == b'-' else 4
+            self.format_version = int(data[10:12])
+            self.endian = '<' if data[12:13] == b'v' else '>'
+        else:
+            # Legacy header: BLENDER_v300 / BLENDER-V279...
+            self.size = 12
+            self.pointer_size = 8 if data[7:8] == b'-' else 4
+            self.format_version = 0
+            self.endian = '<' if data[8:9] == b'v' else '>'
+
+        if self.format_version >= 1:
+            # code, SDNA index, old pointer, length, count
+            self.block_struct = struct.Struct(f"{self.endian}4siQqq")
+            self.block_fields = ('code', 'sdna', 'old', 'length', 'count')
+        else:
+            pointer = 'Q' if self.pointer_size == 8 else 'I'
+            self.block_struct = struct.Struct(f"{self.endian}4si{pointer}ii")
+            self.block_fields = ('code', 'length', 'old', 'sdna', 'count')
+
+    def read_block_header(self, data):
+        values = dict(zip(self.block_fields, self.block_struct.unpack(data)))
+        return values['code'], values['length']
+
+def _open_stream(filepath):
+    """Returns a readable binary stream of the (decompressed) file contents."""
+    with open(filepath, 'rb') as f:
+        magic = f.read(4)
+
+    if magic.startswith(_GZIP_MAGIC):
+        return gzip.open(filepath, 'rb')
+    if magic == _ZSTD_MAGIC:
+        try:
+            import zstandard
+        except ImportError:
+            raise BlendFileError("zstd-compressed file and the 'zstandard' module is not available")
+        return zstandard.ZstdDecompressor().stream_reader(open(filepath, 'rb'), closefd=True)
+
+    f = open(filepath, 'rb')
+    try:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, OSError):
+        return f  # Empty file or no mmap support: plain reads
+    f.close()
+    return _MappedStream(mapped)
+
+class _MappedStream(io.RawIOBase):
+    """Minimal stream over an mmap, so skipping a block is just moving an offset."""
+
+    def __init__(self, mapped):
+        self._mapped = mapped
+        self._offset = 0
+
+    def read(self, size=-1):
+        end = len(self._mapped) if size < 0 else min(len(self._mapped), self._offset + size)
+        data = self._mapped[self._offset:end]
+        self._offset = end
+        return data
+
+    def skip(self, size):
+        self._offset = min(len(self._mapped), self._offset + size)
+
+    def close(self):
+        self._mapped.close()
+        super().close()
+
+def _skip(stream, size):
+    if isinstance(stream, _MappedStream):
+        stream.skip(size)
+        return
+    try:
+        stream.seek(size, os.SEEK_CUR)
+    except (OSError, ValueError, io.UnsupportedOperation):
+        while size > 0:
+            chunk = stream.read(min(size, 1 << 20))
+            if not chunk:
+                break
+            size -= len(chunk)
+
+def _read_exact(stream, size):
+    data = stream.read(size)
+    if len(data) != size:
+        raise BlendFileError("Unexpected end of file")
+    return data
+
+def _parse_id_name_field(dna, header):
+    """Returns (offset, length) of ID.name, computed from the file's own SDNA."""
+    endian = header.endian
+    offset = 0
+
+    def expect(tag):
+        nonlocal offset
+        offset = (offset + 3) & ~3
+        if dna[offset:offset + 4] != tag:
+            raise BlendFileError(f"Malformed DNA block (expected {tag!r})")
+        offset += 4
+
+    def read_int(fmt):
+        nonlocal offset
+        value = struct.unpack_from(f"{endian}{fmt}", dna, offset)[0]
+        offset += struct.calcsize(fmt)
+        return value
+
+    def read_strings(count):
+        nonlocal offset
+        strings = []
+        for _ in range(count):
+            end = dna.index(b'\0', offset)
+            strings.append(dna[offset:end].decode('utf-8', 'replace'))
+            offset = end + 1
+        return strings
+
+    expect(b'SDNA')
+    expect(b'NAME')
+    names = read_strings(read_int('i'))
+    expect(b'TYPE')
+    types = read_strings(read_int('i'))
+    expect(b'TLEN')
+    type_lengths = [read_int('h') & 0xFFFF for _ in types]
+    expect(b'STRC')
+    for _ in range(read_int('i')):
+        type_index, field_count = read_int('h'), read_int('h')
+        fields = [(read_int('h'), read_int('h')) for _ in range(field_count)]
+        if types[type_index] != 'ID':
+            continue
+
+        field_offset = 0
+        for field_type, field_name_index in fields:
+            field_name = names[field_name_index]
+            array_size = 1
+            for dim in re.findall(r"\[(\d+)\]", field_name):
+                array_size *= int(dim)
+            if field_name.startswith('*') or field_name.startswith('(*'):
+                element_size = header.pointer_size
+            else:
+                element_size = type_lengths[field_type]
+            if re.sub(r"\[.*", "", field_name) == 'name':
+                return field_offset, element_size * array_size
+            field_offset += element_size * array_size
+        break
+
+    raise BlendFileError("ID.name not found in DNA")
+
+def read_catalog(filepath):
+    """
+    Returns {category: [names]} for the IDs stored in a .blend file.
+    Raises BlendFileError (or OSError) if the file can't be parsed.
+    """
+    catalog = {category: [] for category in ID_CATEGORIES.values()}
+    id_prefixes = []  # (category, first bytes of the block)
+    dna = None
+
+    stream = _open_stream(filepath)
+    try:
+        header_bytes = _read_exact(stream, 12)
+        header = _Header(header_bytes + (b'' if not header_bytes[7:9].isdigit() else _read_exact(stream, 5)))
+        block_header_size = header.block_struct.size
+
+        while True:
+            block_header = stream.read(block_header_size)
+            if len(block_header) < block_header_size:
+                break
+            code, length = header.read_block_header(block_header)
+            if code == b'ENDB':
+                break
+            if code == b'DNA1':
+                dna = _read_exact(stream, length)
+                continue
+
+            category = ID_CATEGORIES.get(code[:2]) if code[2:] == b'\0\0' else None
+            if category:
+                prefix_size = min(length, _ID_PREFIX_SIZE)
+                id_prefixes.append((category, _read_exact(stream, prefix_size)))
+                _skip(stream, length - prefix_size)
+            else:
+                _skip(stream, length)
+    finally:
+        stream.close()
+
+    if dna is None:
+        raise BlendFileError("No DNA block found")
+    name_offset, name_length = _parse_id_name_field(dna, header)
+
+    for category, data in id_prefixes:
+        raw_name = data[name_offset:name_offset + name_length].split(b'\0', 1)[0]
+        # The stored name is prefixed with the two-letter ID code ("OBCube").
+        catalog[category].append(raw_name[2:].decode('utf-8', 'replace'))
+    return catalog
@@ -0,0 +1,357 @@
+"""
+Vectorized attribute expressions.
+
+A small expression language (Python expression syntax, restricted to arithmetic,
+comparisons and a few built-ins) compiled into NumPy operations that run over the
+attribute columns of many prims at once:
+
+    location + index * (2, 0, 0)
+    rand(7) * 100
+    where(noise(location, 0.5) > 0.5, 1, 0)
+
+Every value is a 2D array of shape (prims, components), or (1, components) for constants,
+so scalars and vectors broadcast against each other like in NumPy.
+
+Bare names read an attribute of each prim (`attr('name')` reads any property name);
+`index`, `count`, `pi` and `e` are built-in values.
+"""
+import ast
+import hashlib
+import operator
+from functools import lru_cache
+import numpy as np
+
+class ExpressionError(Exception):
+    pass
+
+_BINARY_OPERATORS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.true_divide,
+    ast.FloorDiv: np.floor_divide,
+    ast.Mod: np.mod,
+    ast.Pow: np.power,
+}
+
+_UNARY_OPERATORS = {
+    ast.USub: np.negative,
+    ast.UAdd: np.positive,
+    ast.Not: np.logical_not,
+}
+
+_COMPARISONS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+_CONSTANTS = {'pi': np.pi, 'e': np.e}
+
+# --- Hashing-based randomness ---
+
+def _mix64(values):
+    """SplitMix64 finalizer: a well-distributed hash of uint64 arrays."""
+    with np.errstate(over='ignore'):
+        values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return values ^ (values >> np.uint64(31))
+
+def _unit_float(values):
+    """Maps uint64 hashes to floats in [0, 1)."""
+    return (values >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+def _lattice_value(ix, iy, iz, seed):
+    with np.errstate(over='ignore'):
+        h = _mix64(ix.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15) ^ np.uint64(seed))
+        h = _mix64(h ^ iy.astype(np.uint64) * np.uint64(0xC2B2AE3D27D4EB4F))
+        h = _mix64(h ^ iz.astype(np.uint64) * np.uint64(0x165667B19E3779F9))
+    return _unit_float(h)
+
+def value_noise(points, seed=0):
+    """Smooth 3D value noise in [0, 1] for an (N, 3) array of points."""
+    base = np.floor(points)
+    frac = points - base
+    t = frac * frac * (3.0 - 2.0 * frac)  # Smoothstep
+    base = base.astype(np.int64)
+
+    result = np.zeros(len(points))
+    for corner in range(8):
+        offset = np.array([(corner >> axis) & 1 for axis in range(3)])
+        weight = np.prod(np.where(offset, t, 1.0 - t), axis=1)
+        corner_points = base + offset
+        result += weight * _lattice_value(corner_points[:, 0], corner_points[:, 1], corner_points[:, 2], seed)
+    return result
+
+# --- Evaluation context ---
+
+class ExpressionContext:
+    """The prims an expression runs over, and lazily built columns of their attributes."""
+
+    def __init__(self, prims):
+        self.prims = prims
+        self.count = len(prims)
+        self._columns = {}
+        self._identities = None
+
+    def column(self, name):
+        """(N, k) array of a property; missing values read as zeros."""
+        cached = self._columns.get(name)
+        if cached is not None:
+            return cached
+
+        values = [prim.properties_view.get(name) for prim in self.prims]
+        width, is_float = 1, False
+        for value in values:
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple)):
+                width = max(width, len(value))
+                items = value
+            else:
+                items = (value,)
+            for item in items:
+                if isinstance(item, float):
+                    is_float = True
+                elif not isinstance(item, (int, bool)):
+                    raise ExpressionError(f"Attribute '{name}' is not numeric")
+
+        column = np.zeros((self.count, width), dtype=np.float64 if is_float else np.int64)
+        for i, value in enumerate(values):
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple)):
+                column[i, :len(value)] = value
+            else:
+                column[i, :] = value
+        self._columns[name] = column
+        return column
+
+    def identities(self):
+        """A uint64 per prim derived from its UUID, so random values follow prims, not positions."""
+        if self._identities is None:
+            self._identities = np.array([
+                int.from_bytes(hashlib.blake2b(str(prim.fn_uuid).encode('utf-8'), digest_size=8).digest(), 'little')
+                for prim in self.prims
+            ], dtype=np.uint64)
+        return self._identities
+
+# --- Compilation ---
+
+def _constant(value):
+    return np.asarray(value).reshape(1, -1)
+
+def _scalar_argument(node, name):
+    if not isinstance(node, ast.Constant) or not isinstance(node.value, (int, float)):
+        raise ExpressionError(f"{name}() expects a constant number")
+    return node.value
+
+class _Compiler:
+    """Turns an expression AST into a closure over an ExpressionContext."""
+
+    def __init__(self):
+        self.attributes = set()
+
+    def compile(self, node):
+        method = getattr(self, f"_compile_{type(node).__name__}", None)
+        if method is None:
+            raise ExpressionError(f"Unsupported syntax: {type(node).__name__}")
+        return method(node)
+
+    def _compile_Expression(self, node):
+        return self.compile(node.body)
+
+    def _compile_Constant(self, node):
+        if not isinstance(node.value, (bool, int, float)):
+            raise ExpressionError(f"Unsupported constant: {node.value!r}")
+        value = _constant(node.value)
+        return lambda ctx: value
+
+    def _compile_Tuple(self, node):
+        parts = [self.compile(element) for element in node.elts]
+        if not parts:
+            raise ExpressionError("Empty vector")
+        def evaluate(ctx):
+            columns = [part(ctx) for part in parts]
+            for column in columns:
+                if column.shape[1] != 1:
+                    raise ExpressionError("Vector components must be scalars")
+            return np.concatenate(np.broadcast_arrays(*columns), axis=1) if len(columns) > 1 else columns[0]
+        return evaluate
+
+    _compile_List = _compile_Tuple
+
+    def _compile_Name(self, node):
+        name = node.id
+        if name == 'index':
+            return lambda ctx: np.arange(ctx.count, dtype=np.int64).reshape(-1, 1)
+        if name == 'count':
+            return lambda ctx: _constant(ctx.count)
+        if name in _CONSTANTS:
+            value = _constant(_CONSTANTS[name])
+            return lambda ctx: value
+        self.attributes.add(name)
+        return lambda ctx: ctx.column(name)
+
+    def _compile_BinOp(self, node):
+        function = _BINARY_OPERATORS.get(type(node.op))
+        if function is None:
+            raise ExpressionError(f"Unsupported operator: {type(node.op).__name__}")
+        left, right = self.compile(node.left), self.compile(node.right)
+        return lambda ctx: function(left(ctx), right(ctx))
+
+    def _compile_UnaryOp(self, node):
+        function = _UNARY_OPERATORS.get(type(node.op))
+        if function is None:
+            raise ExpressionError(f"Unsupported operator: {type(node.op).__name__}")
+        operand = self.compile(node.operand)
+        return lambda ctx: function(operand(ctx))
+
+    def _compile_Compare(self, node):
+        operands = [self.compile(node.left)] + [self.compile(c) for c in node.comparators]
+        functions = [_COMPARISONS.get(type(op)) for op in node.ops]
+        if None in functions:
+            raise ExpressionError("Unsupported comparison")
+        def evaluate(ctx):
+            values = [operand(ctx) for operand in operands]
+            result = functions[0](values[0], values[1])
+            for i in range(1, len(functions)):
+                result = np.logical_and(result, functions[i](values[i], values[i + 1]))
+            return result
+        return evaluate
+
+    def _compile_BoolOp(self, node):
+        function = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        operands = [self.compile(value) for value in node.values]
+        def evaluate(ctx):
+            result = operands[0](ctx)
+            for operand in operands[1:]:
+                result = function(result, operand(ctx))
+            return result
+        return evaluate
+
+    def _compile_IfExp(self, node):
+        test, body, orelse = self.compile(node.test), self.compile(node.body), self.compile(node.orelse)
+        return lambda ctx: np.where(test(ctx), body(ctx), orelse(ctx))
+
+    def _compile_Subscript(self, node):
+        value = self.compile(node.value)
+        index_node = node.slice.value if isinstance(node.slice, getattr(ast, 'Index', ())) else node.slice
+        if not isinstance(index_node, ast.Constant) or not isinstance(index_node.value, int):
+            raise ExpressionError("Components must be read with a constant index, e.g. location[2]")
+        component = index_node.value
+        def evaluate(ctx):
+            column = value(ctx)
+            if not -column.shape[1] <= component < column.shape[1]:
+                raise ExpressionError(f"Component {component} out of range")
+            return column[:, [component]]
+        return evaluate
+
+    def _compile_Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.keywords:
+            raise ExpressionError("Only built-in functions with positional arguments can be called")
+        name, args = node.func.id, node.args
+
+        if name == 'attr':
+            if len(args) != 1 or not isinstance(args[0], ast.Constant) or not isinstance(args[0].value, str):
+                raise ExpressionError("attr() expects a property name string")
+            attribute = args[0].value
+            self.attributes.add(attribute)
+            return lambda ctx: ctx.column(attribute)
+
+        if name == 'rand':
+            seed = int(_scalar_argument(args[0], name)) if args else 0
+            if len(args) > 1:
+                raise ExpressionError("rand() expects at most a seed")
+            return lambda ctx: _unit_float(_mix64(ctx.identities() ^ _mix64(np.full(ctx.count, seed, dtype=np.uint64)))).reshape(-1, 1)
+
+        if name == 'noise':
+            if not 1 <= len(args) <= 3:
+                raise ExpressionError("noise() expects (point[, scale[, seed]])")
+            point = self.compile(args[0])
+            scale = self.compile(args[1]) if len(args) > 1 else (lambda ctx: _constant(1.0))
+            seed = int(_scalar_argument(args[2], name)) if len(args) > 2 else 0
+            def evaluate(ctx):
+                points = np.asarray(point(ctx), dtype=np.float64) * scale(ctx)
+                points = np.broadcast_to(points, (ctx.count, points.shape[1]))
+                padded = np.zeros((ctx.count, 3))
+                padded[:, :min(3, points.shape[1])] = points[:, :3]
+                return value_noise(padded, seed).reshape(-1, 1)
+            return evaluate
+
+        functions = _FUNCTIONS.get(name)
+        if functions is None:
+            raise ExpressionError(f"Unknown function: {name}()")
+        arity, function = functions
+        if len(args) != arity:
+            raise ExpressionError(f"{name}() expects {arity} arguments")
+        compiled_args = [self.compile(arg) for arg in args]
+        return lambda ctx: function(*(arg(ctx) for arg in compiled_args))
+
+def _length(v):
+    return np.sqrt(np.sum(np.asarray(v, dtype=np.float64) ** 2, axis=1, keepdims=True))
+
+# name: (arity, function over (N, k) arrays)
+_FUNCTIONS = {
+    'abs': (1, np.abs),
+    'sqrt': (1, np.sqrt),
+    'sin': (1, np.sin),
+    'cos': (1, np.cos),
+    'tan': (1, np.tan),
+    'floor': (1, np.floor),
+    'ceil': (1, np.ceil),
+    'round': (1, np.round),
+    'length': (1, _length),
+    'min': (2, np.minimum),
+    'max': (2, np.maximum),
+    'clamp': (3, lambda x, lo, hi: np.clip(x, lo, hi)),
+    'lerp': (3, lambda a, b, t: a + (b - a) * t),
+    'where': (3, np.where),
+}
+
+class CompiledExpression:
+    def __init__(self, source):
+        try:
+            tree = ast.parse(source.strip(), mode='eval')
+        except SyntaxError as e:
+            raise ExpressionError(f"Syntax error: {e.msg}")
+        compiler = _Compiler()
+        self.source = source
+        self._evaluate = compiler.compile(tree)
+        self.attributes = frozenset(compiler.attributes)
+
+    def evaluate(self, prims):
+        """
+        Runs the expression over the prims. Returns an (N, k) array.
+        Raises ExpressionError when the values don't fit the expression (e.g. vectors of
+        different sizes), like it does for invalid syntax.
+        """
+        ctx = ExpressionContext(prims)
+        try:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result = np.asarray(self._evaluate(ctx))
+            if result.ndim != 2:
+                result = result.reshape(len(result), -1) if result.ndim == 1 else result.reshape(1, -1)
+            return np.broadcast_to(result, (ctx.count, result.shape[1]))
+        except (ValueError, TypeError, ZeroDivisionError, FloatingPointError, OverflowError) as e:
+            raise ExpressionError(str(e)) from e
+
+@lru_cache(maxsize=256)
+def compile_expression(source):
+    """Parses and compiles an expression. Raises ExpressionError on invalid input."""
+    return CompiledExpression(source)
+
+def to_property_values(result):
+    """Converts an (N, k) result into one property value per prim (scalars or tuples)."""
+    if result.dtype.kind == 'b':
+        rows = result.tolist()
+    elif result.dtype.kind in 'iu':
+        rows = result.astype(np.int64).tolist()
+    else:
+        rows = result.astype(np.float64).tolist()
+    if result.shape[1] == 1:
+        return [row[0] for row in rows]
+    return [tuple(row) for row in rows]
@@ -0,0 +1,51 @@
+"""Content hashing of proxy trees."""
+import json
+import hashlib
+import weakref
+from ..proxy_types import register_mutation_callback
+
+# Memoized scene hashes, dropped when the scene is mutated.
+_SCENE_HASHES = weakref.WeakKeyDictionary()
+
+def _digest(data):
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=16).hexdigest()
+
+def properties_hash(properties):
+    """Stable hash of a properties dict (independent of key order and of the session)."""
+    return _digest(json.dumps(properties, sort_keys=True, default=repr))
+
+def prim_hash(prim):
+    """Hash of a single prim: its identity and properties, ignoring its children."""
+    return _digest(f"{prim.path}|{prim.fn_uuid}|{properties_hash(prim.properties_view)}")
+
+def _payload_key(payload):
+    # Payloads without a source descriptor can only be told apart by identity.
+    return repr(payload.source) if payload.source is not None else f"id:{id(payload)}"
+
+def scene_hash(root_proxy):
+    """
+    Hash of a whole proxy tree: paths, UUIDs, properties and child order.
+    Two trees with the same hash have the same prims in the same depth-first order.
+    Meant for in-session cache keys: properties are hashed through their repr, which is
+    much cheaper than a canonical JSON dump but depends on dict insertion order.
+    """
+    cached = _SCENE_HASHES.get(root_proxy)
+    if cached is not None:
+        return cached
+
+    parts = []
+    stack = [root_proxy]
+    while stack:
+        prim = stack.pop()
+        payload = f"|payload:{_payload_key(prim.payload)}" if prim.has_unloaded_payload else ""
+        parts.append(f"{prim.path}|{prim.fn_uuid!s}|{len(prim.children)}|{prim.properties_view!r}{payload}")
+        stack.extend(reversed(prim.children))
+
+    result = _digest('\n'.join(parts))
+    _SCENE_HASHES[root_proxy] = result
+    return result
+
+def _on_scene_mutated(root_proxy):
+    _SCENE_HASHES.pop(root_proxy, None)
+
+register_mutation_callback(_on_scene_mutated)
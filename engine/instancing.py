@@ -0,0 +1,179 @@
+"""
+Collection instancing of repeated subtrees.
+
+Object hierarchies that are structurally identical (same Merkle hash of their prims,
+ignoring names and the transform of the top object) are materialized once, in a prototype
+collection that isn't linked to the scene, and every repeat becomes a single empty that
+instances that collection at the repeat's transform.
+"""
+import uuid
+from .. import logger
+from ..proxy_types import DatablockProxy, copy_properties
+from . import hashing
+
+TRANSFORM_KEYS = ('location', 'rotation_euler', 'rotation_quaternion', 'rotation_mode', 'scale')
+_IDENTITY_TRANSFORM = {'location': (0.0, 0.0, 0.0), 'rotation_euler': (0.0, 0.0, 0.0), 'scale': (1.0, 1.0, 1.0)}
+_PROTOTYPES_PATH = "__fn_prototypes__"
+_UUID_NAMESPACE = uuid.UUID('6f1c5a2e-3b0d-4f7e-9a51-1d2c8e4b7a90')
+
+def _derived_uuid(base_uuid, tag):
+    return str(uuid.uuid5(_UUID_NAMESPACE, f"{base_uuid}:{tag}"))
+
+def _is_object(prim):
+    return prim.properties_view.get('datablock_type') == 'OBJECT'
+
+def _is_inside(path, root_path):
+    return path == root_path or path.startswith(root_path + '/')
+
+class _SubtreeHasher:
+    """Merkle hashes of object hierarchies, in which names and absolute paths don't matter."""
+
+    def __init__(self, proxy_map):
+        self.proxy_map = proxy_map
+        self._external = {}
+
+    def _external_signature(self, path):
+        """Content of a prim outside the subtree (e.g. the mesh an object uses), without its name."""
+        signature = self._external.get(path)
+        if signature is None:
+            target = self.proxy_map.get(path)
+            if target is None:
+                signature = f"missing:{path}"
+            else:
+                signature = hashing.properties_hash({k: v for k, v in target.properties_view.items() if k != 'name'})
+            self._external[path] = signature
+        return signature
+
+    def _relationships(self, prim, root, is_root):
+        result = {}
+        for rel_type, target_value in prim.properties_view.get('_fn_relationships', {}).items():
+            if rel_type == 'collection_links' and is_root:
+                continue  # Where the repeat is linked is carried by its instance, not the prototype
+            targets = target_value if isinstance(target_value, (list, tuple)) else [target_value]
+            result[rel_type] = [
+                f"inner:{target[len(root.path):]}" if _is_inside(target, root.path)
+                else (target if rel_type == 'collection_links' else f"outer:{self._external_signature(target)}")
+                for target in targets if isinstance(target, str)
+            ]
+        return result
+
+    def signature(self, root):
+        """Hash of the object hierarchy under `root`, ignoring names and the root transform."""
+        def visit(prim, is_root):
+            properties = {
+                k: v for k, v in prim.properties_view.items()
+                if k not in ('name', '_fn_relationships') and not (is_root and k in TRANSFORM_KEYS)
+            }
+            children = [visit(child, False) for child in prim.children]
+            return hashing.properties_hash([properties, self._relationships(prim, root, is_root), children])
+        return visit(root, True)
+
+def _candidate_roots(plan, proxy_map):
+    """Top objects of object hierarchies that have at least one object child."""
+    return [
+        prim for prim in plan
+        if _is_object(prim)
+        and not (prim.parent is not None and _is_object(prim.parent))
+        and any(_is_object(child) for child in prim.children)
+        and all(p.path in proxy_map for p in prim.get_flat_list())
+    ]
+
+def find_instance_groups(plan, excluded_uuids=frozenset(), min_count=2):
+    """
+    Groups structurally identical object hierarchies of a plan.
+    Hierarchies containing a prim in `excluded_uuids` (e.g. with overrides) are left alone.
+    Returns a list of groups (lists of hierarchy roots), each with at least `min_count` members.
+    """
+    proxy_map = {p.path: p for p in plan}
+    hasher = _SubtreeHasher(proxy_map)
+    groups = {}
+    for root in _candidate_roots(plan, proxy_map):
+        if any(str(p.fn_uuid) in excluded_uuids for p in root.get_flat_list()):
+            continue
+        groups.setdefault(hasher.signature(root), []).append(root)
+    return [members for members in groups.values() if len(members) >= max(2, min_count)]
+
+def instance_plan(plan, excluded_uuids=frozenset(), min_count=2):
+    """
+    Rewrites a plan so that every group of identical hierarchies is materialized as one
+    prototype collection plus one collection-instance empty per repeat. The proxies of the
+    plan are not modified: prims that change are replaced by copies.
+    """
+    groups = find_instance_groups(plan, excluded_uuids, min_count)
+    if not groups:
+        return plan
+
+    scene_root = plan[0]
+    replacements = {}   # path: replacement proxy (None to drop it)
+    prototypes = []
+    instances = []
+
+    for members in groups:
+        prototype = members[0]
+        prototype_path = f"{scene_root.path}/{_PROTOTYPES_PATH}/{prototype.path.strip('/').replace('/', '_')}"
+        collection = DatablockProxy(path=prototype_path, fn_uuid=_derived_uuid(prototype.fn_uuid, 'prototype'))
+        collection.properties['datablock_type'] = 'COLLECTION'
+        collection.properties['name'] = f"{prototype.properties_view.get('name', 'prototype')}_prototype"
+        prototypes.append(collection)
+
+        # The prototype hierarchy lives in the prototype collection, at the origin.
+        for prim in prototype.get_flat_list():
+            properties = copy_properties(prim.properties_view)
+            if prim is prototype:
+                for key in TRANSFORM_KEYS:
+                    properties.pop(key, None)
+                properties.update(_IDENTITY_TRANSFORM)
+            relationships = properties.setdefault('_fn_relationships', {})
+            relationships['collection_links'] = [prototype_path]
+            replacements[prim.path] = DatablockProxy(path=prim.path, fn_uuid=prim.fn_uuid, properties=properties)
+
+        for member in members:
+            if member is not prototype:
+                for prim in member.get_flat_list():
+                    replacements[prim.path] = None
+
+            instance = DatablockProxy(path=f"{member.path}__instance", fn_uuid=_derived_uuid(member.fn_uuid, 'instance'))
+            instance.properties['datablock_type'] = 'OBJECT'
+            instance.properties['name'] = member.properties_view.get('name', 'instance')
+            for key in TRANSFORM_KEYS:
+                if key in member.properties_view:
+                    instance.properties[key] = member.properties_view[key]
+            instance.properties['instance_type'] = 'COLLECTION'
+            instance.properties['_fn_relationships'] = {
+                'collection_links': list(member.properties_view.get('_fn_relationships', {}).get('collection_links', [])),
+                'instance_collection': prototype_path,
+            }
+            instances.append(instance)
+
+    new_plan = [scene_root] + prototypes
+    for proxy in plan[1:]:
+        replacement = replacements.get(proxy.path, proxy)
+        if replacement is not None:
+            new_plan.append(replacement)
+    new_plan = _drop_unused_data(new_plan, plan, replacements)
+    new_plan.extend(instances)
+
+    instanced = sum(len(members) for members in groups)
+    logger.log(f"[Instancing] {instanced} hierarchies materialized as instances of {len(groups)} prototypes "
+               f"({len(plan)} -> {len(new_plan)} plan steps).")
+    return new_plan
+
+def _drop_unused_data(new_plan, old_plan, replacements):
+    """Drops the data prims only used by hierarchies that became instances."""
+    dropped_paths = {path for path, replacement in replacements.items() if replacement is None}
+    dropped_users = set()
+    for proxy in old_plan:
+        if proxy.path in dropped_paths:
+            data_path = proxy.properties_view.get('_fn_relationships', {}).get('data')
+            if isinstance(data_path, str):
+                dropped_users.add(data_path)
+    if not dropped_users:
+        return new_plan
+
+    still_used = set()
+    for proxy in new_plan:
+        for target_value in proxy.properties_view.get('_fn_relationships', {}).values():
+            targets = target_value if isinstance(target_value, (list, tuple)) else [target_value]
+            still_used.update(t for t in targets if isinstance(t, str))
+    unused = dropped_users - still_used
+    return [proxy for proxy in new_plan if proxy.path not in unused]
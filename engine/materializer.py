@@ -1,163 +1,432 @@
+import os
 import bpy
 import json
+from concurrent.futures import ThreadPoolExecutor
 from .. import logger, uuid_manager
 from ..properties import _datablock_creation_map
-from . import utils
+from . import utils, planner, applied_values, snapshot_queue
 
-def materialize_plan(plan: list, tree: bpy.types.NodeTree):
+# Datablocks configured by pass 2 of the latest materialization: edits made between the
+# time slices of a build only hold on these, the others still get their declared values.
+_configured_uuids = set()
+
+def is_configured(uuid_str):
+    return uuid_str in _configured_uuids
+
+def materialize_plan(plan: list, tree: bpy.types.NodeTree, track_state=True):
     """
     Materializes the scene graph from a dependency-sorted plan.
     This process now includes applying base properties, saving an initial state snapshot,
     and applying any user overrides.
+    With `track_state` off, no snapshot is taken and no applied value is remembered: for
+    sessions without the addon's timers and handlers (e.g. background render workers).
+    """
+    for _ in iter_materialize_plan(plan, tree, track_state):
+        pass
+
+def iter_materialize_plan(plan: list, tree: bpy.types.NodeTree, track_state=True):
+    """
+    Step-by-step version of `materialize_plan`: a generator yielding (pass, done, total)
+    after every prim, so the work can be spread over several timer ticks. Passes run one
+    after the other, each in plan order, so the dependency order holds across steps.
     """
     logger.log("--- Materializer V11: Processing dependency-sorted plan ---")
+    _configured_uuids.clear()
     
+    proxy_map = {p.path: p for p in plan} # Create a map for quick path lookups
+    total = len(plan)
+
+    # Meshes with identical geometry share one datablock; overridden meshes keep their own.
+    override_json = _override_json(tree)
+    shared_geometry = planner.find_shared_geometry(plan, set(override_json))
+
+    # Passes 2 and 3 are prepared in worker threads while pass 1 creates the datablocks.
+    prepared_chunks = _submit_preparation(plan, proxy_map, override_json)
+
     # --- Pass 1: Creation ---
     logger.log("[Materializer-P1] Starting Creation Pass")
-    for proxy in plan:
-        if uuid_manager.find_datablock_by_uuid(str(proxy.fn_uuid)):
-            logger.log(f"[Materializer-P1] Skipping existing datablock for {proxy.path}")
-            continue
+    released_meshes = []
+    for done, proxy in enumerate(plan, 1):
+        _create_datablock(proxy, proxy_map, shared_geometry, released_meshes)
+        yield ('CREATE', done, total)
+
+    # Meshes that became linked duplicates are removed once no object uses them anymore.
+    for mesh in released_meshes:
+        if mesh.users == 0:
+            logger.log(f"[Materializer-P1] Releasing mesh '{mesh.name}', now shared with an identical mesh")
+            uuid_manager.unregister_datablock(mesh)
+            bpy.data.meshes.remove(mesh)
+
+    # --- Pass 2: Configuration, Snapshot, and Overrides ---
+    logger.log("[Materializer-P2] Starting Configuration, Snapshot, and Overrides Pass")
+    if track_state:
+        snapshotted_uuids = {item.datablock_uuid for item in tree.fn_initial_state_map}
+        edit_targets = snapshot_queue.edit_targets()
+    else:
+        snapshotted_uuids = edit_targets = None
+    prepared = []
+    done = 0
+    for chunk in prepared_chunks:
+        # Overrides may have been edited since they were prepared (e.g. between time slices)
+        override_json = _override_json(tree)
+        for prim in chunk.result():
+            done += 1
+            if prim is not None:
+                if override_json.get(prim.uuid, "") != prim.override_json:
+                    _prepare_overrides(prim, override_json.get(prim.uuid, ""))
+                prepared.append(prim)
+                _configure_datablock(prim, tree, snapshotted_uuids, edit_targets)
+                _configured_uuids.add(prim.uuid)
+            yield ('CONFIGURE', done, total)
+
+    # --- Pass 3: Relationships (Parenting and Linking) ---
+    logger.log("[Materializer-P3] Starting Relationship Pass")
+    for done, prim in enumerate(prepared, 1):
+        _relate_datablock(prim)
+        yield ('RELATE', done, total)
+
+    # --- 3. Collection Membership (Linking and Unlinking) ---
+    _synchronize_collection_membership(plan, proxy_map)
+
+def _create_datablock(proxy, proxy_map, shared_geometry, released_meshes):
+    """Pass 1: creates the prim's datablock if it doesn't exist yet."""
+    uuid_str = str(proxy.fn_uuid)
+    existing = uuid_manager.find_datablock_by_uuid(uuid_str)
+    db_type = proxy.properties_view.get('datablock_type')
+
+    if db_type == 'MESH' and uuid_str in shared_geometry:
+        owner_uuid, geometry_hash = shared_geometry[uuid_str]
+        if owner_uuid != uuid_str:
+            # Linked duplicate: its objects use the owner's mesh.
+            if existing:
+                released_meshes.append(existing)
+            return
+        if existing:
+            _build_geometry(existing, proxy, geometry_hash)
+            return
 
-        db_type = proxy.properties.get('datablock_type')
-        db_name = proxy.properties.get('name', 'unnamed')
-        datablock = None
+    if existing:
+        if db_type == 'OBJECT':
+            _assign_object_data(existing, proxy, proxy_map, shared_geometry)
+        logger.log(f"[Materializer-P1] Skipping existing datablock for {proxy.path}")
+        return
 
-        logger.log(f"[Materializer-P1] Attempting to create {db_type} for path {proxy.path}")
+    db_name = proxy.properties_view.get('name', 'unnamed')
+    datablock = None
 
+    logger.log(f"[Materializer-P1] Attempting to create {db_type} for path {proxy.path}")
+
+    try:
+        if db_type == 'OBJECT':
+            object_data = _find_object_data(proxy, proxy_map, shared_geometry)
+            datablock = bpy.data.objects.new(db_name, object_data)
+        else:
+            creation_func = _datablock_creation_map.get(db_type)
+            if not creation_func:
+                logger.log(f"[Materializer-P1] No creation function for type '{db_type}'")
+                return
+            
+            creation_args = {'name': db_name}
+            if db_type == 'LIGHT':
+                creation_args['type'] = proxy.properties_view.get('type', 'POINT')
+            
+            datablock = creation_func(**creation_args)
+            if db_type == 'MESH' and uuid_str in shared_geometry:
+                _build_geometry(datablock, proxy, shared_geometry[uuid_str][1])
+
+        if datablock:
+            uuid_manager.set_uuid(datablock, uuid_str)
+            applied_values.forget(uuid_str)
+            logger.log(f"[Materializer-P1] CREATED {db_type}: {datablock.name} (UUID: {proxy.fn_uuid})")
+
+    except Exception as e:
+        logger.log(f"[Materializer-P1] FAILED to create {db_type} for {proxy.path}: {e}")
+
+# --- Preparation (worker threads) ---
+
+# Prims prepared per task: large enough to amortize scheduling, small enough to pipeline.
+_PREPARE_CHUNK_SIZE = 512
+_prepare_executor = None
+
+class _PreparedPrim:
+    """Everything passes 2 and 3 need for one prim, resolved ahead so they only do the bpy calls."""
+    __slots__ = ('uuid', 'path', 'db_type', 'writes', 'overrides', 'override_json', 'parent_uuid', 'instance_uuid')
+
+    def __init__(self, proxy):
+        self.uuid = str(proxy.fn_uuid)
+        self.path = proxy.path
+        self.db_type = proxy.properties_view.get('datablock_type')
+        self.writes = []      # (property path parts, value, whether the last applied value can be trusted)
+        self.overrides = []   # (property path parts, value, UUID of a datablock pointer or None)
+        self.override_json = ""  # The override JSON `overrides` was decoded from
+        self.parent_uuid = None
+        self.instance_uuid = None
+
+def _get_prepare_executor():
+    global _prepare_executor
+    if _prepare_executor is None:
+        _prepare_executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="fn_prepare")
+    return _prepare_executor
+
+def shutdown_preparation():
+    """Stops the preparation threads (on unregister)."""
+    global _prepare_executor
+    if _prepare_executor is not None:
+        _prepare_executor.shutdown(wait=False, cancel_futures=True)
+        _prepare_executor = None
+
+def _submit_preparation(plan, proxy_map, override_json):
+    """Futures of the prepared prims of the plan, in plan order, one per chunk."""
+    executor = _get_prepare_executor()
+    return [
+        executor.submit(_prepare_chunk, plan[start:start + _PREPARE_CHUNK_SIZE], proxy_map, override_json)
+        for start in range(0, len(plan), _PREPARE_CHUNK_SIZE)
+    ]
+
+def _override_json(tree):
+    return {item.datablock_uuid: item.override_data_json for item in tree.fn_override_map if item.override_data_json}
+
+def _prepare_chunk(proxies, proxy_map, override_json):
+    """Prepared prims of the proxies, None for the ones that couldn't be prepared."""
+    prepared = []
+    for proxy in proxies:
+        try:
+            prepared.append(_prepare_prim(proxy, proxy_map, override_json))
+        except Exception as e:
+            # Pass 1 already created the datablocks: a malformed prim must not abort the sync
+            logger.log(f"[Materializer-P2] ERROR: Could not prepare {proxy.path}, it is left unconfigured: {e}")
+            prepared.append(None)
+    return prepared
+
+def _prepare_overrides(prim, raw_overrides):
+    """Decodes a prim's override JSON into `prim.overrides`, and updates which writes are cacheable."""
+    prim.override_json = raw_overrides
+    prim.overrides = []
+    overrides = {}
+    if raw_overrides:
+        try:
+            overrides = dict(json.loads(raw_overrides))
+        except (json.JSONDecodeError, TypeError, ValueError):
+            logger.log(f"[Materializer-P2] ERROR: Could not decode override JSON for {prim.uuid}")
+
+    for key, value in overrides.items():
+        parts = tuple(key.split('.'))
         try:
-            if db_type == 'OBJECT':
-                object_data = None
-                if '_fn_relationships' in proxy.properties and 'data' in proxy.properties['_fn_relationships']:
-                    data_path = proxy.properties['_fn_relationships']['data']
-                    logger.log(f"[Materializer-P1] Object {proxy.path} requires data from {data_path}")
-                    # Find the proxy for the data
-                    data_proxy = next((p for p in plan if p.path == data_path), None)
-                    if data_proxy:
-                        # Find the already-materialized datablock for that proxy
-                        object_data = uuid_manager.find_datablock_by_uuid(str(data_proxy.fn_uuid))
-                        if object_data:
-                            logger.log(f"[Materializer-P1] Found materialized data '{object_data.name}' for object {proxy.path}")
-                        else:
-                            logger.log(f"[Materializer-P1] ERROR: Data proxy {data_path} was found, but its datablock is not materialized yet. Check dependency sorting.")
-                    else:
-                        logger.log(f"[Materializer-P1] ERROR: Data path {data_path} not found in plan for object {proxy.path}")
-                
-                datablock = bpy.data.objects.new(db_name, object_data)
+            if isinstance(value, dict) and value.get('_type') == 'UUID_POINTER':
+                prim.overrides.append((parts, None, value['value']))
             else:
-                creation_func = _datablock_creation_map.get(db_type)
-                if not creation_func:
-                    logger.log(f"[Materializer-P1] No creation function for type '{db_type}'")
-                    continue
-                
-                creation_args = {'name': db_name}
-                if db_type == 'LIGHT':
-                    creation_args['type'] = proxy.properties.get('type', 'POINT')
-                
-                datablock = creation_func(**creation_args)
-
-            if datablock:
-                uuid_manager.set_uuid(datablock, str(proxy.fn_uuid))
-                logger.log(f"[Materializer-P1] CREATED {db_type}: {datablock.name} (UUID: {proxy.fn_uuid})")
+                prim.overrides.append((parts, utils.prepare_value((prim.db_type, parts), value), None))
+        except Exception as e:
+            logger.log(f"[Materializer-P2] ERROR: Skipping malformed override '{key}' of {prim.uuid}: {e}")
+
+    # Paths into another datablock (`data.*`) may change without this one being updated,
+    # and overridden paths are written twice per sync: neither can skip the RNA read.
+    prim.writes = [
+        (parts, value, parts[0] != 'data' and '.'.join(parts) not in overrides)
+        for parts, value, _ in prim.writes
+    ]
 
+def _prepare_prim(proxy, proxy_map, override_json):
+    """Pure Python: splits property paths, converts values, decodes overrides and resolves relationships."""
+    prim = _PreparedPrim(proxy)
+    for key, value in proxy.properties_view.items():
+        if key.startswith('_') or key in ['datablock_type']:
+            continue
+        parts = tuple(key.split('.'))
+        try:
+            prim.writes.append((parts, utils.prepare_value((prim.db_type, parts), value), False))
         except Exception as e:
-            logger.log(f"[Materializer-P1] FAILED to create {db_type} for {proxy.path}: {e}")
+            logger.log(f"[Materializer-P2] ERROR: Skipping malformed property '{key}' of {proxy.path}: {e}")
+    _prepare_overrides(prim, override_json.get(prim.uuid, ""))
 
-    # --- Pass 2: Configuration, Snapshot, and Overrides ---
-    logger.log("[Materializer-P2] Starting Configuration, Snapshot, and Overrides Pass")
-    for proxy in plan:
-        datablock = uuid_manager.find_datablock_by_uuid(str(proxy.fn_uuid))
-        if not datablock:
+    if '/' in proxy.path.lstrip('/'): # Check if it's not a root-level proxy
+        parent_path = '/' + '/'.join(proxy.path.lstrip('/').split('/')[:-1])
+        if parent_path in proxy_map:
+            prim.parent_uuid = str(proxy_map[parent_path].fn_uuid)
+    instance_path = proxy.properties_view.get('_fn_relationships', {}).get('instance_collection')
+    if instance_path and instance_path in proxy_map:
+        prim.instance_uuid = str(proxy_map[instance_path].fn_uuid)
+    return prim
+
+# --- Application (main thread) ---
+
+def _configure_datablock(prim, tree, snapshotted_uuids, edit_targets=frozenset()):
+    """
+    Pass 2: applies the base properties, captures the initial snapshot and applies the overrides.
+    With `snapshotted_uuids` None, nothing is snapshotted and every base property is written.
+    """
+    datablock = uuid_manager.find_datablock_by_uuid(prim.uuid)
+    if not datablock:
+        return
+
+    # logger.log(f"[Materializer-P2] Configuring base state for {prim.path}")
+    track_state = snapshotted_uuids is not None
+    for parts, value, cacheable in prim.writes:
+        cacheable = cacheable and track_state
+        if cacheable and applied_values.is_applied(prim.uuid, parts, value):
             continue
+        try:
+            if utils.set_nested_property(datablock, parts, value, (prim.db_type, parts)) and cacheable:
+                applied_values.record(prim.uuid, parts, value)
+        except Exception as e:
+            logger.log(f"[Materializer-P2] Could not set base property '{'.'.join(parts)}' on {datablock.name}: {e}")
 
-        # logger.log(f"[Materializer-P2] Configuring base state for {proxy.path}")
-        for key, value in proxy.properties.items():
-            if key.startswith('_') or key in ['datablock_type']:
-                continue
-            
-            try:
-                utils.set_nested_property(datablock, key, value)
-            except Exception as e:
-                logger.log(f"[Materializer-P2] Could not set base property '{key}' on {datablock.name}: {e}")
-
-        uuid_str = str(proxy.fn_uuid)
-        initial_state_entry = next((item for item in tree.fn_initial_state_map if item.datablock_uuid == uuid_str), None)
-        if not initial_state_entry:
-            # logger.log(f"[Materializer-P2] Capturing initial state for {datablock.name} ({uuid_str})")
-            initial_state = utils.capture_initial_state(datablock)
-            new_entry = tree.fn_initial_state_map.add()
-            new_entry.datablock_uuid = uuid_str
-            new_entry.state_data_json = json.dumps(initial_state)
-
-        override_entry = next((item for item in tree.fn_override_map if item.datablock_uuid == uuid_str), None)
-        if override_entry and override_entry.override_data_json:
-            # logger.log(f"[Materializer-P2] Applying overrides for {datablock.name} ({uuid_str})")
-            try:
-                overrides = json.loads(override_entry.override_data_json)
-                for key, value in overrides.items():
-                    final_value = utils.from_json_safe(value)
-                    utils.set_nested_property(datablock, key, final_value)
-            except json.JSONDecodeError:
-                logger.log(f"[Materializer-P2] ERROR: Could not decode override JSON for {uuid_str}")
-            except Exception as e:
-                logger.log(f"[Materializer-P2] ERROR: Failed to apply override for {uuid_str}: {e}")
+    if track_state and prim.uuid not in snapshotted_uuids:
+        if prim.overrides or datablock.as_pointer() in edit_targets:
+            # Captured now, before the overrides are applied (or the user edits it): a later
+            # capture would take them for the declared state
+            snapshot_queue.store(tree, prim.uuid, datablock)
+        else:
+            # Captured later, in idle time, with these base values laid over it
+            base_values = {'.'.join(parts): value for parts, value, _ in prim.writes}
+            snapshot_queue.enqueue(tree, prim.uuid, base_values)
+        snapshotted_uuids.add(prim.uuid)
 
-    # --- Pass 3: Relationships (Parenting and Linking) ---
-    logger.log("[Materializer-P3] Starting Relationship Pass")
-    proxy_map = {p.path: p for p in plan} # Create a map for quick path lookups
+    # logger.log(f"[Materializer-P2] Applying overrides for {datablock.name} ({prim.uuid})")
+    for parts, value, pointer_uuid in prim.overrides:
+        try:
+            if pointer_uuid is not None:
+                value = uuid_manager.find_datablock_by_uuid(pointer_uuid)
+            utils.set_nested_property(datablock, parts, value, (prim.db_type, parts))
+        except Exception as e:
+            logger.log(f"[Materializer-P2] ERROR: Failed to apply override for {prim.uuid}: {e}")
+
+def _relate_datablock(prim):
+    """Pass 3: parents objects after the path hierarchy and sets their instanced collection."""
+    if not prim.parent_uuid and not prim.instance_uuid:
+        return
+    from_db = uuid_manager.find_datablock_by_uuid(prim.uuid)
+    if not from_db or not isinstance(from_db, bpy.types.Object):
+        # Parenting logic only applies to Objects.
+        return
 
+    # --- 1. Infer Parenting from Path Hierarchy ---
+    if prim.parent_uuid:
+        parent_db = uuid_manager.find_datablock_by_uuid(prim.parent_uuid)
+        if parent_db and from_db.parent != parent_db:
+            if isinstance(parent_db, bpy.types.Object):
+                logger.log(f"[Materializer-P3] Setting parent for '{from_db.name}' to '{parent_db.name}' based on path hierarchy.")
+                from_db.parent = parent_db
+            else:
+                logger.log(f"[Materializer-P3] WARNING: Cannot parent {type(from_db)} to {type(parent_db)}.")
+
+    # --- 2. Collection Instancing ---
+    if prim.instance_uuid:
+        instance_collection = uuid_manager.find_datablock_by_uuid(prim.instance_uuid)
+        if isinstance(instance_collection, bpy.types.Collection) and from_db.instance_collection != instance_collection:
+            from_db.instance_collection = instance_collection
+
+def _find_object_data(proxy, proxy_map, shared_geometry):
+    """The materialized datablock an OBJECT prim's `data` relationship points to (or None)."""
+    data_path = proxy.properties_view.get('_fn_relationships', {}).get('data')
+    if not data_path:
+        return None
+    data_proxy = proxy_map.get(data_path)
+    if not data_proxy:
+        logger.log(f"[Materializer-P1] ERROR: Data path {data_path} not found in plan for object {proxy.path}")
+        return None
+
+    data_uuid = str(data_proxy.fn_uuid)
+    data_uuid = shared_geometry.get(data_uuid, (data_uuid,))[0]
+    object_data = uuid_manager.find_datablock_by_uuid(data_uuid)
+    if not object_data:
+        logger.log(f"[Materializer-P1] ERROR: Data proxy {data_path} was found, but its datablock is not materialized yet. Check dependency sorting.")
+    return object_data
+
+def _assign_object_data(obj, proxy, proxy_map, shared_geometry):
+    """Points an existing object at its data, e.g. after its mesh became (or stopped being) shared."""
+    object_data = _find_object_data(proxy, proxy_map, shared_geometry)
+    if object_data is not None and obj.data != object_data:
+        try:
+            obj.data = object_data
+        except (TypeError, AttributeError) as e:
+            logger.log(f"[Materializer-P1] Could not assign data '{object_data.name}' to '{obj.name}': {e}")
+
+def _build_geometry(mesh, proxy, geometry_hash):
+    """Fills a mesh from the prim's `_fn_geometry_data`, unless it already holds that geometry."""
+    if mesh.get('_fn_geometry_hash') == geometry_hash:
+        return
+    geometry = proxy.properties_view['_fn_geometry_data']
+    mesh.clear_geometry()
+    mesh.from_pydata(list(geometry.get('vertices', ())), list(geometry.get('edges', ())), list(geometry.get('faces', ())))
+    mesh.update()
+    mesh['_fn_geometry_hash'] = geometry_hash
+
+def _link_target_collection(target_path, proxy_map):
+    """The collection a `collection_links` path points to (a scene links into its master collection)."""
+    target_proxy = proxy_map.get(target_path)
+    if not target_proxy:
+        logger.log(f"[Materializer-P3] Could not find target proxy for collection link path: {target_path}")
+        return None
+
+    target_datablock = uuid_manager.find_datablock_by_uuid(str(target_proxy.fn_uuid))
+    if not target_datablock:
+        logger.log(f"[Materializer-P3] Could not find target datablock for collection link path: {target_path}")
+        return None
+
+    if isinstance(target_datablock, bpy.types.Scene):
+        target_datablock = target_datablock.collection
+    if not isinstance(target_datablock, bpy.types.Collection):
+        logger.log(f"[Materializer-P3] ERROR: Final target '{target_datablock.name}' is not a collection. Aborting link.")
+        return None
+    return target_datablock
+
+def _synchronize_collection_membership(plan, proxy_map):
+    """
+    Makes the objects and child collections of every managed collection match the
+    `collection_links` of the plan. The desired members of each collection are gathered
+    as sets and diffed against the current ones, so only missing links and stale links are
+    touched. Members that aren't part of the plan (added by the user) are never unlinked.
+    """
+    planned_datablocks = {}
+    for proxy in plan:
+        datablock = uuid_manager.find_datablock_by_uuid(str(proxy.fn_uuid))
+        if datablock:
+            planned_datablocks[proxy.path] = datablock
+    managed = set(planned_datablocks.values())
+
+    # { collection: (desired objects, desired child collections) }
+    desired = {}
+    for datablock in managed:
+        if isinstance(datablock, bpy.types.Collection):
+            desired[datablock] = (set(), set())
+        elif isinstance(datablock, bpy.types.Scene):
+            desired[datablock.collection] = (set(), set())
+
+    target_collections = {}  # Link targets are shared by many prims: resolve each path once
     for proxy in plan:
-        from_db = uuid_manager.find_datablock_by_uuid(str(proxy.fn_uuid))
-        if not from_db or not isinstance(from_db, bpy.types.Object):
-            # Parenting logic only applies to Objects.
+        from_db = planned_datablocks.get(proxy.path)
+        if not isinstance(from_db, (bpy.types.Object, bpy.types.Collection)):
+            continue
+        target_value = proxy.properties_view.get('_fn_relationships', {}).get('collection_links')
+        if not target_value:
             continue
+        target_paths = target_value if isinstance(target_value, list) else [target_value]
+        for target_path in target_paths:
+            if target_path not in target_collections:
+                target_collections[target_path] = _link_target_collection(target_path, proxy_map)
+            collection = target_collections[target_path]
+            if collection is None:
+                continue
+            members = desired.setdefault(collection, (set(), set()))
+            members[0 if isinstance(from_db, bpy.types.Object) else 1].add(from_db)
 
-        # --- 1. Infer Parenting from Path Hierarchy ---
-        if '/' in proxy.path.lstrip('/'): # Check if it's not a root-level proxy
-            parent_path = '/' + '/'.join(proxy.path.lstrip('/').split('/')[:-1])
-            if parent_path in proxy_map:
-                parent_proxy = proxy_map[parent_path]
-                parent_db = uuid_manager.find_datablock_by_uuid(str(parent_proxy.fn_uuid))
-                if parent_db and from_db.parent != parent_db:
-                    if isinstance(from_db, bpy.types.Object) and isinstance(parent_db, bpy.types.Object):
-                        logger.log(f"[Materializer-P3] Setting parent for '{from_db.name}' to '{parent_db.name}' based on path hierarchy.")
-                        from_db.parent = parent_db
-                    else:
-                        logger.log(f"[Materializer-P3] WARNING: Cannot parent {type(from_db)} to {type(parent_db)}.")
-
-        # --- 2. Process Other Explicit Relationships (like collection linking) ---
-        if '_fn_relationships' in proxy.properties:
-            for rel_type, target_value in proxy.properties['_fn_relationships'].items():
-                if rel_type == 'data': # Data relationship is handled in Pass 1
-                    continue
-                
+    linked = unlinked = 0
+    for collection, (desired_objects, desired_children) in desired.items():
+        for current, wanted, kind in ((collection.objects, desired_objects, "object"), (collection.children, desired_children, "collection")):
+            existing = set(current)
+            # Link first, so a moved datablock is never left without a collection.
+            for datablock in wanted - existing:
                 try:
-                    if rel_type == 'collection_links':
-                        target_paths = target_value if isinstance(target_value, list) else [target_value]
-                        for single_target_path in target_paths:
-                            target_proxy = proxy_map.get(single_target_path)
-                            if not target_proxy:
-                                logger.log(f"[Materializer-P3] Could not find target proxy for collection link path: {single_target_path}")
-                                continue
-                            
-                            target_datablock = uuid_manager.find_datablock_by_uuid(str(target_proxy.fn_uuid))
-                            if not target_datablock:
-                                logger.log(f"[Materializer-P3] Could not find target datablock for collection link path: {single_target_path}")
-                                continue
-
-                            collection_to_link_into = target_datablock
-                            if isinstance(target_datablock, bpy.types.Scene):
-                                collection_to_link_into = target_datablock.collection
-                            
-                            if not isinstance(collection_to_link_into, bpy.types.Collection):
-                                logger.log(f"[Materializer-P3] ERROR: Final target '{collection_to_link_into.name}' is not a collection. Aborting link.")
-                                continue
-
-                            if isinstance(from_db, bpy.types.Object) and from_db.name not in collection_to_link_into.objects:
-                                collection_to_link_into.objects.link(from_db)
-                                logger.log(f"[Materializer-P3] SUCCESS: Linked '{from_db.name}' to collection '{collection_to_link_into.name}'")
-                            elif isinstance(from_db, bpy.types.Collection) and from_db.name not in collection_to_link_into.children:
-                                collection_to_link_into.children.link(from_db)
-                                logger.log(f"[Materializer-P3] SUCCESS: Linked collection '{from_db.name}' to collection '{collection_to_link_into.name}'")
-                except Exception as e:
-                    logger.log(f"[Materializer-P3] FAILED to process '{rel_type}' for '{proxy.path}': {e}")
\ No newline at end of file
+                    current.link(datablock)
+                    linked += 1
+                except RuntimeError as e:
+                    logger.log(f"[Materializer-P3] FAILED to link {kind} '{datablock.name}' to '{collection.name}': {e}")
+            for datablock in (existing - wanted) & managed:
+                try:
+                    current.unlink(datablock)
+                    unlinked += 1
+                except RuntimeError as e:
+                    logger.log(f"[Materializer-P3] FAILED to unlink {kind} '{datablock.name}' from '{collection.name}': {e}")
+
+    logger.log(f"[Materializer-P3] Collection membership: {linked} links, {unlinked} unlinks across {len(desired)} collections")
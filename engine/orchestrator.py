@@ -1,6 +1,6 @@
 import bpy
 from .. import logger, uuid_manager
-from . import planner, materializer
+from . import planner, materializer, state_gc, instancing, scheduler, hashing
 from ..proxy_types import DatablockProxy
 from ..properties import _datablock_creation_map
 
@@ -23,40 +23,100 @@ def _initialize_creation_map():
             'ACTION': bpy.data.actions.new,
         })
 
-def execute_node_tree(tree, depsgraph):
+def _tree_updated(tree, depsgraph):
+    """Whether the tree is among the depsgraph's updates (always assumed without a depsgraph)."""
+    if depsgraph is None:
+        return True
+    return depsgraph.id_type_updated('NODETREE') and \
+        any(getattr(update.id, 'original', update.id) == tree for update in depsgraph.updates)
+
+def execute_node_tree(tree, depsgraph, force=False):
+    """
+    Evaluates the active branch of the tree and brings the managed datablocks in line with it.
+    With time slicing, a run in progress or complete is only replaced when the tree changed
+    (or with `force`): the updates caused by the run's own writes don't re-evaluate the tree.
+    """
     global _is_executing
     if _is_executing: return
+    if tree.fn_time_sliced and not force and not _tree_updated(tree, depsgraph):
+        active_run = scheduler.active_run()
+        run_key = active_run.key if active_run else scheduler.last_completed_key()
+        if run_key and run_key[0] == tree.name:
+            return
     _is_executing = True
     try:
         _initialize_creation_map()
         final_root_proxy = _evaluate_active_branch(tree)
         if final_root_proxy:
-            execution_plan = planner.plan_execution(final_root_proxy)
-            _synchronize_blender_state(tree, execution_plan, depsgraph, final_root_proxy)
+            if not tree.fn_time_sliced:
+                execution_plan = plan_scene(tree, final_root_proxy)
+                _synchronize_blender_state(tree, execution_plan, depsgraph, final_root_proxy)
+                return
+
+            # A run already building this exact scene is left alone; any other run is outdated.
+            run_key = (tree.name, hashing.scene_hash(final_root_proxy), tree.fn_payload_loading,
+                       tree.fn_instance_repeats, tree.fn_instance_min_count)
+            active_run = scheduler.active_run()
+            if active_run and active_run.key == run_key:
+                return
+            execution_plan = plan_scene(tree, final_root_proxy)
+            # Our own edits trigger depsgraph updates too: don't rebuild a scene that is complete.
+            if run_key == scheduler.last_completed_key() and \
+                    set(uuid_manager.get_all_managed_datablocks()) == {str(p.fn_uuid) for p in execution_plan}:
+                return
+            scheduler.start(
+                _iter_synchronize(tree, execution_plan, final_root_proxy),
+                tree.fn_time_budget / 1000.0, key=run_key, label=f"Sync of {len(execution_plan)} prims"
+            )
     finally:
         _is_executing = False
 
-def _synchronize_blender_state(tree, plan: list, depsgraph, root_proxy):
+def plan_scene(tree, root_proxy):
+    """The execution plan of a scene, with the tree's payload and instancing settings applied."""
+    plan = planner.plan_execution(root_proxy, tree.fn_payload_loading)
+    if plan and tree.fn_instance_repeats:
+        overridden_uuids = {item.datablock_uuid for item in tree.fn_override_map if item.override_data_json}
+        plan = instancing.instance_plan(plan, overridden_uuids, tree.fn_instance_min_count)
+    return plan
+
+def _synchronize_blender_state(tree, plan: list, depsgraph, root_proxy, recreate_uuids=(), collect_garbage=True,
+                               track_state=True):
+    """
+    Makes the managed datablocks match the plan: datablocks that aren't planned anymore are
+    destroyed, the others are created or updated in place. Datablocks in `recreate_uuids`
+    are destroyed and built again from scratch. With `collect_garbage` off, the state of
+    destroyed datablocks is kept (e.g. between the variants of a batch). With `track_state`
+    off, no snapshot is taken and no applied value is cached (see `materializer.materialize_plan`).
+    """
+    # A time-sliced sync still in progress is superseded by this one.
+    scheduler.cancel()
+    for _ in _iter_synchronize(tree, plan, root_proxy, recreate_uuids, collect_garbage, track_state):
+        pass
+
+def _iter_synchronize(tree, plan, root_proxy, recreate_uuids=(), collect_garbage=True, track_state=True):
+    """Step-by-step version of `_synchronize_blender_state`, yielding the materializer's progress."""
     desired_uuids = {str(p.fn_uuid) for p in plan}
     current_datablocks = uuid_manager.get_all_managed_datablocks()
     current_uuids = set(current_datablocks.keys())
 
-    uuids_to_destroy = current_uuids - desired_uuids
+    uuids_to_destroy = (current_uuids - desired_uuids) | (current_uuids & set(recreate_uuids))
     
     if uuids_to_destroy:
         _destroy_datablocks_safely(uuids_to_destroy, current_datablocks)
         # CRITICAL FIX: Invalidate the cache after destruction.
         # This prevents the materializer from accessing stale, destroyed datablocks.
         uuid_manager.invalidate_cache()
+        if collect_garbage and tree.fn_gc_incremental:
+            state_gc.collect_garbage(tree, desired_uuids, tree.fn_gc_grace_period, candidates=uuids_to_destroy)
 
     # The materializer now handles all creation, configuration, and linking.
-    materializer.materialize_plan(plan, tree)
+    yield from materializer.iter_materialize_plan(plan, tree, track_state)
     
     bpy.context.view_layer.update()
 
-    if root_proxy.properties.get('datablock_type') == 'SCENE':
+    if root_proxy.properties_view.get('datablock_type') == 'SCENE':
         scene_db = uuid_manager.find_datablock_by_uuid(str(root_proxy.fn_uuid))
-        if scene_db and bpy.context.window.scene != scene_db:
+        if scene_db and bpy.context.window and bpy.context.window.scene != scene_db:
             bpy.context.window.scene = scene_db
 
 def _destroy_datablocks_safely(uuids_to_destroy, all_managed_datablocks):
@@ -135,14 +195,27 @@ def _evaluate_active_branch(tree):
         return final_value
     return None
 
-def _evaluate_node(tree, node, session_cache):
+def _evaluate_node(tree, node, session_cache, socket_values=None):
+    """
+    Evaluates a node and, recursively, its upstream nodes. `socket_values` maps
+    (node id, input identifier) to values that replace what the input would receive.
+    """
     if node.fn_node_id in session_cache:
         return session_cache[node.fn_node_id]
     kwargs = {'tree': tree}
+    # Nodes with lazy inputs receive a callable per linked input instead of its value.
+    lazy_inputs = getattr(node, 'fn_lazy_inputs', False)
+    shared_node_ids = _shared_node_ids(tree) if lazy_inputs else None
     for input_socket in node.inputs:
-        if input_socket.is_linked:
+        key = (node.fn_node_id, input_socket.identifier)
+        if socket_values and key in socket_values:
+            kwargs[input_socket.identifier] = socket_values[key]
+        elif input_socket.is_linked:
             link = input_socket.links[0]
-            upstream_results = _evaluate_node(tree, link.from_node, session_cache)
+            if lazy_inputs:
+                kwargs[input_socket.identifier] = _deferred_evaluation(tree, link, session_cache, shared_node_ids, socket_values)
+                continue
+            upstream_results = _evaluate_node(tree, link.from_node, session_cache, socket_values)
             kwargs[input_socket.identifier] = upstream_results.get(link.from_socket.identifier)
         else:
             if hasattr(input_socket, 'default_value'):
@@ -152,4 +225,82 @@ def _evaluate_node(tree, node, session_cache):
 
     node_results = node.execute(**kwargs) if hasattr(node, 'execute') else {}
     session_cache[node.fn_node_id] = node_results
-    return node_results
\ No newline at end of file
+    return node_results
+
+# --- Lazy Evaluation ---
+
+class _VariantCache(dict):
+    """
+    Evaluation cache of one deferred evaluation. Results of shared nodes go to (and come
+    from) the session cache; the others are dropped with the variant they were built for.
+    """
+
+    def __init__(self, session_cache, shared_node_ids):
+        super().__init__()
+        self.session_cache = session_cache
+        self.shared_node_ids = shared_node_ids
+
+    def __contains__(self, node_id):
+        if node_id in self.shared_node_ids and node_id in self.session_cache:
+            return True
+        return super().__contains__(node_id)
+
+    def __getitem__(self, node_id):
+        if node_id in self.shared_node_ids and node_id in self.session_cache:
+            return self.session_cache[node_id]
+        return super().__getitem__(node_id)
+
+    def __setitem__(self, node_id, results):
+        if node_id in self.shared_node_ids:
+            self.session_cache[node_id] = results
+        else:
+            super().__setitem__(node_id, results)
+
+def _shared_node_ids(tree):
+    """Nodes whose outputs feed more than one input: their results are worth keeping."""
+    consumers = {}
+    for link in tree.links:
+        node_id = link.from_node.fn_node_id
+        consumers[node_id] = consumers.get(node_id, 0) + 1
+    return {node_id for node_id, count in consumers.items() if count > 1}
+
+def _downstream_node_ids(tree, node_ids):
+    """The given nodes and every node that depends on one of them."""
+    downstream = {}
+    for link in tree.links:
+        downstream.setdefault(link.from_node.fn_node_id, set()).add(link.to_node.fn_node_id)
+    result = set(node_ids)
+    stack = list(node_ids)
+    while stack:
+        for node_id in downstream.get(stack.pop(), ()):
+            if node_id not in result:
+                result.add(node_id)
+                stack.append(node_id)
+    return result
+
+def _deferred_evaluation(tree, link, session_cache, shared_node_ids, socket_values=None):
+    """
+    A callable evaluating the upstream side of a link. The node is looked up by name when
+    called, so the callable stays safe to use after the tree's links were rebuilt.
+    The callable accepts socket values of its own (see `_evaluate_node`): the nodes that
+    depend on them are evaluated again for each call, every other node is evaluated once
+    and shared through the session cache.
+    """
+    node_name = link.from_node.name
+    socket_identifier = link.from_socket.identifier
+    dependent_node_ids = {}  # frozenset of parameterized node ids: the nodes depending on them
+
+    def evaluate(variant_values=None):
+        node = tree.nodes.get(node_name)
+        if node is None:
+            return None
+        values = {**(socket_values or {}), **(variant_values or {})}
+        shared = {n.fn_node_id for n in tree.nodes} if variant_values else shared_node_ids
+        if values:
+            parameterized = frozenset(node_id for node_id, _ in values)
+            if parameterized not in dependent_node_ids:
+                dependent_node_ids[parameterized] = _downstream_node_ids(tree, parameterized)
+            shared = shared - dependent_node_ids[parameterized]
+        results = _evaluate_node(tree, node, _VariantCache(session_cache, shared), values)
+        return results.get(socket_identifier)
+    return evaluate
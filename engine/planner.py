@@ -1,7 +1,34 @@
 from collections import deque
 from .. import logger
+from . import hashing
 
-def plan_execution(root_proxy):
+def _should_load(prim, policy):
+    return prim.has_unloaded_payload and (policy == 'ALL' or prim.properties_view.get('_fn_payload_active', True))
+
+def load_payloads(root_proxy, policy='ACTIVE'):
+    """
+    Returns the scene with its deferred payloads loaded, ready to be planned.
+    'ALL' loads every payload, 'ACTIVE' only those flagged with `_fn_payload_active`,
+    'NONE' none of them (unloaded payloads are not materialized).
+    Payloads loaded here may contain payloads of their own, which are visited as well.
+    The upstream scene is never mutated (it may be cached by its node or shared with other
+    consumers): when something has to be loaded, it is loaded into a copy.
+    """
+    if policy == 'NONE' or not any(_should_load(prim, policy) for prim in root_proxy.get_flat_list()):
+        return root_proxy
+    root_proxy = root_proxy.clone()
+    loaded = 0
+    stack = [root_proxy]
+    while stack:
+        prim = stack.pop()
+        if _should_load(prim, policy):
+            prim.load_payload()
+            loaded += 1
+        stack.extend(prim.children)
+    logger.log(f"[Planner] Loaded {loaded} payloads (policy: {policy}).")
+    return root_proxy
+
+def plan_execution(root_proxy, payload_policy='ACTIVE'):
     """
     Creates a dependency-resolved execution plan using a topological sort.
     Ensures that data-blocks (lights, meshes) are created before the objects that use them.
@@ -9,6 +36,8 @@ def plan_execution(root_proxy):
     if not root_proxy:
         return []
 
+    root_proxy = load_payloads(root_proxy, payload_policy)
+
     # 1. Flatten the tree into a list and a map for easy lookup
     all_proxies = root_proxy.get_flat_list()
     proxy_map = {p.path: p for p in all_proxies}
@@ -24,8 +53,8 @@ def plan_execution(root_proxy):
             in_degree[proxy.path] += 1
 
         # Relationship dependencies
-        if '_fn_relationships' in proxy.properties:
-            for rel_type, target_value in proxy.properties['_fn_relationships'].items():
+        if '_fn_relationships' in proxy.properties_view:
+            for rel_type, target_value in proxy.properties_view['_fn_relationships'].items():
                 # The target can be a single path (string) or a list of paths
                 target_paths = target_value if isinstance(target_value, list) else [target_value]
 
@@ -57,3 +86,40 @@ def plan_execution(root_proxy):
         logger.log(f"[Planner] Plan length: {len(sorted_plan)}, Total prims: {len(all_proxies)}")
         # For now, return a partially sorted list to aid debugging
         return [] # Return an empty plan to prevent partial materialization
+
+def find_shared_geometry(plan, excluded_uuids=frozenset()):
+    """
+    Groups the MESH prims of a plan whose geometry and properties (apart from the name) are
+    identical, so they can be materialized as a single mesh used by every object.
+    Returns {mesh uuid: (uuid of the mesh that owns the datablock, geometry hash)} for every
+    mesh prim with geometry. Prims in `excluded_uuids` (e.g. meshes with overrides) always own
+    their datablock: edited data is split off instead of being shared.
+    """
+    geometry_hashes = {}  # Interned geometry is shared between prims: hash it once
+    owners = {}
+    result = {}
+    for proxy in plan:
+        if proxy.properties_view.get('datablock_type') != 'MESH':
+            continue
+        geometry = proxy.properties_view.get('_fn_geometry_data')
+        if not geometry:
+            continue
+
+        geometry_hash = geometry_hashes.get(id(geometry))
+        if geometry_hash is None:
+            geometry_hash = geometry_hashes[id(geometry)] = hashing.properties_hash(geometry)
+
+        uuid_str = str(proxy.fn_uuid)
+        if uuid_str in excluded_uuids:
+            result[uuid_str] = (uuid_str, geometry_hash)
+            continue
+
+        other_properties = {k: v for k, v in proxy.properties_view.items() if k not in ('name', '_fn_geometry_data')}
+        key = (geometry_hash, hashing.properties_hash(other_properties))
+        owner = owners.setdefault(key, uuid_str)
+        result[uuid_str] = (owner, geometry_hash)
+
+    shared = sum(1 for uuid_str, (owner, _) in result.items() if owner != uuid_str)
+    if shared:
+        logger.log(f"[Planner] {shared} meshes share the data of {len(result) - shared} unique meshes.")
+    return result
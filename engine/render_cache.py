@@ -0,0 +1,126 @@
+"""
+Content-addressed cache of batch render outputs.
+
+A variant is identified by a hash of what it renders: the resolved prims of its plan
+(paths and properties, render settings included since they live on the scene prim), the
+user overrides of those prims and the Blender version. A manifest next to the outputs
+records which hash each output file was rendered from; it is saved after every finished
+variant, so an interrupted batch resumes with the variants it hadn't finished yet.
+"""
+import os
+import json
+import shutil
+import bpy
+from .. import logger
+from . import hashing
+
+MANIFEST_NAME = ".fn_render_manifest.json"
+
+def variant_hash(plan, overrides=None):
+    """
+    Hash of everything that determines a variant's image. Prim UUIDs are left out, so
+    identical content built by another node (or a duplicated tree) hits the same entry.
+    """
+    uuid_to_path = {str(proxy.fn_uuid): proxy.path for proxy in plan}
+    overrides_by_path = {
+        uuid_to_path[uuid_str]: override_json
+        for uuid_str, override_json in (overrides or {}).items() if uuid_str in uuid_to_path
+    }
+    parts = [bpy.app.version_string]
+    parts.extend(f"{proxy.path}|{hashing.properties_hash(proxy.properties_view)}" for proxy in plan)
+    parts.append(hashing.properties_hash(overrides_by_path))
+    return hashing.properties_hash(parts)
+
+class RenderManifest:
+    """{requested output path: (variant hash, written file)} of a directory of renders."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, MANIFEST_NAME)
+        self.entries = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('outputs', {})
+        except (OSError, ValueError):
+            pass
+
+    def _key(self, output_path):
+        return os.path.relpath(output_path, self.directory)
+
+    def _absolute(self, relative_path):
+        return os.path.normpath(os.path.join(self.directory, relative_path))
+
+    def lookup(self, output_path, variant_hash):
+        """The file already rendered for this output and hash, or None."""
+        entry = self.entries.get(self._key(output_path))
+        if entry and entry.get('hash') == variant_hash:
+            written = self._absolute(entry['file'])
+            if os.path.isfile(written):
+                return written
+        return None
+
+    def find_hash(self, variant_hash):
+        """(requested output, written file) of any existing render of this hash, or None."""
+        for key, entry in self.entries.items():
+            if entry.get('hash') == variant_hash:
+                written = self._absolute(entry['file'])
+                if os.path.isfile(written):
+                    return self._absolute(key), written
+        return None
+
+    def record(self, output_path, variant_hash, written_file):
+        self.entries[self._key(output_path)] = {'hash': variant_hash, 'file': self._key(written_file)}
+        self.save()
+
+    def save(self):
+        temp_file = f"{self.path}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({'outputs': self.entries}, f, indent=1, sort_keys=True)
+            os.replace(temp_file, self.path)
+        except OSError as e:
+            logger.log(f"[RenderCache] WARNING: Could not save manifest {self.path}: {e}")
+
+class RenderCache:
+    """The manifests of every output directory a batch writes to."""
+
+    def __init__(self):
+        self._manifests = {}
+
+    def manifest(self, output_path):
+        directory = os.path.dirname(os.path.abspath(output_path))
+        manifest = self._manifests.get(directory)
+        if manifest is None:
+            manifest = self._manifests[directory] = RenderManifest(directory)
+        return manifest
+
+    def resolve(self, output_path, variant_hash):
+        """
+        Returns True if a render of `variant_hash` is available at `output_path`. A render of
+        the same hash written elsewhere (e.g. the variant moved in the list) is copied over.
+        """
+        manifest = self.manifest(output_path)
+        if manifest.lookup(output_path, variant_hash):
+            return True
+
+        for other in self._manifests.values():
+            found = other.find_hash(variant_hash)
+            if found:
+                break
+        else:
+            return False
+
+        requested, written = found
+        extension = written[len(requested):] if written.startswith(requested) else os.path.splitext(written)[1]
+        target = output_path + extension
+        try:
+            if os.path.normpath(written) != os.path.normpath(target):
+                shutil.copyfile(written, target)
+        except OSError:
+            return False
+        manifest.record(output_path, variant_hash, target)
+        return True
+
+    def record(self, output_path, variant_hash, written_file):
+        self.manifest(output_path).record(output_path, variant_hash, written_file)
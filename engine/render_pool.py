@@ -0,0 +1,296 @@
+"""
+Out-of-process batch rendering.
+
+Each variant's plan is serialized to JSON and rendered by a pool of background Blender
+processes (`blender -b --python render_worker.py`). Workers are long-lived: they read one
+job per line on stdin and report on stdout, so the interactive session only pays for
+dispatching jobs and reading their results, which `RenderPool.poll` does without blocking.
+"""
+import os
+import json
+import queue
+import threading
+import subprocess
+from collections import deque
+import bpy
+from .. import logger
+from ..proxy_types import DatablockProxy
+from . import utils
+
+# Lines of the worker output that carry protocol messages (everything else is Blender's own log).
+MESSAGE_PREFIX = "FN_RENDER_WORKER:"
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "render_worker.py")
+
+# --- Plan Serialization ---
+
+def serialize_plan(plan):
+    """A JSON-safe list of the prims of a plan, in plan order."""
+    return [
+        {'path': proxy.path, 'uuid': str(proxy.fn_uuid), 'properties': proxy.properties_view}
+        for proxy in plan
+    ]
+
+def deserialize_plan(data):
+    """Rebuilds a plan (flat list of proxies, parented by path) from `serialize_plan` output."""
+    proxies = {}
+    plan = []
+    for entry in data:
+        parent_path = entry['path'].rsplit('/', 1)[0]
+        proxy = DatablockProxy(
+            path=entry['path'], fn_uuid=entry['uuid'], properties=entry['properties'],
+            parent=proxies.get(parent_path)
+        )
+        proxies[proxy.path] = proxy
+        plan.append(proxy)
+    return plan
+
+def overrides_for_plan(tree, plan):
+    """{uuid: override JSON} of the plan's datablocks, so workers render the user's edits too."""
+    uuids = {str(proxy.fn_uuid) for proxy in plan}
+    return {
+        item.datablock_uuid: item.override_data_json
+        for item in tree.fn_override_map
+        if item.datablock_uuid in uuids and item.override_data_json
+    }
+
+def _json_value(value):
+    """Encodes the values JSON can't (vectors, datablock pointers...) like snapshots do."""
+    safe_value = utils.to_json_safe(value)
+    if safe_value is None:
+        raise TypeError(f"{type(value).__name__} values can't be sent to a render worker")
+    return safe_value
+
+class RenderJob:
+    """A variant to render. A plan that can't be serialized gives a job without `payload`, failed from the start."""
+
+    def __init__(self, index, plan, overrides, output_path, label="", variant_hash=None):
+        self.index = index
+        self.output_path = output_path
+        self.label = label
+        self.variant_hash = variant_hash
+        self.written_file = None
+        self.attempts = 0
+        self.error = None
+        try:
+            self.payload = json.dumps({
+                'index': index,
+                'plan': serialize_plan(plan),
+                'overrides': overrides,
+                'scene_uuid': str(plan[0].fn_uuid),
+                'output': output_path,
+            }, default=_json_value)
+        except (TypeError, ValueError) as e:
+            self.payload = None
+            self.error = str(e)
+
+# --- Workers ---
+
+class _Worker:
+    """A background Blender process and the thread that forwards its messages to the pool."""
+
+    def __init__(self, worker_id, command, events):
+        self.worker_id = worker_id
+        self.job = None
+        self.process = subprocess.Popen(
+            command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, errors="replace", bufsize=1
+        )
+        self._reader = threading.Thread(target=self._read_output, args=(events,), daemon=True)
+        self._reader.start()
+
+    def _read_output(self, events):
+        for line in self.process.stdout:
+            if line.startswith(MESSAGE_PREFIX):
+                try:
+                    events.put((self, json.loads(line[len(MESSAGE_PREFIX):])))
+                except ValueError:
+                    pass
+        events.put((self, {'event': 'exit', 'code': self.process.wait()}))
+
+    def send(self, job):
+        self.job = job
+        job.attempts += 1
+        self.process.stdin.write(job.payload + "\n")
+        self.process.stdin.flush()
+
+    def stop(self, force=False):
+        if self.process.poll() is not None:
+            return
+        if force:
+            self.process.kill()
+            return
+        try:
+            self.process.stdin.write("quit\n")
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            self.process.kill()
+
+class RenderPool:
+    """
+    Renders jobs on `worker_count` background Blender processes, each limited to
+    `threads_per_worker` render threads. Failed jobs are retried up to `max_retries` times,
+    on a fresh worker if the process died. `on_job_done(job)` is called, on the polling
+    thread, as soon as a job's image is written.
+    `jobs` may be a lazy iterable (then give its `total`): jobs are only taken from it when
+    a worker is free, so at most one job per worker is built at a time.
+    """
+
+    def __init__(self, jobs, worker_count, threads_per_worker=0, max_retries=1, addon_dir=None, addon_module=None,
+                 on_job_done=None, total=None):
+        self._jobs = iter(jobs)
+        self._jobs_exhausted = False
+        self.pending = deque()  # Jobs to retry
+        self.total = len(jobs) if total is None else total
+        self.skipped = 0
+        self.completed = []
+        self.failed = []
+        self.worker_count = max(1, min(worker_count, self.total or 1))
+        self.threads_per_worker = threads_per_worker
+        self.max_retries = max_retries
+        self.cancelled = False
+        self.on_job_done = on_job_done
+        self._events = queue.Queue()
+        self._workers = []
+        self._next_worker_id = 0
+
+        package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.addon_dir = addon_dir or os.path.dirname(package_dir)
+        self.addon_module = addon_module or os.path.basename(package_dir)
+
+    def _command(self):
+        return [
+            bpy.app.binary_path, "--background", "--factory-startup", "--python", WORKER_SCRIPT, "--",
+            "--addon-dir", self.addon_dir, "--addon-module", self.addon_module,
+            "--threads", str(self.threads_per_worker),
+        ]
+
+    def _spawn(self):
+        worker = _Worker(self._next_worker_id, self._command(), self._events)
+        self._next_worker_id += 1
+        self._workers.append(worker)
+        return worker
+
+    def start(self):
+        logger.log(f"[RenderPool] Rendering {self.total} variants on {self.worker_count} workers "
+                   f"({self.threads_per_worker or 'all'} threads each)")
+        for _ in range(self.worker_count):
+            self._dispatch(self._spawn())
+
+    def _take_job(self):
+        if self.pending:
+            return self.pending.popleft()
+        if not self._jobs_exhausted:
+            job = next(self._jobs, None)
+            if job is not None:
+                return job
+            self._jobs_exhausted = True
+        return None
+
+    def _has_work(self):
+        return not self.cancelled and (bool(self.pending) or not self._jobs_exhausted)
+
+    def _dispatch(self, worker):
+        job = self._take_job() if not self.cancelled else None
+        while job is not None and job.payload is None:
+            logger.log(f"[RenderPool] Variant {job.index} failed: {job.error}")
+            self.failed.append(job)
+            job = self._take_job() if not self.cancelled else None
+        if job is not None:
+            worker.send(job)
+        else:
+            worker.job = None
+            worker.stop()
+
+    def _job_failed(self, job, error):
+        job.error = error
+        if job.attempts <= self.max_retries and not self.cancelled:
+            logger.log(f"[RenderPool] Variant {job.index} failed ({error}), retrying")
+            self.pending.append(job)
+        else:
+            logger.log(f"[RenderPool] Variant {job.index} failed: {error}")
+            self.failed.append(job)
+
+    def poll(self):
+        """Processes the messages received so far. Returns True while the batch is running."""
+        while True:
+            try:
+                worker, message = self._events.get_nowait()
+            except queue.Empty:
+                break
+
+            event = message.get('event')
+            if event == 'done' and worker.job:
+                worker.job.written_file = message.get('file')
+                self.completed.append(worker.job)
+                if self.on_job_done:
+                    self.on_job_done(worker.job)
+                self._dispatch(worker)
+            elif event == 'failed' and worker.job:
+                self._job_failed(worker.job, message.get('error', 'unknown error'))
+                self._dispatch(worker)
+            elif event == 'exit':
+                self._workers.remove(worker)
+                if worker.job:
+                    self._job_failed(worker.job, f"worker exited with code {message.get('code')}")
+                    worker.job = None
+                # Keep the pool at full size while there is work left.
+                if self._has_work() and len(self._workers) < self.worker_count:
+                    self._dispatch(self._spawn())
+        return self.is_running()
+
+    def is_running(self):
+        return bool(self._workers)
+
+    def skip(self):
+        """Counts a job that didn't need rendering (e.g. found in the render cache) as finished."""
+        self.skipped += 1
+
+    def progress(self):
+        """(finished, failed, total)"""
+        return len(self.completed) + self.skipped, len(self.failed), self.total
+
+    def cancel(self):
+        self.cancelled = True
+        self.pending.clear()
+        self._jobs_exhausted = True
+        for worker in self._workers:
+            worker.stop(force=True)
+
+def default_worker_count(threads_per_worker):
+    cores = os.cpu_count() or 1
+    return max(1, cores // threads_per_worker) if threads_per_worker else max(1, min(cores, 4))
+
+# Running batches, by node id, polled from a timer on the main thread.
+_ACTIVE_POOLS = {}
+
+def get_active_pool(node_id):
+    return _ACTIVE_POOLS.get(node_id)
+
+def run_in_background(node_id, pool, on_finished=None):
+    """Starts a pool and polls it from a timer until every job has finished."""
+    try:
+        pool.start()
+    except Exception:
+        pool.cancel()
+        raise
+    _ACTIVE_POOLS[node_id] = pool
+
+    def _poll():
+        try:
+            running = pool.poll()
+        except Exception as e:
+            # Jobs are planned while polling: a failure must not leave the batch marked as running
+            logger.log(f"[RenderPool] ERROR: Batch aborted: {e}")
+            pool.cancel()
+            running = False
+        utils.redraw_node_editors()
+        if running:
+            return 0.5
+        _ACTIVE_POOLS.pop(node_id, None)
+        finished, failed, total = pool.progress()
+        logger.log(f"[RenderPool] Batch finished: {finished}/{total} rendered, {failed} failed")
+        if on_finished:
+            on_finished(pool)
+        return None
+
+    bpy.app.timers.register(_poll, first_interval=0.5)
@@ -0,0 +1,98 @@
+"""
+Runner script of the background render workers (see render_pool.py).
+
+Started as `blender -b --factory-startup --python render_worker.py -- --addon-dir ...`.
+Reads one JSON job per line on stdin, materializes the job's plan with the addon's own
+materializer, renders it and reports the result on stdout. Consecutive jobs are synced
+like in the interactive session, so only the delta between variants is rebuilt.
+The addon is imported but not registered: its timers and handlers don't run here, so the
+plan is materialized without snapshots or applied-value caching (`track_state=False`).
+This file is executed as a script: it must not be imported by the addon.
+"""
+import sys
+import json
+import argparse
+import importlib
+import traceback
+import bpy
+
+MESSAGE_PREFIX = "FN_RENDER_WORKER:"
+
+class _StateMap(list):
+    """Stand-in for the tree's override collection."""
+    def add(self):
+        item = _StateItem()
+        self.append(item)
+        return item
+
+class _StateItem:
+    datablock_uuid = ""
+    override_data_json = ""
+
+class _WorkerTree:
+    """The parts of a DatablockTree the materializer reads, filled from each job."""
+    def __init__(self):
+        self.fn_override_map = _StateMap()
+        self.fn_gc_incremental = False
+        self.fn_gc_grace_period = 0.0
+
+    def set_overrides(self, overrides):
+        self.fn_override_map.clear()
+        for uuid_str, override_json in overrides.items():
+            item = self.fn_override_map.add()
+            item.datablock_uuid = uuid_str
+            item.override_data_json = override_json
+
+def _report(**message):
+    print(MESSAGE_PREFIX + json.dumps(message), flush=True)
+
+def _render(job, threads, orchestrator, render_pool, uuid_manager, tree):
+    plan = render_pool.deserialize_plan(job['plan'])
+    tree.set_overrides(job.get('overrides', {}))
+    orchestrator._synchronize_blender_state(tree, plan, None, plan[0], track_state=False)
+
+    scene = uuid_manager.find_datablock_by_uuid(job['scene_uuid'])
+    if scene is None:
+        raise RuntimeError("The variant has no materialized scene")
+    if threads:
+        scene.render.threads_mode = 'FIXED'
+        scene.render.threads = threads
+    if scene.render.engine == 'CYCLES':
+        scene.cycles.device = 'CPU'
+    scene.render.filepath = job['output']
+    bpy.ops.render.render(write_still=True, scene=scene.name)
+    return scene.render.frame_path(frame=scene.frame_current)
+
+def main():
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--addon-dir', required=True)
+    parser.add_argument('--addon-module', required=True)
+    parser.add_argument('--threads', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, args.addon_dir)
+    importlib.import_module(args.addon_module)
+    orchestrator = importlib.import_module(f"{args.addon_module}.engine.orchestrator")
+    render_pool = importlib.import_module(f"{args.addon_module}.engine.render_pool")
+    uuid_manager = importlib.import_module(f"{args.addon_module}.uuid_manager")
+    orchestrator._initialize_creation_map()
+    tree = _WorkerTree()
+    _report(event='ready')
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        if line == 'quit':
+            break
+        job = json.loads(line)
+        try:
+            written_file = _render(job, args.threads, orchestrator, render_pool, uuid_manager, tree)
+            _report(event='done', index=job['index'], output=job['output'], file=written_file)
+        except Exception as e:
+            traceback.print_exc()
+            _report(event='failed', index=job.get('index'), error=str(e))
+
+if __name__ == "__main__":
+    main()
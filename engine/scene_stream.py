@@ -0,0 +1,26 @@
+"""
+Lazily generated scene lists.
+
+A `SceneStream` is a scene list whose scenes are only built while it is iterated, one at a
+time. A consumer that processes the variants in order (e.g. Batch Render) and drops each
+one when it's done never holds more than one variant, however long the list is.
+"""
+
+class SceneStream:
+    """A scene list backed by a sequence of factories (callables returning a scene root or None)."""
+
+    def __init__(self, factories):
+        self._factories = factories
+
+    def __len__(self):
+        """Number of factories: an upper bound, since a factory may produce no scene."""
+        return len(self._factories)
+
+    def __iter__(self):
+        for factory in self._factories:
+            scene_root = factory()
+            if scene_root is not None:
+                yield scene_root
+
+def is_lazy(scene_list):
+    return isinstance(scene_list, SceneStream)
@@ -0,0 +1,109 @@
+"""
+Time-sliced execution on the main thread.
+
+Long synchronizations run as generators that are advanced from a `bpy.app.timers`
+callback until a per-slice time budget is spent, then hand control back to Blender so the
+UI keeps redrawing between slices. Only one run is active at a time: starting a new one
+cancels the previous run, which just stops between two steps.
+"""
+import time
+import bpy
+from .. import logger
+from . import utils
+
+class SlicedRun:
+    """A generator advanced in slices of at most `budget` seconds."""
+
+    def __init__(self, steps, budget, key=None, label=""):
+        self.steps = steps
+        self.budget = budget
+        self.key = key
+        self.label = label
+        self.progress = None  # Last value yielded by the steps
+        self.finished = False
+        self.slices = 0
+        self._started_at = time.perf_counter()
+
+    def run_slice(self):
+        """Advances the steps until the budget is spent. Returns True once they are exhausted."""
+        deadline = time.perf_counter() + self.budget
+        self.slices += 1
+        try:
+            while True:
+                self.progress = next(self.steps)
+                if time.perf_counter() >= deadline:
+                    return False
+        except StopIteration:
+            self.finished = True
+            elapsed = time.perf_counter() - self._started_at
+            logger.log(f"[Scheduler] {self.label} finished in {elapsed:.2f}s ({self.slices} slices)")
+            return True
+
+    def cancel(self):
+        self.steps.close()
+        self.finished = True
+        logger.log(f"[Scheduler] {self.label} cancelled after {self.slices} slices")
+
+# The run currently being advanced by the timer, if any
+_active_run = None
+# Key of the last run that went through all its steps
+_last_completed_key = None
+
+def active_run():
+    return _active_run
+
+def last_completed_key():
+    return _last_completed_key
+
+def cancel():
+    """Cancels the active run, if any."""
+    global _active_run, _last_completed_key
+    run, _active_run = _active_run, None
+    _last_completed_key = None
+    # A pending tick would otherwise advance the next run too, doubling its slices
+    if bpy.app.timers.is_registered(_tick):
+        bpy.app.timers.unregister(_tick)
+    if run and not run.finished:
+        run.cancel()
+        utils.redraw_node_editors()
+
+def start(steps, budget, key=None, label="Run"):
+    """
+    Runs `steps` in time slices, replacing the active run. The first slice runs right away,
+    so short runs complete without waiting for the timer.
+    """
+    global _active_run
+    cancel()
+    run = SlicedRun(steps, budget, key, label)
+    if _advance(run):
+        return run
+    _active_run = run
+    if not bpy.app.timers.is_registered(_tick):
+        bpy.app.timers.register(_tick, first_interval=0.0)
+    return run
+
+def _advance(run):
+    """Runs one slice. Returns True when the run is over (finished or failed)."""
+    global _last_completed_key
+    try:
+        done = run.run_slice()
+    except Exception as e:
+        run.finished = True
+        logger.log(f"[Scheduler] ERROR: {run.label} failed: {e}")
+        return True
+    if done:
+        _last_completed_key = run.key
+    return done
+
+def _tick():
+    global _active_run
+    run = _active_run
+    if run is None or run.finished:
+        return None
+    done = _advance(run)
+    utils.redraw_node_editors()
+    if done:
+        if _active_run is run:
+            _active_run = None
+        return None
+    return 0.0
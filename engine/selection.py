@@ -0,0 +1,509 @@
+"""
+Compiled selection engine.
+
+A selection query is compiled once into a matcher that walks the proxy tree segment by
+segment, following only the branches that can still match the path glob.
+
+Resolved selections are bitsets (Python ints) over a `SceneIndex`, the depth-first
+ordering of a scene's prims, so union, intersection and difference are single
+word-level OR / AND / AND-NOT operations. Property filters are answered from secondary
+indexes (by datablock type, hash indexes for equality and sorted indexes for ranges)
+that are built lazily, once per index, the first time a filter needs them.
+Spatial filters (`near`, `inside`, `nearest`) are answered by a KD-tree over the prims'
+world positions, built once per scene version. Resolved selections are also kept in a bounded cache keyed by the scene's content hash,
+so re-evaluating an unchanged scene doesn't resolve its selections again.
+
+Path glob syntax:
+- `*`, `?` and `[...]` match within a single path segment.
+- `**` matches zero or more whole segments.
+- `//` is shorthand for `/**/` (recursive descent), e.g. `//lights/*`.
+- A glob that doesn't start with `/` matches at any depth, so `*` selects every prim.
+"""
+import re
+import ast
+import bisect
+import fnmatch
+import weakref
+from collections import OrderedDict
+from functools import lru_cache
+from .. import logger
+from ..proxy_types import register_mutation_callback
+from . import hashing, spatial
+
+RECURSIVE_SEGMENT = '**'
+_WILDCARD_CHARS = frozenset('*?[')
+
+@lru_cache(maxsize=512)
+def _compile_segment(segment):
+    """Returns the segment itself for literals, or a compiled regex for wildcard segments."""
+    if segment == RECURSIVE_SEGMENT or not (_WILDCARD_CHARS & set(segment)):
+        return segment
+    return re.compile(fnmatch.translate(segment))
+
+def _split_glob(path_glob):
+    """Splits a path glob into normalized segments."""
+    glob = (path_glob or '').strip() or '*'
+    if not glob.startswith('/'):
+        glob = '//' + glob
+
+    segments = []
+    parts = glob[1:].split('/')
+    for i, part in enumerate(parts):
+        if not part:
+            if i == len(parts) - 1:
+                continue  # Trailing slash
+            part = RECURSIVE_SEGMENT  # Empty segment from '//'
+        if part == RECURSIVE_SEGMENT and segments and segments[-1] == RECURSIVE_SEGMENT:
+            continue  # '**/**' is the same as '**'
+        segments.append(part)
+    return tuple(segments)
+
+def _prim_name(prim):
+    return prim.path.rsplit('/', 1)[-1]
+
+class PathMatcher:
+    """A compiled path glob. States are positions in the segment list (a small NFA)."""
+
+    def __init__(self, path_glob):
+        self.path_glob = path_glob
+        raw_segments = _split_glob(path_glob)
+        self.segments = tuple(_compile_segment(s) for s in raw_segments)
+        # '*', '//*', '//**/*'... all normalize to this and select every prim.
+        self.matches_everything = raw_segments == (RECURSIVE_SEGMENT, '*')
+        self.size = len(self.segments)
+        self.initial_states = self._closure((0,))
+        # States up to here are only reachable through explicit (non-`**`) segments.
+        self.explicit_depth = raw_segments.index(RECURSIVE_SEGMENT) if RECURSIVE_SEGMENT in raw_segments else self.size
+
+    def _closure(self, states):
+        """Adds the states reachable by letting a `**` match zero segments."""
+        closed = set(states)
+        pending = list(states)
+        while pending:
+            state = pending.pop()
+            if state < self.size and self.segments[state] == RECURSIVE_SEGMENT:
+                if state + 1 not in closed:
+                    closed.add(state + 1)
+                    pending.append(state + 1)
+        return frozenset(closed)
+
+    def advance(self, states, name):
+        """Returns the states after consuming one path segment called `name`."""
+        next_states = []
+        for state in states:
+            if state >= self.size:
+                continue
+            segment = self.segments[state]
+            if segment == RECURSIVE_SEGMENT:
+                next_states.append(state)
+            elif isinstance(segment, str):
+                if segment == name:
+                    next_states.append(state + 1)
+            elif segment.match(name):
+                next_states.append(state + 1)
+        return self._closure(next_states) if next_states else frozenset()
+
+    def is_match(self, states):
+        return self.size in states
+
+    def matches_path(self, path):
+        """Matches a full path string, without needing the tree."""
+        states = self.initial_states
+        for name in path.strip('/').split('/'):
+            states = self.advance(states, name)
+            if not states:
+                return False
+        return self.is_match(states)
+
+    def descends_explicitly(self, states):
+        """True if the glob names a segment below the current prim without going through `**`."""
+        return any(state < self.explicit_depth for state in states)
+
+    def walk(self, root_proxy, load_payloads=False):
+        """
+        Yields the prims under `root_proxy` (included) whose path matches, in depth-first order.
+        With `load_payloads`, deferred payloads are loaded when the glob explicitly descends
+        into them; recursive `**` segments never trigger a load.
+        """
+        stack = [(root_proxy, self.initial_states)]
+        while stack:
+            prim, states = stack.pop()
+            states = self.advance(states, _prim_name(prim))
+            if not states:
+                continue  # Nothing below this prim can match: prune the whole subtree.
+            if self.is_match(states):
+                yield prim
+            if load_payloads and prim.has_unloaded_payload and self.descends_explicitly(states):
+                prim.load_payload()
+            if prim.children:
+                stack.extend((child, states) for child in reversed(prim.children))
+
+    def reaches_unloaded_payload(self, root_proxy):
+        """True if walking with `load_payloads` would load something."""
+        stack = [(root_proxy, self.initial_states)]
+        while stack:
+            prim, states = stack.pop()
+            states = self.advance(states, _prim_name(prim))
+            if not states:
+                continue
+            if prim.has_unloaded_payload and self.descends_explicitly(states):
+                return True
+            stack.extend((child, states) for child in prim.children)
+        return False
+
+@lru_cache(maxsize=256)
+def compile_path_glob(path_glob):
+    """Returns the (cached) compiled matcher for a path glob."""
+    return PathMatcher(path_glob)
+
+def parse_filter_value(value_str):
+    """Parses the literal on the right side of a property filter (`100`, `'SUN'`, `(0, 0, 1)`...)."""
+    if not isinstance(value_str, str):
+        return value_str
+    try:
+        return ast.literal_eval(value_str.strip())
+    except (ValueError, SyntaxError):
+        return value_str.strip().strip('\'"')
+
+def _freeze(value):
+    """Returns a hashable version of a property value for the hash indexes."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+def _sort_kind(value):
+    """The family of values a sorted index holds: only values of the same kind are comparable."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return 'number'
+    if isinstance(value, str):
+        return 'string'
+    return None
+
+SPATIAL_FUNCTIONS = ('near', 'inside', 'nearest')
+
+_SET_OPERATIONS = ('union', 'intersection', 'difference')
+
+def query_key(query):
+    """Returns a hashable, normalized key for a (possibly nested) selection query."""
+    filter_keys = []
+    for f in query.filters:
+        if f.get('type') in _SET_OPERATIONS:
+            filter_keys.append((f['type'], tuple(query_key(q) for q in f.get('queries', []) if q)))
+        else:
+            filter_keys.append(tuple(sorted((k, repr(v)) for k, v in f.items())))
+    return (query.path_glob.strip(), tuple(filter_keys))
+
+class SceneIndex:
+    """
+    Positional index over the prims of a scene, in depth-first order.
+    A selection over the scene is an int whose bit `i` is set if `prims[i]` is selected.
+    Resolved (sub-)queries are memoized, so a selection used several times is computed once.
+    """
+
+    def __init__(self, root_proxy):
+        self.root = root_proxy
+        self.prims = root_proxy.get_flat_list()
+        self.all_mask = (1 << len(self.prims)) - 1
+        self._positions = None
+        self._query_masks = {}
+        self._type_index = None
+        self._hash_indexes = {}
+        self._sorted_indexes = {}
+        self._path_positions = None
+        self._spatial_index = None
+
+    @property
+    def positions(self):
+        if self._positions is None:
+            self._positions = {id(p): i for i, p in enumerate(self.prims)}
+        return self._positions
+
+    def mask_from_positions(self, positions):
+        """Builds a bitset from bit positions in a single pass (no quadratic int growth)."""
+        bits = bytearray((len(self.prims) >> 3) + 1)
+        for i in positions:
+            bits[i >> 3] |= 1 << (i & 7)
+        return int.from_bytes(bits, 'little')
+
+    def mask_from_prims(self, prims):
+        positions = self.positions
+        return self.mask_from_positions(positions[id(p)] for p in prims if id(p) in positions)
+
+    def positions_from_mask(self, mask):
+        """Returns the set bit positions of a mask, in ascending order."""
+        bits = bin(mask)[:1:-1]  # Least significant bit first
+        result = []
+        i = bits.find('1')
+        while i != -1:
+            result.append(i)
+            i = bits.find('1', i + 1)
+        return result
+
+    def prims_from_mask(self, mask):
+        prims = self.prims
+        return [prims[i] for i in self.positions_from_mask(mask)]
+
+    def _path_mask(self, path_glob):
+        matcher = compile_path_glob(path_glob)
+        if matcher.matches_everything:
+            return self.all_mask
+        return self.mask_from_prims(matcher.walk(self.root))
+
+    # --- Secondary indexes ---
+
+    def _build_type_index(self):
+        type_positions = {}
+        for i, prim in enumerate(self.prims):
+            type_positions.setdefault(prim.properties_view.get('datablock_type'), []).append(i)
+        self._type_index = {t: self.mask_from_positions(positions) for t, positions in type_positions.items()}
+
+    def type_mask(self, datablock_type):
+        if self._type_index is None:
+            self._build_type_index()
+        return self._type_index.get(datablock_type, 0)
+
+    def _hash_index(self, key):
+        """{frozen value: positions} for one property, plus the mask of prims that define it."""
+        index = self._hash_indexes.get(key)
+        if index is None:
+            value_positions = {}
+            for i, prim in enumerate(self.prims):
+                if key in prim.properties_view:
+                    value_positions.setdefault(_freeze(prim.properties_view[key]), []).append(i)
+            has_key = self.mask_from_positions(i for positions in value_positions.values() for i in positions)
+            index = self._hash_indexes[key] = (value_positions, has_key)
+        return index
+
+    def _sorted_index(self, key, kind):
+        """Parallel lists (sorted values, positions) for the values of one property of one kind."""
+        index = self._sorted_indexes.get((key, kind))
+        if index is None:
+            entries = sorted(
+                (prim.properties_view[key], i) for i, prim in enumerate(self.prims)
+                if key in prim.properties_view and _sort_kind(prim.properties_view[key]) == kind
+            )
+            index = self._sorted_indexes[(key, kind)] = ([v for v, _ in entries], [i for _, i in entries])
+        return index
+
+    def property_mask(self, key, op, value):
+        """Resolves `@key op value` with the hash index (=, !=) or the sorted index (<, <=, >, >=)."""
+        if op in ('=', '==', '!='):
+            value_positions, has_key = self._hash_index(key)
+            equal = self.mask_from_positions(value_positions.get(_freeze(value), ()))
+            return equal if op != '!=' else has_key & ~equal
+
+        kind = _sort_kind(value)
+        if kind is None or op not in ('<', '<=', '>', '>='):
+            logger.log(f"[Selection] WARNING: Unsupported property filter '@{key}{op}{value!r}'.")
+            return 0
+        values, positions = self._sorted_index(key, kind)
+        if op == '<':
+            selected = positions[:bisect.bisect_left(values, value)]
+        elif op == '<=':
+            selected = positions[:bisect.bisect_right(values, value)]
+        elif op == '>':
+            selected = positions[bisect.bisect_right(values, value):]
+        else:
+            selected = positions[bisect.bisect_left(values, value):]
+        return self.mask_from_positions(selected)
+
+    @property
+    def spatial_index(self):
+        if self._spatial_index is None:
+            self._spatial_index = spatial.SpatialIndex(self.root)
+        return self._spatial_index
+
+    def position_of_path(self, path):
+        if self._path_positions is None:
+            self._path_positions = {p.path: i for i, p in enumerate(self.prims)}
+        return self._path_positions.get(path)
+
+    def _spatial_reference(self, reference):
+        """Resolves a prim path or a coordinate to (world location, position to exclude)."""
+        if isinstance(reference, str):
+            position = self.position_of_path(reference)
+            co = self.spatial_index.position_of(position) if position is not None else None
+            if co is None:
+                logger.log(f"[Selection] WARNING: '{reference}' is not an object prim of this scene.")
+            return co, position
+        return reference, None
+
+    def spatial_mask(self, func, args):
+        """Resolves near(ref, radius), nearest(ref, count) and inside(min, max)."""
+        try:
+            if func == 'inside':
+                bb_min, bb_max = args if len(args) == 2 else args[0]
+                return self.mask_from_positions(self.spatial_index.inside(bb_min, bb_max))
+
+            reference, amount = args
+            co, exclude = self._spatial_reference(reference)
+            if co is None:
+                return 0
+            if func == 'near':
+                return self.mask_from_positions(self.spatial_index.within(co, float(amount), exclude))
+            return self.mask_from_positions(self.spatial_index.nearest(co, int(amount), exclude))
+        except (TypeError, ValueError) as e:
+            logger.log(f"[Selection] WARNING: Invalid arguments for {func}{tuple(args)}: {e}")
+            return 0
+
+    def _filter_mask(self, f):
+        filter_type = f.get('type')
+        if filter_type == 'function':
+            func, value = f.get('func'), f.get('value')
+            if func == 'type':
+                return self.type_mask(value)
+            if func == 'name':
+                return self.property_mask('name', '==', value)
+            if func in SPATIAL_FUNCTIONS:
+                return self.spatial_mask(func, f.get('args', [value]))
+        elif filter_type == 'property':
+            return self.property_mask(f.get('key'), f.get('op'), parse_filter_value(f.get('value')))
+        elif f.get('key') == 'type' and f.get('op') == 'eq':
+            return self.type_mask(f.get('value'))
+
+        logger.log(f"[Selection] WARNING: Ignoring unknown filter {f}.")
+        return self.all_mask
+
+    def query_mask(self, query):
+        """Resolves a query to a bitset over this index."""
+        key = query_key(query)
+        mask = self._query_masks.get(key)
+        if mask is not None:
+            return mask
+
+        mask = self._path_mask(query.path_glob)
+        for f in query.filters:
+            filter_type = f.get('type')
+            if filter_type in _SET_OPERATIONS:
+                sub_masks = [self.query_mask(q) for q in f.get('queries', []) if q]
+                if not sub_masks:
+                    continue
+                combined = sub_masks[0]
+                for sub_mask in sub_masks[1:]:
+                    if filter_type == 'union':
+                        combined |= sub_mask
+                    elif filter_type == 'intersection':
+                        combined &= sub_mask
+                    else:
+                        combined &= ~sub_mask
+                mask &= combined
+            else:
+                mask &= self._filter_mask(f)
+            if not mask:
+                break
+
+        self._query_masks[key] = mask
+        return mask
+
+# Indexes of scenes that have been output by a node. By convention those are never mutated
+# again (downstream nodes clone them first), so their indexes stay valid for as long as
+# the scene itself is alive, and every modifier fed by the same scene shares them.
+_SCENE_INDEXES = weakref.WeakKeyDictionary()
+
+def get_scene_index(root_proxy):
+    """Returns the shared index of an (immutable) upstream scene, building it on first use."""
+    scene_index = _SCENE_INDEXES.get(root_proxy)
+    if scene_index is None:
+        scene_index = _SCENE_INDEXES[root_proxy] = SceneIndex(root_proxy)
+    return scene_index
+
+def select(root_proxy, query, scene_index=None):
+    """Returns the prims in the tree that match the query, in depth-first order."""
+    scene_index = scene_index or SceneIndex(root_proxy)
+    return scene_index.prims_from_mask(scene_index.query_mask(query))
+
+class SelectionCache:
+    """
+    Bounded LRU cache of resolved selections, keyed by (scene content hash, query key).
+    Results are stored as depth-first prim positions, which identify the same prims in
+    any scene with the same content hash, including clones.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        positions = self._entries.get(key)
+        if positions is not None:
+            self._entries.move_to_end(key)
+        return positions
+
+    def put(self, key, positions):
+        self._entries[key] = positions
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+_SELECTION_CACHE = SelectionCache()
+
+def resolve_positions(root_proxy, query):
+    """Returns the depth-first positions of the prims matching the query, using the cache."""
+    key = (hashing.scene_hash(root_proxy), query_key(query))
+    positions = _SELECTION_CACHE.get(key)
+    if positions is None:
+        scene_index = get_scene_index(root_proxy)
+        positions = tuple(scene_index.positions_from_mask(scene_index.query_mask(query)))
+        _SELECTION_CACHE.put(key, positions)
+    return positions
+
+def _iter_path_globs(query):
+    yield query.path_glob
+    for f in query.filters:
+        if f.get('type') in _SET_OPERATIONS:
+            for sub_query in f.get('queries', []):
+                if sub_query:
+                    yield from _iter_path_globs(sub_query)
+
+def _payload_matchers(query):
+    for path_glob in set(_iter_path_globs(query)):
+        matcher = compile_path_glob(path_glob)
+        if matcher.explicit_depth > 1:
+            yield matcher
+
+def needs_payloads(root_proxy, query):
+    """True if the query's path globs explicitly descend into a payload that isn't loaded."""
+    return any(matcher.reaches_unloaded_payload(root_proxy) for matcher in _payload_matchers(query))
+
+def load_payloads(root_proxy, query):
+    """Loads, in place, the deferred payloads the query's path globs explicitly descend into."""
+    for matcher in _payload_matchers(query):
+        for _ in matcher.walk(root_proxy, load_payloads=True):
+            pass
+
+def clone_and_select(source_root, query):
+    """
+    Resolves the query against `source_root`, then clones the scene and returns
+    (clone, matching prims of the clone). Clones keep the depth-first order, so position
+    `i` of the source selection is prim `i` of the clone. Payloads the query needs are
+    loaded into the clone, never into the upstream scene, which other nodes and caches share.
+    """
+    if needs_payloads(source_root, query):
+        cloned_root = source_root.clone()
+        load_payloads(cloned_root, query)
+        positions = resolve_positions(cloned_root, query)
+    else:
+        positions = resolve_positions(source_root, query)
+        cloned_root = source_root.clone()
+    if not positions:
+        return cloned_root, []
+    cloned_prims = cloned_root.get_flat_list()
+    return cloned_root, [cloned_prims[i] for i in positions]
+
+def _on_scene_mutated(root_proxy):
+    # Cached selections are keyed by content hash and stay valid; only the index of this
+    # particular scene object is stale.
+    _SCENE_INDEXES.pop(root_proxy, None)
+
+register_mutation_callback(_on_scene_mutated)
@@ -0,0 +1,150 @@
+"""
+Deferred capture of initial-state snapshots.
+
+Capturing a snapshot walks every RNA property of a datablock, which dominates the first
+materialization of a large scene. New datablocks are queued instead and captured in small
+batches from a timer. The base values the materializer wrote are laid over the captured
+state, so the snapshot still describes the state declared by the nodes.
+
+A deferred capture must not see overrides or user edits, or they become part of the
+baseline and are never recorded as overrides (edits of properties the nodes don't declare
+can't be told apart afterwards). So the materializer captures right away, before applying
+overrides, the datablocks that have overrides and the ones the user is editing; and the
+override handler captures the queued snapshots of what becomes the edit target (the active
+and selected objects, their data, the scene) as soon as the selection changes, which
+happens before the edit itself.
+"""
+import json
+import time
+from collections import OrderedDict
+import bpy
+from .. import logger, uuid_manager
+from . import utils, scheduler
+
+# Time spent capturing per timer tick, and pause between ticks
+BATCH_BUDGET = 0.005
+BATCH_INTERVAL = 0.05
+
+# { uuid: (tree name, { property path: base value }) }, in creation order
+_pending = OrderedDict()
+
+def enqueue(tree, uuid_str, base_values):
+    """Queues a snapshot of a datablock. `base_values` maps property paths to the values the nodes declared."""
+    _pending[uuid_str] = (getattr(tree, 'name', None), base_values)
+    _pending.move_to_end(uuid_str)
+    if not bpy.app.timers.is_registered(_process_batch):
+        bpy.app.timers.register(_process_batch, first_interval=BATCH_INTERVAL)
+
+def is_pending(uuid_str):
+    return uuid_str in _pending
+
+def pending_count():
+    return len(_pending)
+
+def capture_now(uuid_str):
+    """Captures a queued snapshot immediately. Returns True if one was stored."""
+    entry = _pending.pop(uuid_str, None)
+    if entry is None:
+        return False
+    return _capture(uuid_str, *entry)
+
+def flush():
+    """Captures every queued snapshot."""
+    while _pending:
+        uuid_str, entry = _pending.popitem(last=False)
+        _capture(uuid_str, *entry)
+
+def clear():
+    _pending.clear()
+
+def _edit_target_datablocks():
+    """The datablocks the user is editing or about to edit."""
+    context = bpy.context
+    targets = []
+    scene = getattr(context, 'scene', None)
+    if scene is not None:
+        targets += [scene, scene.world]
+    view_layer = getattr(context, 'view_layer', None)
+    objects = list(getattr(context, 'selected_objects', None) or ())
+    if view_layer is not None and view_layer.objects.active is not None:
+        objects.append(view_layer.objects.active)
+    for obj in objects:
+        targets += [obj, obj.data, obj.active_material]
+    return [target for target in targets if target is not None]
+
+def edit_targets():
+    """Pointers of the datablocks the user is editing or about to edit."""
+    return {target.as_pointer() for target in _edit_target_datablocks()}
+
+def capture_edit_targets():
+    """Captures the queued snapshots of the datablocks the user may edit next."""
+    if not _pending:
+        return
+    for target in _edit_target_datablocks():
+        uuid_str = uuid_manager.get_uuid(target)
+        if uuid_str and uuid_str in _pending:
+            capture_now(uuid_str)
+
+def store(tree, uuid_str, datablock, base_values=None):
+    """Captures the snapshot of a datablock and stores it in the tree, `base_values` laid over it."""
+    initial_state = utils.capture_initial_state(datablock)
+    for path, value in (base_values or {}).items():
+        if path in initial_state:
+            safe_value = utils.to_json_safe(value)
+            if safe_value is not None:
+                initial_state[path] = safe_value
+
+    new_entry = tree.fn_initial_state_map.add()
+    new_entry.datablock_uuid = uuid_str
+    new_entry.state_data_json = json.dumps(initial_state)
+
+def _capture(uuid_str, tree_name, base_values):
+    tree = bpy.data.node_groups.get(tree_name) if tree_name else None
+    datablock = uuid_manager.find_datablock_by_uuid(uuid_str)
+    if tree is None or datablock is None:
+        return False
+    store(tree, uuid_str, datablock, base_values)
+    return True
+
+def _process_batch():
+    if not _pending:
+        return None
+    # Don't compete with a scene that is still being built
+    if scheduler.active_run():
+        return BATCH_INTERVAL
+
+    deadline = time.perf_counter() + BATCH_BUDGET
+    while _pending and time.perf_counter() < deadline:
+        uuid_str, entry = _pending.popitem(last=False)
+        try:
+            _capture(uuid_str, *entry)
+        except (ReferenceError, RuntimeError) as e:
+            logger.log(f"[SnapshotQueue] Could not capture snapshot of {uuid_str}: {e}")
+    if not _pending:
+        logger.log("[SnapshotQueue] All deferred snapshots captured")
+        return None
+    return BATCH_INTERVAL
+
+@bpy.app.handlers.persistent
+def _on_load(*args):
+    clear()
+
+@bpy.app.handlers.persistent
+def _on_save(*args):
+    # Snapshots are stored in the tree: capture the queued ones so they're saved too
+    flush()
+
+def register():
+    if _on_load not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(_on_load)
+    if _on_save not in bpy.app.handlers.save_pre:
+        bpy.app.handlers.save_pre.append(_on_save)
+
+def unregister():
+    if _on_load in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_on_load)
+    if _on_save in bpy.app.handlers.save_pre:
+        bpy.app.handlers.save_pre.remove(_on_save)
+    if bpy.app.timers.is_registered(_process_batch):
+        bpy.app.timers.unregister(_process_batch)
+    clear()
@@ -0,0 +1,48 @@
+"""
+Spatial index over prim world positions, backing the near/inside/nearest selection
+filters.
+"""
+from mathutils import Vector
+from mathutils.kdtree import KDTree
+from . import transforms
+
+def compute_world_positions(root_proxy):
+    """Returns {depth-first position: world location} for every OBJECT prim of the scene."""
+    scene_transforms = transforms.get_scene_transforms(root_proxy)
+    return {
+        i: Vector(scene_transforms.world[i, :3, 3])
+        for i, prim in enumerate(scene_transforms.prims)
+        if prim.properties_view.get('datablock_type') == 'OBJECT'
+    }
+
+class SpatialIndex:
+    """A KD-tree over the world positions of the prims of one scene version."""
+
+    def __init__(self, root_proxy):
+        self.world_positions = compute_world_positions(root_proxy)
+        self.tree = KDTree(len(self.world_positions))
+        for i, co in self.world_positions.items():
+            self.tree.insert(co, i)
+        self.tree.balance()
+
+    def position_of(self, index):
+        return self.world_positions.get(index)
+
+    def within(self, co, radius, exclude=None):
+        """Indices of the prims within `radius` of `co`."""
+        return [i for _, i, _ in self.tree.find_range(Vector(co), radius) if i != exclude]
+
+    def nearest(self, co, count, exclude=None):
+        """Indices of the `count` prims closest to `co`."""
+        found = self.tree.find_n(Vector(co), count + (1 if exclude is not None else 0))
+        return [i for _, i, _ in found if i != exclude][:count]
+
+    def inside(self, bb_min, bb_max):
+        """Indices of the prims inside the axis-aligned box [bb_min, bb_max]."""
+        bb_min, bb_max = Vector(bb_min), Vector(bb_max)
+        center = (bb_min + bb_max) / 2.0
+        radius = (bb_max - bb_min).length / 2.0
+        return [
+            i for co, i, _ in self.tree.find_range(center, radius)
+            if all(bb_min[axis] <= co[axis] <= bb_max[axis] for axis in range(3))
+        ]
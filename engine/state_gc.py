@@ -0,0 +1,67 @@
+"""Reachability-based garbage collection for the snapshot and override maps of a tree."""
+import time
+from .. import logger
+
+# (collection property on the tree, name of the JSON payload attribute of its items)
+_STATE_MAPS = (
+    ('fn_initial_state_map', 'state_data_json'),
+    ('fn_override_map', 'override_data_json'),
+)
+
+def _entry_size(entry, json_attr):
+    """Approximate storage cost of an entry, in bytes."""
+    return len(entry.datablock_uuid.encode('utf-8')) + len(getattr(entry, json_attr).encode('utf-8'))
+
+def _orphaned_since(entry):
+    """Time at which the entry was found unreachable, or None if it is live."""
+    try:
+        return float(entry.orphaned_at) if entry.orphaned_at else None
+    except ValueError:
+        return None
+
+def collect_garbage(tree, live_uuids, grace_period=0.0, candidates=None):
+    """
+    Drops the snapshot and override entries whose UUID is no longer reachable from the plan.
+
+    An unreachable entry is first marked as orphaned and only removed once it has been
+    orphaned for longer than `grace_period` seconds, so a datablock that is re-created
+    shortly after (e.g. by undoing a node change) keeps its overrides.
+    Orphans that become reachable again are revived.
+
+    If `candidates` is given the pass is incremental: only those UUIDs can become new
+    orphans, while already expired orphans are always swept.
+    Returns the number of bytes reclaimed.
+    """
+    now = time.time()
+    reclaimed_bytes = 0
+    removed_entries = 0
+
+    for map_name, json_attr in _STATE_MAPS:
+        state_map = getattr(tree, map_name)
+        # Iterate backwards so removals don't shift the indices still to visit.
+        for index in range(len(state_map) - 1, -1, -1):
+            entry = state_map[index]
+            uuid_str = entry.datablock_uuid
+
+            if uuid_str in live_uuids:
+                if entry.orphaned_at:
+                    entry.orphaned_at = ""
+                continue
+
+            orphaned_since = _orphaned_since(entry)
+            if orphaned_since is None:
+                if candidates is not None and uuid_str not in candidates:
+                    continue
+                if grace_period > 0.0:
+                    entry.orphaned_at = repr(now)
+                    continue
+            elif now - orphaned_since < grace_period:
+                continue
+
+            reclaimed_bytes += _entry_size(entry, json_attr)
+            removed_entries += 1
+            state_map.remove(index)
+
+    if removed_entries:
+        logger.log(f"[StateGC] Removed {removed_entries} stale entries, reclaimed {reclaimed_bytes} bytes.")
+    return reclaimed_bytes
@@ -0,0 +1,159 @@
+"""
+Proxy-level transform evaluator.
+
+Computes local and world matrices (and world-space bounds) for every prim of a scene
+straight from the proxy properties, before anything is materialized. Matrices are
+composed in batches with NumPy, one hierarchy level at a time, and the result is cached
+per scene until the scene is mutated.
+"""
+import weakref
+import numpy as np
+from ..proxy_types import register_mutation_callback
+
+_SCENE_TRANSFORMS = weakref.WeakKeyDictionary()
+
+def _vector3(value, default):
+    try:
+        if len(value) >= 3:
+            return (float(value[0]), float(value[1]), float(value[2]))
+    except (TypeError, ValueError):
+        pass
+    return default
+
+def _local_matrices(locations, rotations, scales):
+    """
+    Batched T @ R @ S for XYZ euler rotations (Blender's default rotation mode).
+    Returns N x 4 x 4.
+    """
+    count = len(locations)
+    cx, cy, cz = np.cos(rotations).T
+    sx, sy, sz = np.sin(rotations).T
+
+    rotation = np.empty((count, 3, 3))
+    rotation[:, 0, 0] = cy * cz
+    rotation[:, 0, 1] = sx * sy * cz - cx * sz
+    rotation[:, 0, 2] = cx * sy * cz + sx * sz
+    rotation[:, 1, 0] = cy * sz
+    rotation[:, 1, 1] = sx * sy * sz + cx * cz
+    rotation[:, 1, 2] = cx * sy * sz - sx * cz
+    rotation[:, 2, 0] = -sy
+    rotation[:, 2, 1] = sx * cy
+    rotation[:, 2, 2] = cx * cy
+
+    matrices = np.zeros((count, 4, 4))
+    matrices[:, :3, :3] = rotation * scales[:, np.newaxis, :]  # Scale the columns
+    matrices[:, :3, 3] = locations
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+def _mesh_local_bounds(mesh_proxy):
+    vertices = mesh_proxy.properties_view.get('_fn_geometry_data', {}).get('vertices')
+    if not vertices:
+        return None
+    points = np.asarray(vertices, dtype=float).reshape(-1, 3)
+    return points.min(axis=0), points.max(axis=0)
+
+class SceneTransforms:
+    """World matrices and bounds of the prims of one scene, in depth-first order."""
+
+    def __init__(self, root_proxy):
+        self.prims = root_proxy.get_flat_list()
+        self.positions = {id(p): i for i, p in enumerate(self.prims)}
+        count = len(self.prims)
+
+        # Only objects carry a transform; every other prim keeps the identity.
+        is_object = np.array([p.properties_view.get('datablock_type') == 'OBJECT' for p in self.prims], dtype=bool)
+        locations = np.zeros((count, 3))
+        rotations = np.zeros((count, 3))
+        scales = np.ones((count, 3))
+        for i in np.flatnonzero(is_object):
+            properties = self.prims[i].properties_view
+            locations[i] = _vector3(properties.get('location'), (0.0, 0.0, 0.0))
+            rotations[i] = _vector3(properties.get('rotation_euler'), (0.0, 0.0, 0.0))
+            scales[i] = _vector3(properties.get('scale'), (1.0, 1.0, 1.0))
+
+        self.local = _local_matrices(locations, rotations, scales)
+        self.world = self.local.copy()
+
+        # The materializer parents an object to the prim above it when both are objects.
+        parent_positions = np.full(count, -1)
+        depths = np.zeros(count, dtype=int)
+        for i, prim in enumerate(self.prims):
+            if prim.parent is not None and id(prim.parent) in self.positions:
+                parent_index = self.positions[id(prim.parent)]
+                depths[i] = depths[parent_index] + 1
+                if is_object[i] and is_object[parent_index]:
+                    parent_positions[i] = parent_index
+
+        # Compose one hierarchy level at a time: every parent is final before its children.
+        for depth in range(1, depths.max() + 1 if count else 0):
+            level = np.flatnonzero((depths == depth) & (parent_positions >= 0))
+            if len(level):
+                self.world[level] = np.matmul(self.world[parent_positions[level]], self.local[level])
+
+        self._compute_bounds(root_proxy, is_object)
+
+    def _compute_bounds(self, root_proxy, is_object):
+        """
+        World-space AABBs of objects whose data is a mesh proxy with geometry, and of
+        unloaded payloads that declare their bounds (NaN otherwise).
+        """
+        count = len(self.prims)
+        self.bounds_min = np.full((count, 3), np.nan)
+        self.bounds_max = np.full((count, 3), np.nan)
+
+        mesh_bounds = {}
+        indices, local_min, local_max = [], [], []
+        for i in np.flatnonzero(is_object):
+            data_path = self.prims[i].properties_view.get('_fn_relationships', {}).get('data')
+            if not isinstance(data_path, str):
+                continue
+            if data_path not in mesh_bounds:
+                data_proxy = root_proxy.find_child_by_path(data_path)
+                mesh_bounds[data_path] = _mesh_local_bounds(data_proxy) if data_proxy else None
+            bounds = mesh_bounds[data_path]
+            if bounds:
+                indices.append(i)
+                local_min.append(bounds[0])
+                local_max.append(bounds[1])
+        for i, prim in enumerate(self.prims):
+            if prim.has_unloaded_payload and prim.payload.bounds:
+                indices.append(i)
+                local_min.append(prim.payload.bounds[0])
+                local_max.append(prim.payload.bounds[1])
+        if not indices:
+            return
+
+        local_min, local_max = np.array(local_min), np.array(local_max)
+        # The 8 corners of every local box, in homogeneous coordinates: M x 8 x 4.
+        selector = np.array([[(c >> axis) & 1 for axis in range(3)] for c in range(8)], dtype=bool)
+        corners = np.where(selector[np.newaxis], local_max[:, np.newaxis, :], local_min[:, np.newaxis, :])
+        corners = np.concatenate([corners, np.ones(corners.shape[:2] + (1,))], axis=2)
+        world_corners = np.matmul(corners, np.transpose(self.world[indices], (0, 2, 1)))[:, :, :3]
+        self.bounds_min[indices] = world_corners.min(axis=1)
+        self.bounds_max[indices] = world_corners.max(axis=1)
+
+    def world_matrix(self, prim):
+        return self.world[self.positions[id(prim)]]
+
+    def world_location(self, prim):
+        return self.world[self.positions[id(prim)], :3, 3]
+
+    def world_bounds(self, prim):
+        """(min, max) corners of the prim's world AABB, or None if it has no geometry."""
+        i = self.positions[id(prim)]
+        if np.isnan(self.bounds_min[i, 0]):
+            return None
+        return self.bounds_min[i], self.bounds_max[i]
+
+def get_scene_transforms(root_proxy):
+    """Returns the transforms of a scene, evaluating them on first use."""
+    transforms = _SCENE_TRANSFORMS.get(root_proxy)
+    if transforms is None:
+        transforms = _SCENE_TRANSFORMS[root_proxy] = SceneTransforms(root_proxy)
+    return transforms
+
+def _on_scene_mutated(root_proxy):
+    _SCENE_TRANSFORMS.pop(root_proxy, None)
+
+register_mutation_callback(_on_scene_mutated)
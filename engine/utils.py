@@ -1,12 +1,15 @@
 """Funciones de utilidad para el motor de ejecución."""
+import ast
 import bpy
 import mathutils
 import json
 import warnings
-import fnmatch
+from copy import deepcopy
+from functools import lru_cache
 from bpy.types import bpy_prop_array
 from .. import uuid_manager
-from ..proxy_types import DatablockProxy
+from . import selection
+from ..proxy_types import DatablockProxy, intern_value
 from ..query_types import FNSelectionQuery
 
 # Conjuntos para una comprobación de exclusión más rápida y limpia
@@ -49,9 +52,19 @@ def from_json_safe(value):
         return value
     return value
 
-def set_nested_property(base, path, value):
+_MATHUTILS_TYPES = (mathutils.Vector, mathutils.Color, mathutils.Euler, mathutils.Quaternion, mathutils.Matrix)
+
+# {(datablock type, property path parts): mathutils type of the property}, learned from the writes so far
+_VALUE_KINDS = {}
+
+def set_nested_property(base, path, value, kind_key=None):
+    """
+    Sets a (dotted, or already split) property path, skipping the write when the value is
+    unchanged. With a `kind_key`, the mathutils type of the property is remembered for
+    `prepare_value`.
+    """
     try:
-        parts = path.split('.')
+        parts = path.split('.') if isinstance(path, str) else path
         obj = base
         for part in parts[:-1]:
             obj = getattr(obj, part)
@@ -60,13 +73,12 @@ def set_nested_property(base, path, value):
         # --- Optimization: Only write the property if the value has changed ---
         current_value = getattr(obj, prop_name)
         
-        # Convert list to mathutils type for proper comparison
-        if isinstance(value, list):
-            if isinstance(current_value, mathutils.Vector): value = mathutils.Vector(value)
-            elif isinstance(current_value, mathutils.Color): value = mathutils.Color(value)
-            elif isinstance(current_value, mathutils.Euler): value = mathutils.Euler(value)
-            elif isinstance(current_value, mathutils.Quaternion): value = mathutils.Quaternion(value)
-            elif isinstance(current_value, mathutils.Matrix): value = mathutils.Matrix(value)
+        # Convert sequences to mathutils type for proper comparison
+        if isinstance(current_value, _MATHUTILS_TYPES):
+            if kind_key is not None:
+                _VALUE_KINDS[kind_key] = type(current_value)
+            if isinstance(value, (list, tuple)):
+                value = type(current_value)(value)
 
         if current_value == value:
             return True # Value is the same, no need to set it. Success.
@@ -76,6 +88,52 @@ def set_nested_property(base, path, value):
     except (AttributeError, TypeError, ValueError):
         return False
 
+def prepare_value(kind_key, value):
+    """
+    Converts a sequence to the mathutils type its property was seen with, so the write
+    doesn't have to. Doesn't touch bpy: safe to call from worker threads.
+    """
+    kind = _VALUE_KINDS.get(kind_key)
+    if kind is not None and isinstance(value, (list, tuple)):
+        try:
+            return kind(value)
+        except (TypeError, ValueError):
+            pass
+    return value
+
+def _freeze_literal(value):
+    """Lists become tuples, so parsed values can be shared instead of copied."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze_literal(v) for v in value)
+    return value
+
+@lru_cache(maxsize=1024)
+def parse_property_value(text):
+    """
+    Parses a property value typed in a node as a Python literal (numbers, strings, booleans,
+    None, tuples/lists, dicts). Anything that isn't a literal is kept as a plain string.
+    Results are memoized by string and must not be mutated.
+    """
+    if not isinstance(text, str):
+        return text
+    try:
+        return _freeze_literal(ast.literal_eval(text.strip()))
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return text
+
+def assign_property(prims, prop_name, value):
+    """
+    Sets one property on many prims. Immutable values are interned and shared by every
+    target; dicts stay mutable and are copied per prim so the targets never alias each other.
+    """
+    if isinstance(value, dict):
+        for prim in prims:
+            prim.properties[prop_name] = deepcopy(value)
+        return
+    value = intern_value(value)
+    for prim in prims:
+        prim.properties[prop_name] = value
+
 def capture_initial_state(datablock):
     """
     Captures the properties of a datablock into a JSON-serializable dictionary.
@@ -120,44 +178,32 @@ def capture_initial_state(datablock):
 def resolve_selection(root_proxy: DatablockProxy, query: FNSelectionQuery) -> list[DatablockProxy]:
     """
     Finds and returns a list of prims in the scene graph that match the given query.
+    The path glob is compiled (and cached) by the selection engine, which only walks
+    the branches of the tree that can match.
     """
     if not root_proxy or not query:
         return []
+    return selection.select(root_proxy, query)
 
-    all_prims = []
-    nodes_to_visit = [root_proxy]
-    while nodes_to_visit:
-        node = nodes_to_visit.pop(0)
-        all_prims.append(node)
-        nodes_to_visit.extend(node.children)
-
-    path_pattern = query.path_glob
-    path_matched_prims = [p for p in all_prims if fnmatch.fnmatch(p.path, path_pattern)]
-
-    if not query.filters:
-        return path_matched_prims
-
-    filtered_prims = []
-    for prim in path_matched_prims:
-        match_all_filters = True
-        for f in query.filters:
-            key = f.get('key')
-            op = f.get('op')
-            value = f.get('value')
-
-            if key == 'type':
-                prim_type = prim.properties.get('datablock_type')
-                if not (op == 'eq' and prim_type == value):
-                    match_all_filters = False
-                    break
-        
-        if match_all_filters:
-            filtered_prims.append(prim)
-
-    return filtered_prims
+def clone_and_resolve_selection(source_root: DatablockProxy, query: FNSelectionQuery) -> tuple[DatablockProxy, list[DatablockProxy]]:
+    """
+    Returns a clone of `source_root` (the node's working copy) and the prims of the clone
+    that match the query. The query is resolved against the upstream scene, whose indexes
+    are shared by every node it feeds, after loading the payloads it descends into.
+    """
+    if not query:
+        return source_root.clone(), []
+    return selection.clone_and_select(source_root, query)
 
 def parse_multi_target_string(input_string: str) -> list[str]:
     """Parses a comma-separated string into a list of clean names."""
     if not input_string:
         return []
-    return [name.strip() for name in input_string.split(',') if name.strip()]
\ No newline at end of file
+    return [name.strip() for name in input_string.split(',') if name.strip()]
+
+def redraw_node_editors():
+    """Tags every node editor for redraw, e.g. to refresh progress shown on nodes."""
+    for window in getattr(bpy.context.window_manager, 'windows', []):
+        for area in window.screen.areas:
+            if area.type == 'NODE_EDITOR':
+                area.tag_redraw()
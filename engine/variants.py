@@ -0,0 +1,85 @@
+"""
+Delta computation between the variants of a batch.
+
+A variant is summarized by the (UUID, properties hash) pairs of its plan, so the cost of
+switching the materialized scene from one variant to another is the size of the symmetric
+difference of their summaries.
+"""
+import weakref
+from .. import logger
+from . import hashing
+
+# Number of upcoming variants the ordering chooses from. Ordering costs O(n * window)
+# deltas, and the plans of the variants in the window are held in memory at once.
+REORDER_WINDOW = 32
+# Window for lazily generated scene lists, which are meant to hold one variant at a time
+# (the one being rendered and the next one): they are rendered in list order.
+STREAM_REORDER_WINDOW = 1
+
+# Property key sets are the same for most prims: one instance of each is kept.
+_KEY_SETS = weakref.WeakValueDictionary()
+
+def _shared_key_set(properties):
+    keys = frozenset(properties)
+    return _KEY_SETS.setdefault(keys, keys)
+
+class VariantState:
+    """Summary of a variant's plan."""
+
+    def __init__(self, plan):
+        self.prims = {}  # uuid: (properties hash, property keys)
+        for proxy in plan:
+            properties = proxy.properties_view
+            self.prims[str(proxy.fn_uuid)] = (hashing.properties_hash(properties), _shared_key_set(properties))
+        self.items = frozenset((uuid_str, entry[0]) for uuid_str, entry in self.prims.items())
+
+    def delta(self, other):
+        """Number of prims to create, destroy or update to go from one variant to the other."""
+        return len(self.items ^ other.items)
+
+    def recreate_uuids(self, previous):
+        """
+        Prims present in both variants that lost properties: the materializer only writes the
+        properties a prim declares, so these must be rebuilt instead of updated in place.
+        """
+        if previous is None:
+            return set()
+        return {
+            uuid_str for uuid_str, (properties_hash, keys) in self.prims.items()
+            if uuid_str in previous.prims and previous.prims[uuid_str][0] != properties_hash
+            and not previous.prims[uuid_str][1] <= keys
+        }
+
+def order_by_delta(items, state=lambda item: item, window=REORDER_WINDOW):
+    """
+    Greedy nearest-neighbour ordering: starting from the first item, always continue with
+    the item that is the cheapest to switch to (`state(item)` gives its VariantState).
+    The choice is made among the next `window` items only, which caps the cost and the
+    number of items held at once: `items` can be a lazy iterable, it is consumed as the
+    ordered items are. Lists of up to `window` + 1 items are ordered as a whole.
+    """
+    items = iter(items)
+    pending = []
+    for item in items:
+        pending.append(item)
+        if len(pending) > window:
+            break
+    if not pending:
+        return
+
+    current = pending.pop(0)
+    count, total = 1, 0
+    yield current
+    while pending:
+        current_state = state(current)
+        deltas = [current_state.delta(state(item)) for item in pending]
+        best = min(range(len(pending)), key=lambda i: (deltas[i], i))
+        current = pending.pop(best)
+        count += 1
+        total += deltas[best]
+        # Refill the window before handing the item over, so the next choice is as wide
+        for item in items:
+            pending.append(item)
+            break
+        yield current
+    logger.log(f"[Variants] Ordered {count} variants, {total} prim changes in total.")
@@ -0,0 +1,58 @@
+import bpy
+from ..nodes.base import FNBaseNode
+from ..sockets import FNSocketScene, FNSocketSelection, FNSocketString
+from ..engine import utils, expressions
+from ..query_types import FNSelectionQuery
+from .. import logger
+
+class FN_attribute_expression(FNBaseNode, bpy.types.Node):
+    """
+    Sets a property of every selected prim to the result of an expression evaluated per prim,
+    e.g. `location + index * (2, 0, 0)` or `rand(7) * 100`. Expressions are compiled once and
+    run over all the selected prims at the same time (see engine/expressions.py).
+    """
+    bl_idname = "FN_attribute_expression"
+    bl_label = "Attribute Expression"
+
+    def init(self, context):
+        FNBaseNode.init(self, context)
+        self.inputs.new('FNSocketScene', "Scene")
+        self.inputs.new('FNSocketSelection', "Selection")
+        self.inputs.new('FNSocketString', "Property Name").default_value = "location"
+        self.inputs.new('FNSocketString', "Expression").default_value = "location + index * (2, 0, 0)"
+        self.outputs.new('FNSocketScene', "Scene")
+
+    def execute(self, **kwargs):
+        scene_root = kwargs.get("Scene")
+        selection_query = kwargs.get("Selection")
+        prop_name = kwargs.get("Property Name")
+        expression_str = kwargs.get("Expression")
+
+        if not scene_root or not prop_name or not expression_str:
+            return {self.outputs[0].identifier: scene_root}
+
+        try:
+            expression = expressions.compile_expression(expression_str)
+        except expressions.ExpressionError as e:
+            logger.log(f"[AttributeExpression] Invalid expression '{expression_str}': {e}")
+            return {self.outputs[0].identifier: scene_root}
+
+        # If no selection is provided, create a query that selects everything.
+        if not selection_query:
+            selection_query = FNSelectionQuery(raw_expression="*", path_glob="*", filters=[])
+
+        new_scene_root, target_prims = utils.clone_and_resolve_selection(scene_root, selection_query)
+        if not target_prims:
+            return {self.outputs[0].identifier: new_scene_root}
+
+        try:
+            result = expression.evaluate(target_prims)
+        except expressions.ExpressionError as e:
+            logger.log(f"[AttributeExpression] Could not evaluate '{expression_str}': {e}")
+            return {self.outputs[0].identifier: scene_root}
+
+        for prim, value in zip(target_prims, expressions.to_property_values(result)):
+            prim.properties[prop_name] = value
+
+        new_scene_root.notify_mutated()
+        return {self.outputs[0].identifier: new_scene_root}
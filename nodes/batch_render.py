@@ -1,16 +1,59 @@
 import bpy
 from ..nodes.base import FNBaseNode
 from ..sockets import FNSocketSceneList, FNSocketPulse
-from ..engine import orchestrator
+from ..engine import orchestrator, variants, render_pool, render_cache, applied_values, scene_stream
+from .. import logger
 
 class FN_batch_render(FNBaseNode, bpy.types.Node):
     """
-    An executor node that takes a list of scenes, materializes each one sequentially,
-    renders it, and then destroys it to free memory.
+    An executor node that takes a list of scenes, materializes each one sequentially and
+    renders it. Variants are reordered to minimize the changes between consecutive scenes,
+    and only those changes are applied to go from one variant to the next. The order is
+    chosen among a window of upcoming variants, so long scene lists are never planned all at
+    once; lazy scene lists are rendered in their own order, one variant ahead.
+    In Background mode, variants are rendered in parallel by background Blender processes
+    while the session stays responsive.
+    Variants whose content hash was already rendered to their output are skipped, so an
+    interrupted batch resumes where it stopped and editing one variant renders only that one.
     """
     bl_idname = "FN_batch_render"
     bl_label = "Batch Render"
 
+    mode: bpy.props.EnumProperty(
+        name="Mode",
+        items=[
+            ('SESSION', "In Session", "Render the variants one after another in this Blender session"),
+            ('BACKGROUND', "Background", "Render the variants in parallel in background Blender processes (CPU)"),
+        ],
+        default='SESSION'
+    )
+    output_path: bpy.props.StringProperty(
+        name="Output",
+        description="Output path of each variant; {index} is replaced by the variant's position in the list and {hash} by its content hash. Empty uses each scene's own output path (Session mode only)",
+        default="//renders/variant_{index:04d}",
+        subtype='FILE_PATH'
+    )
+    workers: bpy.props.IntProperty(
+        name="Workers",
+        description="Number of background Blender processes (0: as many as the thread limit allows)",
+        default=0, min=0
+    )
+    threads_per_worker: bpy.props.IntProperty(
+        name="Threads per Worker",
+        description="Render threads of each background process (0: all cores)",
+        default=2, min=0
+    )
+    skip_rendered: bpy.props.BoolProperty(
+        name="Skip Rendered",
+        description="Don't render variants whose output was already rendered from identical content",
+        default=True
+    )
+    max_retries: bpy.props.IntProperty(
+        name="Retries",
+        description="How many times a failed variant is rendered again",
+        default=1, min=0
+    )
+
     def init(self, context):
         FNBaseNode.init(self, context)
         self.inputs.new('FNSocketSceneList', "Scene List")
@@ -51,44 +94,190 @@ class FN_OT_run_batch_render(bpy.types.Operator):
         # This is a simplified version of the main orchestrator logic
         session_cache = {}
         upstream_results = orchestrator._evaluate_node(node_tree, scene_list_socket.links[0].from_node, session_cache)
-        scene_list = upstream_results.get(scene_list_socket.links[0].from_socket.identifier, [])
+        scene_list = upstream_results.get(scene_list_socket.links[0].from_socket.identifier) or []
 
-        if not scene_list:
+        if not len(scene_list):
             self.report({'WARNING'}, "Input scene list is empty.")
             return {'FINISHED'}
 
-        # 2. Iterate and render each scene
-        for i, scene_root in enumerate(scene_list):
-            self.report({'INFO'}, f"Processing scene {i+1}/{len(scene_list)}: {scene_root.path}")
-            
-            # a. Materialize the scene
-            plan = orchestrator.planner.plan_execution(scene_root)
-            orchestrator._synchronize_blender_state(node_tree, plan, context.evaluated_depsgraph_get())
-            
-            # b. Set the active scene and render
-            # We need to find the materialized scene datablock
-            scene_db = orchestrator.uuid_manager.find_datablock_by_uuid(str(scene_root.fn_uuid))
-            if scene_db:
-                context.window.scene = scene_db
-                bpy.ops.render.render(write_still=True)
-            else:
-                self.report({'ERROR'}, f"Could not find materialized scene for {scene_root.path}")
-
-            # c. Clean up (destroy the scene) before the next iteration
-            orchestrator._synchronize_blender_state(node_tree, [], context.evaluated_depsgraph_get())
+        # 2. Plan the variants, skipping the ones already rendered from the same content.
+        #    Variants of a lazy scene list are built and planned one at a time, as they're rendered.
+        cache = render_cache.RenderCache() if target_node.skip_rendered else None
+        planner = _VariantPlanner(node_tree, target_node, cache)
+
+        if target_node.mode == 'BACKGROUND':
+            return self._render_in_background(target_node, planner, scene_list)
+
+        # 3. Order the variants so consecutive scenes differ as little as possible
+        #    (lazy lists keep their order, so only one variant is held ahead)
+        window = variants.STREAM_REORDER_WINDOW if scene_stream.is_lazy(scene_list) else variants.REORDER_WINDOW
+        planned = variants.order_by_delta(planner.plan(scene_list), state=lambda variant: variant.state, window=window)
+
+        # 4. Iterate and render each scene, applying only the delta from the previous one
+        previous_state = None
+        try:
+            for step, variant in enumerate(planned):
+                scene_root, plan, state = variant.scene_root, variant.plan, variant.state
+                delta = state.delta(previous_state) if previous_state else len(plan)
+                self.report({'INFO'}, f"Processing scene {step+1}/{len(scene_list)}: {scene_root.path} ({delta} changes)")
 
+                # a. Materialize the scene (the state of prims missing from this variant is kept for the next ones).
+                #    No depsgraph update is handled within the operator: remembered values are re-read.
+                for proxy in plan:
+                    applied_values.touch(str(proxy.fn_uuid))
+                orchestrator._synchronize_blender_state(
+                    node_tree, plan, context.evaluated_depsgraph_get(), scene_root,
+                    recreate_uuids=state.recreate_uuids(previous_state), collect_garbage=False
+                )
+                previous_state = state
+
+                # b. Set the active scene and render
+                # We need to find the materialized scene datablock
+                scene_db = orchestrator.uuid_manager.find_datablock_by_uuid(str(scene_root.fn_uuid))
+                if scene_db:
+                    context.window.scene = scene_db
+                    if variant.output:
+                        scene_db.render.filepath = variant.output
+                    bpy.ops.render.render(write_still=True)
+                    # c. Record the render right away, so an interrupted batch resumes after it
+                    if cache and variant.output:
+                        cache.record(variant.output, variant.hash, scene_db.render.frame_path(frame=scene_db.frame_current))
+                else:
+                    self.report({'ERROR'}, f"Could not find materialized scene for {scene_root.path}")
+        finally:
+            # d. Bring the scene back to the active branch of the tree
+            orchestrator.execute_node_tree(node_tree, context.evaluated_depsgraph_get(), force=True)
+
+        if planner.skipped:
+            self.report({'INFO'}, f"{planner.skipped} variants already rendered, skipped.")
         self.report({'INFO'}, "Batch render finished.")
         return {'FINISHED'}
 
+    def _render_in_background(self, target_node, planner, scene_list):
+        if not target_node.output_path:
+            self.report({'ERROR'}, "Background rendering needs an output path.")
+            return {'CANCELLED'}
+        if render_pool.get_active_pool(target_node.fn_node_id):
+            self.report({'WARNING'}, "A batch is already running for this node.")
+            return {'CANCELLED'}
+
+        # Variants are materialized in the workers: only their plans leave this session.
+        # Jobs are planned when a worker asks for one, so a long scene list is never held at once.
+        jobs = (
+            render_pool.RenderJob(variant.index, variant.plan, variant.overrides, variant.output, variant.scene_root.path, variant.hash)
+            for variant in planner.plan(scene_list)
+        )
+        threads = target_node.threads_per_worker
+        workers = target_node.workers or render_pool.default_worker_count(threads)
+
+        def on_job_done(job):
+            if planner.cache and job.written_file:
+                planner.cache.record(job.output_path, job.variant_hash, job.written_file)
+
+        def on_finished(pool):
+            for job in pool.failed:
+                logger.log(f"[BatchRender] Variant {job.index} ({job.label}) failed: {job.error}")
+
+        pool = render_pool.RenderPool(
+            jobs, workers, threads, target_node.max_retries, on_job_done=on_job_done, total=len(scene_list)
+        )
+        planner.on_skip = pool.skip
+        render_pool.run_in_background(target_node.fn_node_id, pool, on_finished)
+        self.report({'INFO'}, f"Rendering {len(scene_list)} variants on {pool.worker_count} background workers.")
+        return {'FINISHED'}
+
+class _Variant:
+    """A planned variant of a batch, with what's needed to render it and cache the result."""
+
+    def __init__(self, index, scene_root, plan, overrides, variant_hash, output):
+        self.index = index
+        self.scene_root = scene_root
+        self.plan = plan
+        self.overrides = overrides
+        self.hash = variant_hash
+        self.output = output
+        self._state = None
+
+    @property
+    def state(self):
+        if self._state is None:
+            self._state = variants.VariantState(self.plan)
+        return self._state
+
+class _VariantPlanner:
+    """Plans the variants of a scene list in order, leaving out the ones already rendered."""
+
+    def __init__(self, node_tree, node, cache):
+        self.node_tree = node_tree
+        self.node = node
+        self.cache = cache
+        self.skipped = 0
+        self.on_skip = None
+
+    def plan(self, scene_list):
+        for index, scene_root in enumerate(scene_list):
+            plan = orchestrator.plan_scene(self.node_tree, scene_root)
+            if not plan:
+                continue
+            overrides = render_pool.overrides_for_plan(self.node_tree, plan)
+            variant_hash = render_cache.variant_hash(plan, overrides)
+            output = _output_path(self.node, index, variant_hash)
+            if self.cache and output and self.cache.resolve(output, variant_hash):
+                self.skipped += 1
+                if self.on_skip:
+                    self.on_skip()
+                continue
+            yield _Variant(index, scene_root, plan, overrides, variant_hash, output)
+
+class FN_OT_cancel_batch_render(bpy.types.Operator):
+    """Stops the background render of a Batch Render node."""
+    bl_idname = "fn.cancel_batch_render"
+    bl_label = "Cancel Batch Render"
+
+    node_id: bpy.props.StringProperty()
+
+    def execute(self, context):
+        pool = render_pool.get_active_pool(self.node_id)
+        if pool:
+            pool.cancel()
+        return {'FINISHED'}
+
+def _output_path(node, index, variant_hash):
+    """Absolute output path of a variant. Without an {index} or {hash} token the index is appended."""
+    path = node.output_path
+    if not path:
+        return ""
+    if "{index" in path or "{hash" in path:
+        path = path.format(index=index, hash=variant_hash)
+    else:
+        path = f"{path}{index:04d}"
+    return bpy.path.abspath(path)
+
 # The node itself needs a button to call the operator
 
 def add_render_button(self, context, layout):
-    op = layout.operator("fn.run_batch_render", text="Run Batch Render")
-    op.node_id = self.fn_node_id
+    layout.prop(self, "mode", text="")
+    layout.prop(self, "output_path", text="")
+    layout.prop(self, "skip_rendered")
+    if self.mode == 'BACKGROUND':
+        layout.prop(self, "workers")
+        layout.prop(self, "threads_per_worker")
+        layout.prop(self, "max_retries")
+
+    pool = render_pool.get_active_pool(self.fn_node_id)
+    if pool:
+        finished, failed, total = pool.progress()
+        row = layout.row(align=True)
+        row.label(text=f"{finished}/{total} rendered" + (f", {failed} failed" if failed else ""))
+        op = row.operator("fn.cancel_batch_render", text="", icon='CANCEL')
+        op.node_id = self.fn_node_id
+    else:
+        op = layout.operator("fn.run_batch_render", text="Run Batch Render")
+        op.node_id = self.fn_node_id
 
 # We need to register the operator and add the button to the node's draw function
 
-_classes = (FN_batch_render, FN_OT_run_batch_render)
+_classes = (FN_batch_render, FN_OT_run_batch_render, FN_OT_cancel_batch_render)
 
 def register():
     for cls in _classes:
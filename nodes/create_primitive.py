@@ -4,7 +4,7 @@ Node to procedurally create primitive objects.
 import bpy
 from ..nodes.base import FNBaseNode
 from ..sockets import FNSocketScene, FNSocketString
-from ..proxy_types import DatablockProxy
+from ..proxy_types import DatablockProxy, intern_value
 
 def _update_node(self, context):
     self.id_data.update_tag()
@@ -135,11 +135,12 @@ class FN_create_primitive(FNBaseNode, bpy.types.Node):
         faces = [(0, 1, 2, 3), (4, 5, 6, 7), (0, 4, 7, 3), 
                  (1, 5, 6, 2), (0, 1, 5, 4), (3, 2, 6, 7)]
         
-        mesh_data_proxy.properties['_fn_geometry_data'] = {
+        # Geometry is immutable: interning it lets every cube share a single copy.
+        mesh_data_proxy.properties['_fn_geometry_data'] = intern_value({
             'vertices': verts,
             'edges': [],
             'faces': faces
-        }
+        })
 
         object_path = f"/root/{name}"
         object_proxy = DatablockProxy(path=object_path, parent=root_proxy, fn_uuid=object_uuid)
@@ -1,14 +1,17 @@
 import bpy
 from ..nodes.base import FNBaseNode
 from ..sockets import FNSocketScene, FNSocketSceneList
+from ..engine.scene_stream import SceneStream
 
 class FN_create_scene_list(FNBaseNode, bpy.types.Node):
     """
     Collects multiple scene graphs into a single list for batch processing
-    by an Executor node (e.g., Batch Render).
+    by an Executor node (e.g., Batch Render). The scenes are only evaluated when the
+    list is iterated, one at a time.
     """
     bl_idname = "FN_create_scene_list"
     bl_label = "Create Scene List"
+    fn_lazy_inputs = True
 
     # The number of scene inputs can be changed by the user
     scene_inputs: bpy.props.IntProperty(name="Scenes", default=1, min=1, update=lambda s,c: s.update_sockets())
@@ -29,11 +32,11 @@ class FN_create_scene_list(FNBaseNode, bpy.types.Node):
             self.inputs.remove(self.inputs[-1])
 
     def execute(self, **kwargs):
-        scene_list = []
+        factories = []
         for i in range(self.scene_inputs):
             socket_id = self.inputs[i].identifier
-            scene_root = kwargs.get(socket_id)
-            if scene_root:
-                scene_list.append(scene_root)
-        
-        return {self.outputs[0].identifier: scene_list}
+            factory = kwargs.get(socket_id)
+            if callable(factory):
+                factories.append(factory)
+
+        return {self.outputs[0].identifier: SceneStream(factories)}
@@ -1,63 +1,203 @@
+import os
+import glob
+import uuid
 import bpy
 from ..nodes.base import FNBaseNode
 from ..sockets import FNSocketScene
-from ..proxy_types import DatablockProxy
+from ..proxy_types import DatablockProxy, Payload
+from ..engine import blend_catalog
+from .. import logger
+
+# { node id: ((path, file signature, output uuid), root proxy) }
+_PROXY_TREE_CACHE = {}
+
+# (catalog category, datablock type of its prims, tag used for their persistent UUIDs)
+_CATALOG_PRIM_TYPES = (
+    ('scenes', 'SCENE', 'scene'),
+    ('collections', 'COLLECTION', 'collection'),
+    ('objects', 'OBJECT', 'object'),
+)
+
+def add_catalog_prims(parent_proxy, catalog, node_id, uuid_prefix="", collection_links=None):
+    """Adds one prim per cataloged scene, collection and object under `parent_proxy`."""
+    for category, datablock_type, uuid_tag in _CATALOG_PRIM_TYPES:
+        for id_name in catalog.get(category, []):
+            prim_path = f"{parent_proxy.path}/{id_name}"
+            prim_uuid = str(uuid.uuid5(uuid.UUID(node_id), f"{uuid_prefix}{uuid_tag}_{id_name}"))
+            prim = DatablockProxy(path=prim_path, parent=parent_proxy, fn_uuid=prim_uuid)
+            prim.properties['datablock_type'] = datablock_type
+            prim.properties['name'] = id_name
+            if collection_links and datablock_type != 'SCENE':
+                prim.properties['_fn_relationships'] = {'collection_links': list(collection_links)}
+
+class CatalogPayloadLoader:
+    """
+    Payload loader that fills a prim with the catalog of a .blend file.
+    The catalog is only read (or fetched from the catalog cache) when the payload is loaded.
+    """
+    def __init__(self, node_id, filepath, uuid_prefix="", use_block_reader=True, signature=None):
+        self.node_id = node_id
+        self.filepath = filepath
+        self.uuid_prefix = uuid_prefix
+        self.use_block_reader = use_block_reader
+        self.signature = signature  # Version of the file the payload was declared for
+
+    @property
+    def source(self):
+        return (self.filepath, self.signature, self.node_id, self.uuid_prefix, self.use_block_reader)
+
+    def __call__(self, proxy):
+        try:
+            _, catalog = blend_catalog.get_catalog(self.filepath, self.use_block_reader)
+        except Exception as e:
+            logger.log(f"[Import] ERROR: Could not load payload {self.filepath}: {e}")
+            return
+        if catalog:
+            add_catalog_prims(proxy, catalog, self.node_id, self.uuid_prefix, collection_links=[proxy.path])
 
 class FN_import(FNBaseNode, bpy.types.Node):
     """
     Imports the contents of a .blend file and represents it as a hierarchical scene graph.
     It scans the file without loading it into memory, building a proxy tree of its contents.
+    The file's catalog and the resulting tree are cached until the file changes on disk.
+    In Directory mode, every .blend file matching a pattern is cataloged in parallel
+    and combined into a single tree, with one collection prim per file. Deferred files
+    are payloads: they are only cataloged when something downstream needs their contents.
     """
     bl_idname = "FN_import"
     bl_label = "Import"
 
+    source: bpy.props.EnumProperty(
+        name="Source",
+        items=[
+            ('FILE', "File", "Import a single .blend file"),
+            ('DIRECTORY', "Directory", "Import every .blend file of a directory matching a pattern"),
+        ],
+        default='FILE',
+        update=lambda s,c: s.id_data.update_tag()
+    )
     filepath: bpy.props.StringProperty(subtype="FILE_PATH")
+    directory: bpy.props.StringProperty(subtype="DIR_PATH", update=lambda s,c: s.id_data.update_tag())
+    file_pattern: bpy.props.StringProperty(
+        name="Pattern",
+        description="Glob pattern of the files to import, relative to the directory",
+        default="*.blend",
+        update=lambda s,c: s.id_data.update_tag()
+    )
+    recursive: bpy.props.BoolProperty(
+        name="Recursive",
+        description="Also match files in subdirectories ('**' in the pattern)",
+        default=False,
+        update=lambda s,c: s.id_data.update_tag()
+    )
+    deferred: bpy.props.BoolProperty(
+        name="Deferred",
+        description="Import each file as a payload, cataloged only when a selection or the materializer needs its contents",
+        default=False,
+        update=lambda s,c: s.id_data.update_tag()
+    )
+    use_block_reader: bpy.props.BoolProperty(
+        name="Fast Reader",
+        description="Read the file listing with the built-in .blend block reader instead of opening the library with Blender",
+        default=False,
+        update=lambda s,c: s.id_data.update_tag()
+    )
 
     def init(self, context):
         FNBaseNode.init(self, context)
         self.outputs.new('FNSocketScene', "Scene")
 
     def draw_buttons(self, context, layout):
-        layout.prop(self, "filepath", text="")
+        layout.prop(self, "source", text="")
+        if self.source == 'FILE':
+            layout.prop(self, "filepath", text="")
+            layout.prop(self, "use_block_reader")
+        else:
+            layout.prop(self, "directory", text="")
+            layout.prop(self, "file_pattern")
+            layout.prop(self, "recursive")
+            layout.prop(self, "deferred")
 
     def execute(self, **kwargs):
+        if self.source == 'DIRECTORY':
+            return self._execute_directory()
+        return self._execute_file()
+
+    def _execute_file(self):
         output_socket_id = self.outputs[0].identifier
 
         if not self.filepath or not self.filepath.endswith(".blend"):
             return {output_socket_id: None}
 
-        root_proxy = DatablockProxy(path="/root", fn_uuid=self.fn_output_uuid)
-        root_proxy.properties['datablock_type'] = 'SCENE'
-        root_proxy.properties['name'] = 'imported_scene'
-
         try:
-            with bpy.data.libraries.load(self.filepath, link=False) as (data_from, data_to):
-                # Import scenes
-                for scene_name in data_from.scenes:
-                    scene_path = f"/root/{scene_name}"
-                    scene_uuid = self.get_persistent_uuid(f"scene_{scene_name}")
-                    scene_proxy = DatablockProxy(path=scene_path, parent=root_proxy, fn_uuid=scene_uuid)
-                    scene_proxy.properties['datablock_type'] = 'SCENE'
-                    scene_proxy.properties['name'] = scene_name
-
-                # Import top-level collections
-                for col_name in data_from.collections:
-                    col_path = f"/root/{col_name}"
-                    col_uuid = self.get_persistent_uuid(f"collection_{col_name}")
-                    col_proxy = DatablockProxy(path=col_path, parent=root_proxy, fn_uuid=col_uuid)
-                    col_proxy.properties['datablock_type'] = 'COLLECTION'
-                    col_proxy.properties['name'] = col_name
-
-                # Import top-level objects
-                for obj_name in data_from.objects:
-                    obj_path = f"/root/{obj_name}"
-                    obj_uuid = self.get_persistent_uuid(f"object_{obj_name}")
-                    obj_proxy = DatablockProxy(path=obj_path, parent=root_proxy, fn_uuid=obj_uuid)
-                    obj_proxy.properties['datablock_type'] = 'OBJECT'
-                    obj_proxy.properties['name'] = obj_name
-
+            signature, catalog = blend_catalog.get_catalog(self.filepath, self.use_block_reader)
         except Exception as e:
             print(f"[FN_import] Error loading library: {e}")
             return {output_socket_id: None}
+        if catalog is None:
+            return {output_socket_id: None}
 
+        # Downstream nodes never mutate their inputs, so an unchanged file can reuse its tree as is.
+        cache_key = (blend_catalog.resolve_path(self.filepath), signature, self.fn_output_uuid)
+        cached = _PROXY_TREE_CACHE.get(self.fn_node_id)
+        if cached and cached[0] == cache_key:
+            return {output_socket_id: cached[1]}
+
+        root_proxy = self._create_root()
+        add_catalog_prims(root_proxy, catalog, self.fn_node_id)
+        _PROXY_TREE_CACHE[self.fn_node_id] = (cache_key, root_proxy)
         return {output_socket_id: root_proxy}
+
+    def _execute_directory(self):
+        output_socket_id = self.outputs[0].identifier
+        if not self.directory:
+            return {output_socket_id: None}
+
+        directory = blend_catalog.resolve_path(self.directory)
+        pattern = self.file_pattern or "*.blend"
+        if self.recursive and '**' not in pattern:
+            pattern = os.path.join('**', pattern)
+        filepaths = sorted(glob.glob(os.path.join(directory, pattern), recursive=self.recursive))
+        filepaths = [f for f in filepaths if f.endswith(".blend") and os.path.isfile(f)]
+
+        if self.deferred:
+            # Only the file signatures are needed until a payload is loaded.
+            entries = {}
+            for filepath in filepaths:
+                signature = blend_catalog.file_signature(filepath)
+                if signature is not None:
+                    entries[filepath] = (signature, None)
+        else:
+            entries = blend_catalog.get_catalogs(filepaths)
+        if not entries:
+            return {output_socket_id: None}
+
+        cache_key = (directory, self.deferred, tuple((path, signature) for path, (signature, _) in sorted(entries.items())), self.fn_output_uuid)
+        cached = _PROXY_TREE_CACHE.get(self.fn_node_id)
+        if cached and cached[0] == cache_key:
+            return {output_socket_id: cached[1]}
+
+        root_proxy = self._create_root()
+        for abspath, (signature, catalog) in sorted(entries.items()):
+            relative_path = os.path.relpath(abspath, directory).replace(os.sep, '/')
+            file_name = bpy.path.clean_name(os.path.splitext(relative_path)[0])
+            file_path = f"/root/{file_name}"
+            uuid_prefix = f"{relative_path}:"
+
+            payload = Payload(CatalogPayloadLoader(self.fn_node_id, abspath, uuid_prefix, signature=signature)) if self.deferred else None
+            file_proxy = DatablockProxy(path=file_path, parent=root_proxy, fn_uuid=self.get_persistent_uuid(f"file_{relative_path}"), payload=payload)
+            file_proxy.properties['datablock_type'] = 'COLLECTION'
+            file_proxy.properties['name'] = file_name
+            file_proxy.properties['_fn_relationships'] = {'collection_links': ['/root']}
+
+            if catalog is not None:
+                add_catalog_prims(file_proxy, catalog, self.fn_node_id, uuid_prefix, collection_links=[file_path])
+
+        _PROXY_TREE_CACHE[self.fn_node_id] = (cache_key, root_proxy)
+        return {output_socket_id: root_proxy}
+
+    def _create_root(self):
+        root_proxy = DatablockProxy(path="/root", fn_uuid=self.fn_output_uuid)
+        root_proxy.properties['datablock_type'] = 'SCENE'
+        root_proxy.properties['name'] = 'imported_scene'
+        return root_proxy
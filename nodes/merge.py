@@ -37,6 +37,7 @@ class FN_merge(FNBaseNode, bpy.types.Node):
 
         # 2. Call the merge method on the cloned root proxy
         merged_root.merge(override_scene_root)
+        merged_root.notify_mutated()
 
         # 3. Return the newly composed scene
         return {self.outputs[0].identifier: merged_root}
@@ -2,6 +2,7 @@ import bpy
 from ..nodes.base import FNBaseNode
 from ..sockets import FNSocketScene, FNSocketSelection
 from .. import logger
+from ..engine import selection as selection_engine
 
 class FN_parent(FNBaseNode, bpy.types.Node):
     bl_idname = "FN_parent"
@@ -37,24 +38,19 @@ class FN_parent(FNBaseNode, bpy.types.Node):
         if selection and selection.raw_expression:
             # A selection is provided, try to find the parent with it.
             logger.log(f"[ParentNode] Selection query received: '{selection.raw_expression}'")
-            # This is a simplified evaluation. A real implementation would be more complex.
-            # For now, we just look for the first prim whose path matches the glob.
+            # We use the first prim whose path matches the glob as the parent.
             # Note: This doesn't handle filters yet.
-            import fnmatch
-            all_prims = new_scene.get_flat_list()
-            found_path = None
-            for prim in all_prims:
-                if fnmatch.fnmatch(prim.path, selection.path_glob):
-                    found_path = prim.path
-                    break
-            
+            matcher = selection_engine.compile_path_glob(selection.path_glob)
+            first_match = next(matcher.walk(new_scene), None)
+            found_path = first_match.path if first_match else None
+
             if found_path:
                 target_parent_proxy = new_scene.find_child_by_path(found_path)
 
             logger.log(f"[ParentNode] Using selection to find parent. Found: {target_parent_proxy.path if target_parent_proxy else 'None'}")
         else:
             # Fallback: We parent to the first object found under the root of the parent scene.
-            target_parent_proxy = next((p for p in new_scene.children if p.properties.get('datablock_type') == 'OBJECT'), None)
+            target_parent_proxy = next((p for p in new_scene.children if p.properties_view.get('datablock_type') == 'OBJECT'), None)
             logger.log(f"[ParentNode] No selection provided. Falling back to first object: {target_parent_proxy.path if target_parent_proxy else 'None'}")
 
         if not target_parent_proxy:
@@ -63,7 +59,7 @@ class FN_parent(FNBaseNode, bpy.types.Node):
 
         # 3. Iterate over children of the incoming child scene and parent them
         for child_to_parent_proxy in children_scene.children:
-            if child_to_parent_proxy.properties.get('datablock_type') != 'OBJECT':
+            if child_to_parent_proxy.properties_view.get('datablock_type') != 'OBJECT':
                 continue # We only parent objects
 
             logger.log(f"[ParentNode] Parenting proxy '{child_to_parent_proxy.path}' under '{target_parent_proxy.path}'.")
@@ -80,4 +76,5 @@ class FN_parent(FNBaseNode, bpy.types.Node):
             cloned_child.parent = target_parent_proxy
             target_parent_proxy.children.append(cloned_child)
 
+        new_scene.notify_mutated()
         return {self.outputs[0].identifier: new_scene}
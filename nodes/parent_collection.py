@@ -30,13 +30,13 @@ class FN_parent_collection(FNBaseNode, bpy.types.Node):
         for child_name in child_names:
             child_path = f"/{child_name}"
             child_prim = new_scene_root.find_child_by_path(child_path)
-            if not child_prim or child_prim.properties.get('datablock_type') != 'COLLECTION':
+            if not child_prim or child_prim.properties_view.get('datablock_type') != 'COLLECTION':
                 continue
 
             for parent_name in parent_names:
                 parent_path = f"/{parent_name}"
                 parent_prim = new_scene_root.find_child_by_path(parent_path)
-                if not parent_prim or parent_prim.properties.get('datablock_type') != 'COLLECTION':
+                if not parent_prim or parent_prim.properties_view.get('datablock_type') != 'COLLECTION':
                     continue
                 
                 # This node defines a single, explicit parent for a collection.
@@ -46,4 +46,5 @@ class FN_parent_collection(FNBaseNode, bpy.types.Node):
                 links.clear()
                 links.append(parent_path)
 
+        new_scene_root.notify_mutated()
         return {self.outputs[0].identifier: new_scene_root}
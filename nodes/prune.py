@@ -28,11 +28,8 @@ class FN_prune(FNBaseNode, bpy.types.Node):
         if not selection_query:
             selection_query = FNSelectionQuery(raw_expression="*", path_glob="*", filters=[])
 
-        # Clone the scene to work on a copy
-        new_scene_root = scene_root.clone()
-
-        # Resolve the selection to get the target prims
-        prims_to_prune = utils.resolve_selection(new_scene_root, selection_query)
+        # Clone the scene and resolve the selection to get the target prims
+        new_scene_root, prims_to_prune = utils.clone_and_resolve_selection(scene_root, selection_query)
 
         for prim in prims_to_prune:
             if prim.parent:
@@ -44,4 +41,5 @@ class FN_prune(FNBaseNode, bpy.types.Node):
                     # It's safe to ignore.
                     pass
 
+        new_scene_root.notify_mutated()
         return {self.outputs[0].identifier: new_scene_root}
@@ -0,0 +1,59 @@
+import os
+import bpy
+from ..nodes.base import FNBaseNode
+from ..sockets import FNSocketScene
+from ..proxy_types import DatablockProxy, Payload
+from ..engine import blend_catalog
+from .. import logger
+from .import_node import CatalogPayloadLoader
+
+class FN_reference(FNBaseNode, bpy.types.Node):
+    """
+    References a .blend file as a payload: a single collection prim that stays an unexpanded
+    placeholder until a selection or the materializer needs its contents. Inactive references
+    are left unloaded when the scene is materialized with the 'Active' payload policy.
+    """
+    bl_idname = "FN_reference"
+    bl_label = "Reference"
+
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH", update=lambda s,c: s.id_data.update_tag())
+    active: bpy.props.BoolProperty(
+        name="Active",
+        description="Load the referenced file when the scene is materialized",
+        default=True,
+        update=lambda s,c: s.id_data.update_tag()
+    )
+
+    def init(self, context):
+        FNBaseNode.init(self, context)
+        self.outputs.new('FNSocketScene', "Scene")
+
+    def draw_buttons(self, context, layout):
+        layout.prop(self, "filepath", text="")
+        layout.prop(self, "active")
+
+    def execute(self, **kwargs):
+        output_socket_id = self.outputs[0].identifier
+        if not self.filepath or not self.filepath.endswith(".blend"):
+            return {output_socket_id: None}
+
+        abspath = blend_catalog.resolve_path(self.filepath)
+        signature = blend_catalog.file_signature(abspath)
+        if signature is None:
+            logger.log(f"[Reference] File not found: {abspath}")
+            return {output_socket_id: None}
+
+        root_proxy = DatablockProxy(path="/root", fn_uuid=self.fn_output_uuid)
+        root_proxy.properties['datablock_type'] = 'SCENE'
+        root_proxy.properties['name'] = 'referenced_scene'
+
+        # Nothing is read from the file here: the loader catalogs it on demand.
+        file_name = bpy.path.clean_name(os.path.splitext(os.path.basename(abspath))[0])
+        payload = Payload(CatalogPayloadLoader(self.fn_node_id, abspath, signature=signature))
+        reference_proxy = DatablockProxy(path=f"/root/{file_name}", parent=root_proxy, fn_uuid=self.get_persistent_uuid("reference"), payload=payload)
+        reference_proxy.properties['datablock_type'] = 'COLLECTION'
+        reference_proxy.properties['name'] = file_name
+        reference_proxy.properties['_fn_payload_active'] = self.active
+        reference_proxy.properties['_fn_relationships'] = {'collection_links': ['/root']}
+
+        return {output_socket_id: root_proxy}
@@ -1,5 +1,6 @@
 import bpy
 import re
+import ast
 from ..nodes.base import FNBaseNode
 from ..sockets import FNSocketSelection, FNSocketString
 from ..query_types import FNSelectionQuery
@@ -43,18 +44,20 @@ class FN_select(FNBaseNode, bpy.types.Node):
         path_glob = path_part.strip() if path_part else "//**/*"
 
         if filter_part:
-            filter_strings = [f.strip() for f in filter_part.split('and')]
+            filter_strings = [f.strip() for f in re.split(r"\s+and\s+", filter_part)]
             for f_str in filter_strings:
-                func_match = re.match(r"(\w+)\s*\(\s*['\"](\w+)['\"]\s*\)", f_str)
+                func_match = re.match(r"(\w+)\s*\((.*)\)\s*$", f_str)
                 if func_match:
+                    args = self._parse_function_args(func_match.group(2))
                     filters.append({
                         'type': 'function',
                         'func': func_match.group(1),
-                        'value': func_match.group(2)
+                        'value': args[0] if args else None,
+                        'args': args
                     })
                     continue
                 
-                prop_match = re.match(r"@([\w\.]+)\s*([=<>!]+)\s*(.+)", f_str)
+                prop_match = re.match(r"@([\w\.]+)\s*(==|!=|<=|>=|=|<|>)\s*(.+)", f_str)
                 if prop_match:
                     filters.append({
                         'type': 'property',
@@ -67,4 +70,14 @@ class FN_select(FNBaseNode, bpy.types.Node):
             raw_expression=raw_expression,
             path_glob=path_glob,
             filters=filters
-        )
\ No newline at end of file
+        )
+
+    @staticmethod
+    def _parse_function_args(args_str: str) -> list:
+        """Parses the literal arguments of a filter function, e.g. `'/root/cam', 10`."""
+        if not args_str.strip():
+            return []
+        try:
+            return list(ast.literal_eval(f"({args_str},)"))
+        except (ValueError, SyntaxError):
+            return [a.strip().strip('\'"') for a in args_str.split(',')]
@@ -6,15 +6,6 @@ from ..proxy_types import DatablockProxy
 from ..query_types import FNSelectionQuery
 from .. import logger
 
-def get_all_prims(root_proxy):
-    all_prims = []
-    nodes_to_visit = [root_proxy]
-    while nodes_to_visit:
-        node = nodes_to_visit.pop(0)
-        all_prims.append(node)
-        nodes_to_visit.extend(node.children)
-    return all_prims
-
 class FN_set_collection(FNBaseNode, bpy.types.Node):
     bl_idname = "FN_set_collection"
     bl_label = "Set Collection"
@@ -71,8 +62,8 @@ class FN_set_collection(FNBaseNode, bpy.types.Node):
         if not selection_query:
             selection_query = FNSelectionQuery(raw_expression="*", path_glob="*", filters=[])
 
-        new_scene_root = scene_root.clone()
-        prims_to_affect = [p for p in utils.resolve_selection(new_scene_root, selection_query) if p.parent is not None]
+        new_scene_root, selected_prims = utils.clone_and_resolve_selection(scene_root, selection_query)
+        prims_to_affect = [p for p in selected_prims if p.parent is not None]
         collection_names = utils.parse_multi_target_string(collection_names_str)
 
         logger.log(f"[SetCollection] Prims to affect: {[p.path for p in prims_to_affect]}")
@@ -86,10 +77,10 @@ class FN_set_collection(FNBaseNode, bpy.types.Node):
             if self.mode == 'CREATE' and collection_prim:
                 logger.log(f"[SetCollection] CREATE: Removing existing collection prim '{name}'")
                 # Remove any links pointing to the old collection
-                for p in get_all_prims(new_scene_root):
-                    links = p.properties.get('_fn_relationships', {}).get('collection_links', [])
-                    if collection_path in links:
-                        links.remove(collection_path)
+                for p in new_scene_root.get_flat_list():
+                    # Only the prims linked to it are written (and copied if shared)
+                    if collection_path in p.properties_view.get('_fn_relationships', {}).get('collection_links', ()):
+                        p.properties['_fn_relationships']['collection_links'].remove(collection_path)
                 # Remove the prim itself
                 if collection_prim.parent:
                     collection_prim.parent.children.remove(collection_prim)
@@ -121,9 +112,8 @@ class FN_set_collection(FNBaseNode, bpy.types.Node):
             elif self.mode == 'REMOVE' and collection_prim:
                 logger.log(f"[SetCollection] Removing {len(prims_to_affect)} prims from '{name}'")
                 for prim in prims_to_affect:
-                    links = prim.properties.get('_fn_relationships', {}).get('collection_links', [])
-                    if collection_path in links:
-                        links.remove(collection_path)
+                    if collection_path in prim.properties_view.get('_fn_relationships', {}).get('collection_links', ()):
+                        prim.properties['_fn_relationships']['collection_links'].remove(collection_path)
             
             # Ensure the collection itself is linked to the scene's root collection if link_to_scene is True
             if self.link_to_scene and collection_prim:
@@ -132,5 +122,6 @@ class FN_set_collection(FNBaseNode, bpy.types.Node):
                 if '/root' not in links:
                     links.append('/root')
 
+        new_scene_root.notify_mutated()
         logger.log(f"[SetCollection] Final scene graph:\n{new_scene_root.get_tree_representation()}")
         return {self.outputs[0].identifier: new_scene_root}
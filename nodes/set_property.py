@@ -32,20 +32,12 @@ class FN_set_property(FNBaseNode, bpy.types.Node):
         if not selection_query:
             selection_query = FNSelectionQuery(raw_expression="*", path_glob="*", filters=[])
 
-        # Clone the scene to work on a copy
-        new_scene_root = scene_root.clone()
+        # Clone the scene and resolve the selection to get the target prims
+        new_scene_root, target_prims = utils.clone_and_resolve_selection(scene_root, selection_query)
 
-        # Resolve the selection to get the target prims
-        target_prims = utils.resolve_selection(new_scene_root, selection_query)
-
-        # Try to evaluate the property value from the string
-        try:
-            evaluated_value = eval(prop_value_str)
-        except:
-            evaluated_value = prop_value_str
-
-        for prim in target_prims:
-            # The property name is now used directly.
-            prim.properties[prop_name] = evaluated_value
+        # Parse the value once (memoized by string) and share it across every target
+        evaluated_value = utils.parse_property_value(prop_value_str)
+        utils.assign_property(target_prims, prop_name, evaluated_value)
 
+        new_scene_root.notify_mutated()
         return {self.outputs[0].identifier: new_scene_root}
\ No newline at end of file
@@ -0,0 +1,134 @@
+import bpy
+from ..nodes.base import FNBaseNode
+from ..sockets import FNSocketScene, FNSocketSceneList
+from ..engine import utils
+from ..engine.scene_stream import SceneStream
+from .. import logger
+
+class FNWedgeParameter(bpy.types.PropertyGroup):
+    """An input socket of an upstream node and the values it takes across the variants."""
+    node_name: bpy.props.StringProperty(name="Node", update=lambda s,c: s.id_data.update_tag())
+    socket_name: bpy.props.StringProperty(name="Input", update=lambda s,c: s.id_data.update_tag())
+    values: bpy.props.StringProperty(
+        name="Values",
+        description="Values of the input, separated by ';' (e.g. '100; 250; 500' or '(0, 0, 1); (0, 0, 2)')",
+        update=lambda s,c: s.id_data.update_tag()
+    )
+
+class _WedgeVariants:
+    """The variants of a wedge as a lazy sequence: item i is a factory of the i-th variant's scene."""
+
+    def __init__(self, evaluate, parameters, combination):
+        self.evaluate = evaluate
+        self.parameters = parameters  # [((node id, input identifier), [values])]
+        self.combination = combination
+        counts = [len(values) for _, values in parameters]
+        if not counts:
+            self._count = 1  # No parameters: the upstream scene as is
+        elif combination == 'ZIP':
+            self._count = min(counts)
+        else:
+            self._count = 1
+            for count in counts:
+                self._count *= count
+
+    def __len__(self):
+        return self._count
+
+    def socket_values(self, index):
+        if self.combination == 'ZIP':
+            return {key: values[index] for key, values in self.parameters}
+        # Cartesian product, the last parameter varying fastest
+        socket_values = {}
+        for key, values in reversed(self.parameters):
+            index, position = divmod(index, len(values))
+            socket_values[key] = values[position]
+        return socket_values
+
+    def __getitem__(self, index):
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        socket_values = self.socket_values(index)
+        return lambda: self.evaluate(socket_values)
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self[index]
+
+class FN_wedge(FNBaseNode, bpy.types.Node):
+    """
+    Evaluates the upstream graph once per combination of values injected into chosen
+    node inputs, and outputs the results as a scene list. Only the nodes that depend on
+    the wedged inputs are evaluated per variant; the rest of the graph is evaluated once
+    and shared. Variants are built when the list is iterated.
+    """
+    bl_idname = "FN_wedge"
+    bl_label = "Wedge"
+    fn_lazy_inputs = True
+
+    parameter_count: bpy.props.IntProperty(name="Parameters", default=1, min=1, update=lambda s,c: s.update_parameters())
+    parameters: bpy.props.CollectionProperty(type=FNWedgeParameter)
+    combination: bpy.props.EnumProperty(
+        name="Combination",
+        items=[
+            ('PRODUCT', "All Combinations", "One variant per combination of the parameter values"),
+            ('ZIP', "Paired", "The n-th variant uses the n-th value of every parameter"),
+        ],
+        default='PRODUCT',
+        update=lambda s,c: s.id_data.update_tag()
+    )
+
+    def init(self, context):
+        FNBaseNode.init(self, context)
+        self.inputs.new('FNSocketScene', "Scene")
+        self.outputs.new('FNSocketSceneList', "Scene List")
+        self.update_parameters()
+
+    def update_parameters(self):
+        while len(self.parameters) < self.parameter_count:
+            self.parameters.add()
+        while len(self.parameters) > self.parameter_count:
+            self.parameters.remove(len(self.parameters) - 1)
+        self.id_data.update_tag()
+
+    def draw_buttons(self, context, layout):
+        layout.prop(self, "combination", text="")
+        layout.prop(self, "parameter_count")
+        for parameter in self.parameters:
+            box = layout.box()
+            box.prop_search(parameter, "node_name", self.id_data, "nodes", text="")
+            node = self.id_data.nodes.get(parameter.node_name)
+            if node:
+                box.prop_search(parameter, "socket_name", node, "inputs", text="")
+            box.prop(parameter, "values", text="")
+
+    def _resolve_parameters(self, tree):
+        """[((node id, input identifier), [values])] of the parameters that point to an existing input."""
+        resolved = []
+        for parameter in self.parameters:
+            node = tree.nodes.get(parameter.node_name)
+            socket = node.inputs.get(parameter.socket_name) if node else None
+            if socket is None:
+                if parameter.node_name:
+                    logger.log(f"[Wedge] WARNING: Input '{parameter.socket_name}' of node '{parameter.node_name}' not found")
+                continue
+            raw_values = [value.strip() for value in parameter.values.split(';') if value.strip()]
+            # String inputs take the text as is; other inputs take Python literals
+            if socket.bl_idname == 'FNSocketString':
+                values = raw_values
+            else:
+                values = [utils.parse_property_value(value) for value in raw_values]
+            if values:
+                resolved.append(((node.fn_node_id, socket.identifier), values))
+        return resolved
+
+    def execute(self, **kwargs):
+        evaluate = kwargs.get(self.inputs[0].identifier)
+        tree = kwargs.get('tree')
+        if not callable(evaluate) or tree is None:
+            return {self.outputs[0].identifier: SceneStream([])}
+
+        variants = _WedgeVariants(evaluate, self._resolve_parameters(tree), self.combination)
+        return {self.outputs[0].identifier: SceneStream(variants)}
+
+_classes = (FNWedgeParameter, FN_wedge)
@@ -1,5 +1,6 @@
 import bpy
-from .engine import orchestrator
+from . import uuid_manager
+from .engine import orchestrator, planner, state_gc, scheduler
 
 class FN_OT_activate_socket(bpy.types.Operator):
     """Activates a socket, sets it as the final execution point, and triggers sync."""
@@ -27,12 +28,57 @@ class FN_OT_activate_socket(bpy.types.Operator):
         target_socket.is_final_active = True
 
         depsgraph = context.evaluated_depsgraph_get()
-        orchestrator.execute_node_tree(node_tree, depsgraph)
+        orchestrator.execute_node_tree(node_tree, depsgraph, force=True)
         
         return {'FINISHED'}
 
+class FN_OT_collect_garbage(bpy.types.Operator):
+    """Removes snapshot and override entries of datablocks that are no longer part of the plan."""
+    bl_idname = "fn.collect_garbage"
+    bl_label = "Collect Stale State"
+
+    ignore_grace_period: bpy.props.BoolProperty(
+        name="Ignore Grace Period",
+        description="Collect every unreachable entry immediately",
+        default=False
+    )
+
+    def execute(self, context):
+        node_tree = context.space_data.edit_tree
+        if not node_tree:
+            return {'CANCELLED'}
+
+        root_proxy = orchestrator._evaluate_active_branch(node_tree)
+        if root_proxy:
+            plan = orchestrator.plan_scene(node_tree, root_proxy)
+            # An empty plan comes from a cycle or an evaluation error, not from an empty scene:
+            # collecting against it would drop the state of everything that is materialized.
+            if not plan and uuid_manager.get_all_managed_datablocks():
+                self.report({'WARNING'}, "The scene could not be planned, nothing was collected.")
+                return {'CANCELLED'}
+            live_uuids = {str(p.fn_uuid) for p in plan}
+        else:
+            # Without an active branch, whatever is currently materialized is considered reachable.
+            live_uuids = set(uuid_manager.get_all_managed_datablocks().keys())
+
+        grace_period = 0.0 if self.ignore_grace_period else node_tree.fn_gc_grace_period
+        reclaimed = state_gc.collect_garbage(node_tree, live_uuids, grace_period)
+        self.report({'INFO'}, f"Reclaimed {reclaimed} bytes of stale state.")
+        return {'FINISHED'}
+
+class FN_OT_cancel_sync(bpy.types.Operator):
+    """Stops the scene synchronization in progress. The scene is left partially built until the next sync."""
+    bl_idname = "fn.cancel_sync"
+    bl_label = "Cancel Sync"
+
+    def execute(self, context):
+        scheduler.cancel()
+        return {'FINISHED'}
+
 _all_operators = (
     FN_OT_activate_socket,
+    FN_OT_collect_garbage,
+    FN_OT_cancel_sync,
 )
 
 def register():
@@ -1,7 +1,11 @@
 import bpy
 import json
 from . import logger, uuid_manager
-from .engine import utils
+from .engine import utils, scheduler, applied_values, snapshot_queue, materializer
+
+# Datablocks the user edited while a time-sliced build was running: they are compared to
+# their snapshots once the build completes.
+_edited_during_build = set()
 
 def _calculate_overrides(initial_state, current_state):
     """Compares two state dictionaries and returns a dict with only the differences."""
@@ -20,6 +24,12 @@ def depsgraph_update_post_handler(scene, depsgraph):
     tree = next((nt for nt in bpy.data.node_groups if hasattr(nt, 'bl_idname') and nt.bl_idname == 'DatablockTreeType'), None)
     if not tree:
         return
+    # A partly built scene isn't a user edit: wait for the time-sliced sync to finish.
+    building = scheduler.active_run() is not None
+    if not building:
+        # Selecting a datablock is an update of its own, before the user can edit it: its
+        # queued snapshot is captured now, while it still holds the declared state
+        snapshot_queue.capture_edit_targets()
 
     # --- Optimization: Iterate only over updated datablocks ---
     for update in depsgraph.updates:
@@ -34,42 +44,67 @@ def depsgraph_update_post_handler(scene, depsgraph):
         if not uuid_str:
             continue
 
-        # Find the initial state snapshot for this datablock
-        initial_state_entry = next((item for item in tree.fn_initial_state_map if item.datablock_uuid == uuid_str), None)
-        if not initial_state_entry:
-            continue # No snapshot, so we can't compare it
-
-        try:
-            initial_state = json.loads(initial_state_entry.state_data_json)
-        except json.JSONDecodeError:
-            continue # Corrupted snapshot
-
-        # Get the current, evaluated state of the datablock
-        evaluated_db = db.evaluated_get(depsgraph) if hasattr(db, 'evaluated_get') else db
-        current_state = utils.capture_initial_state(evaluated_db)
-
-        # Calculate the difference
-        overrides = _calculate_overrides(initial_state, current_state)
-
-        if overrides:
-            logger.log(f"[OverrideHandler] Detected {len(overrides)} overrides for {db.name} ({uuid_str})")
-            # Find or create an override entry
-            override_entry = next((item for item in tree.fn_override_map if item.datablock_uuid == uuid_str), None)
-            if not override_entry:
-                override_entry = tree.fn_override_map.add()
-                override_entry.datablock_uuid = uuid_str
-            
-            # Update the stored overrides
-            # If there were previous overrides, merge the new ones on top
-            if override_entry.override_data_json:
-                try:
-                    existing_overrides = json.loads(override_entry.override_data_json)
-                    existing_overrides.update(overrides)
-                    override_entry.override_data_json = json.dumps(existing_overrides)
-                except json.JSONDecodeError:
-                    override_entry.override_data_json = json.dumps(overrides)
-            else:
+        # The values the materializer remembers applying may not be there anymore
+        applied_values.touch(uuid_str)
+        if building:
+            # Not configured yet, the edit is overwritten by the declared values anyway
+            if materializer.is_configured(uuid_str):
+                _edited_during_build.add(uuid_str)
+            continue
+        _edited_during_build.discard(uuid_str)
+        _record_overrides(tree, db, uuid_str, depsgraph)
+
+    if not building and _edited_during_build:
+        for uuid_str in list(_edited_during_build):
+            db = uuid_manager.find_datablock_by_uuid(uuid_str)
+            if db is not None:
+                _record_overrides(tree, db, uuid_str, depsgraph)
+        _edited_during_build.clear()
+
+def _record_overrides(tree, db, uuid_str, depsgraph):
+    """Compares a managed datablock to its initial state snapshot and stores the differences as overrides."""
+    # Still queued: the datablock was changed without being selected (e.g. by a script)
+    # and its previous state is gone. Its declared values are laid over the capture, so
+    # only changes to properties the nodes don't declare go unnoticed.
+    if snapshot_queue.is_pending(uuid_str):
+        snapshot_queue.capture_now(uuid_str)
+
+    # Find the initial state snapshot for this datablock
+    initial_state_entry = next((item for item in tree.fn_initial_state_map if item.datablock_uuid == uuid_str), None)
+    if not initial_state_entry:
+        return # No snapshot, so we can't compare it
+
+    try:
+        initial_state = json.loads(initial_state_entry.state_data_json)
+    except json.JSONDecodeError:
+        return # Corrupted snapshot
+
+    # Get the current, evaluated state of the datablock
+    evaluated_db = db.evaluated_get(depsgraph) if hasattr(db, 'evaluated_get') else db
+    current_state = utils.capture_initial_state(evaluated_db)
+
+    # Calculate the difference
+    overrides = _calculate_overrides(initial_state, current_state)
+
+    if overrides:
+        logger.log(f"[OverrideHandler] Detected {len(overrides)} overrides for {db.name} ({uuid_str})")
+        # Find or create an override entry
+        override_entry = next((item for item in tree.fn_override_map if item.datablock_uuid == uuid_str), None)
+        if not override_entry:
+            override_entry = tree.fn_override_map.add()
+            override_entry.datablock_uuid = uuid_str
+        
+        # Update the stored overrides
+        # If there were previous overrides, merge the new ones on top
+        if override_entry.override_data_json:
+            try:
+                existing_overrides = json.loads(override_entry.override_data_json)
+                existing_overrides.update(overrides)
+                override_entry.override_data_json = json.dumps(existing_overrides)
+            except json.JSONDecodeError:
                 override_entry.override_data_json = json.dumps(overrides)
+        else:
+            override_entry.override_data_json = json.dumps(overrides)
 
 def register():
     if depsgraph_update_post_handler not in bpy.app.handlers.depsgraph_update_post:
@@ -13,11 +13,15 @@ class FNDeclaredStateItem(bpy.types.PropertyGroup):
 class FNOverrideItem(bpy.types.PropertyGroup):
     datablock_uuid: bpy.props.StringProperty()
     override_data_json: bpy.props.StringProperty()
+    # Time (seconds since epoch, as text) at which the entry was first found unreachable.
+    # Empty means live. Not a FloatProperty: single precision can't hold epoch times to the second.
+    orphaned_at: bpy.props.StringProperty(default="")
 
 class FNInitialStateItem(bpy.types.PropertyGroup):
     """Stores a JSON snapshot of a datablock's state when it was first materialized."""
     datablock_uuid: bpy.props.StringProperty()
     state_data_json: bpy.props.StringProperty()
+    orphaned_at: bpy.props.StringProperty(default="")
 
 _classes_to_register = (
     FNPropertyItem,
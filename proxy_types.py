@@ -1,5 +1,181 @@
+import sys
+import math
 import uuid
 from copy import deepcopy
+from collections import OrderedDict
+
+# Callbacks fired with the root of a scene whenever that scene is mutated in place.
+# Caches keyed by scene (selection indexes, content hashes...) register here to drop stale entries.
+_mutation_callbacks = []
+
+def register_mutation_callback(callback):
+    if callback not in _mutation_callbacks:
+        _mutation_callbacks.append(callback)
+
+def unregister_mutation_callback(callback):
+    if callback in _mutation_callbacks:
+        _mutation_callbacks.remove(callback)
+
+# --- Value Interning ---
+
+class FrozenDict(dict):
+    """An immutable dict. Deep copies return the same instance, so it is shared by every clone."""
+    __slots__ = ('_hash',)
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("FrozenDict is immutable; build a new value instead")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _immutable
+
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash = hash(frozenset(self.items()))
+            return self._hash
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+class FrozenTuple(tuple):
+    """A tuple whose deep copies return the same instance (tuples of tuples, geometry...)."""
+    __slots__ = ()
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (FrozenTuple, (tuple(self),))
+
+_ATOMIC_TYPES = (type(None), bool, int, float, str)
+_SHARED_TYPES = _ATOMIC_TYPES + (FrozenDict, FrozenTuple)
+# Short tuples of atoms (vectors, colors) are checked element-wise; longer ones must be frozen.
+_SHARED_TUPLE_LENGTH = 16
+
+# Canonical instances of interned values, bounded like an LRU: evicted values stay valid,
+# they just stop being shared with values interned later.
+_INTERN_TABLE = OrderedDict()
+_INTERN_TABLE_SIZE = 4096
+
+def freeze_value(value):
+    """Recursively converts lists/tuples to FrozenTuple and dicts to FrozenDict."""
+    if isinstance(value, _SHARED_TYPES):
+        return value
+    if isinstance(value, (list, tuple)):
+        return FrozenTuple(freeze_value(v) for v in value)
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze_value(v)) for k, v in value.items())
+    return value
+
+_KEYED_ATOMIC_TYPES = (type(None), bool, int, str)
+
+def _intern_key(value, frozen_by_identity=False):
+    """
+    Hashable key of a value for the intern table, tagged with the type of every element:
+    `1`, `1.0` and `True` are equal and hash the same, but must not stand in for each other.
+    With `frozen_by_identity`, frozen containers are keyed by identity instead of contents
+    (they are interned already, and walking a mesh's geometry for every prim would be costly).
+    Raises TypeError for values that can't be keyed.
+    """
+    value_type = type(value)
+    if value_type is float:
+        # -0.0 == 0.0, but the sign is kept
+        return (value_type, value, math.copysign(1.0, value))
+    if value_type in _KEYED_ATOMIC_TYPES:
+        return (value_type, value)
+    if frozen_by_identity and value_type in (FrozenDict, FrozenTuple):
+        return (value_type, id(value))
+    if isinstance(value, (list, tuple)):
+        return (value_type, tuple(_intern_key(v, frozen_by_identity) for v in value))
+    if isinstance(value, dict):
+        return (value_type, tuple((_intern_key(k), _intern_key(v, frozen_by_identity)) for k, v in value.items()))
+    raise TypeError(f"Can't intern a value of type {value_type.__name__}")
+
+def _canonical(key, value):
+    """The interned instance for `key`, registering `value` as such if there is none."""
+    canonical = _INTERN_TABLE.get(key)
+    if canonical is None:
+        _INTERN_TABLE[key] = canonical = value
+        if len(_INTERN_TABLE) > _INTERN_TABLE_SIZE:
+            _INTERN_TABLE.popitem(last=False)
+    else:
+        _INTERN_TABLE.move_to_end(key)
+    return canonical
+
+def intern_value(value):
+    """
+    Returns the canonical, immutable instance of a value: identical contents (of identical
+    types) interned twice give the same object, so they are stored once and compare by identity.
+    Values that can't be frozen (unhashable leaves) are returned unchanged.
+    """
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, _ATOMIC_TYPES):
+        return value
+    frozen = freeze_value(value)
+    try:
+        key = _intern_key(frozen)
+    except TypeError:
+        return value
+    return _canonical(key, frozen)
+
+def share_properties(properties):
+    """
+    Returns a read-only instance of a whole property set, to be shared by the clones of a
+    prim. Identical sets are interned, so they are stored once. Only the top level is frozen:
+    values keep their types (lists stay lists) and are copied when a prim thaws its set.
+    """
+    if type(properties) is FrozenDict:
+        return properties
+    shared = FrozenDict(properties)
+    try:
+        key = (FrozenDict, tuple((_intern_key(k), _intern_key(v, frozen_by_identity=True)) for k, v in shared.items()))
+    except TypeError:
+        return shared
+    return _canonical(key, shared)
+
+def is_shared_value(value):
+    """True for values that can be shared between prims instead of copied."""
+    if isinstance(value, _SHARED_TYPES):
+        return True
+    if type(value) is tuple and len(value) <= _SHARED_TUPLE_LENGTH:
+        return all(isinstance(v, _ATOMIC_TYPES) for v in value)
+    return False
+
+def copy_properties(properties):
+    """Copies a properties dict: immutable values are shared, mutable ones are deep-copied."""
+    return {key: value if is_shared_value(value) else deepcopy(value) for key, value in properties.items()}
+
+def values_equal(a, b):
+    """Equality with an identity fast path (interned values are equal only if identical)."""
+    if a is b:
+        return True
+    if type(a) is FrozenDict and type(b) is FrozenDict and hash(a) != hash(b):
+        return False  # Cached hashes: unequal dicts are rejected without comparing contents
+    return a == b
+
+class Payload:
+    """
+    Deferred contents of a prim. Until it is loaded, the prim is a placeholder (path, UUID
+    and optional bounds) with no children; `loader(proxy)` creates them on demand.
+    A payload definition is immutable and shared by every clone of its prim, but each
+    clone keeps its own loaded state. `source` describes where the contents come from (e.g.
+    the file and how it is read); it identifies the payload in content hashes, so a payload
+    rebuilt on every evaluation still hashes the same. It defaults to `loader.source`.
+    """
+    def __init__(self, loader, bounds=None, source=None):
+        self.loader = loader
+        self.bounds = bounds  # Optional ((min_x, min_y, min_z), (max_x, max_y, max_z)), in local space
+        self.source = source if source is not None else getattr(loader, 'source', None)
 
 class DatablockProxy:
     """
@@ -7,17 +183,38 @@ class DatablockProxy:
     that describes the desired state of a Blender datablock and its relationships.
     This is the core data structure that flows through the V5 node system.
     """
-    def __init__(self, path, fn_uuid=None, properties=None, parent=None):
+    def __init__(self, path, fn_uuid=None, properties=None, parent=None, payload=None):
         self.fn_uuid = fn_uuid or uuid.uuid4()
         self.path = path
         self.parent = parent
         self.children = []
-        self.properties = properties or {}
+        self._properties = properties or {}
+        self.payload = payload
+        self.payload_loaded = payload is None
 
         if self.parent:
             # Automatically register with the parent upon creation
             self.parent.children.append(self)
 
+    @property
+    def properties(self):
+        """
+        The properties of the prim, for reading and writing. A property set shared with other
+        clones (copy-on-write) is copied on first access.
+        """
+        if type(self._properties) is FrozenDict:
+            self._properties = copy_properties(self._properties)
+        return self._properties
+
+    @properties.setter
+    def properties(self, properties):
+        self._properties = properties
+
+    @property
+    def properties_view(self):
+        """The properties of the prim, read-only: a shared set is returned without copying it."""
+        return self._properties
+
     def clone(self):
         """
         Creates a deep copy of the entire proxy subtree starting from this node.
@@ -25,11 +222,15 @@ class DatablockProxy:
         This ensures that modifications downstream still refer to the same logical entity.
         """
         # Create a clone of the current node, PRESERVING the original UUID.
+        # Both prims share the property set until one of them writes to it.
+        self._properties = share_properties(self._properties)
         cloned_node = DatablockProxy(
             path=self.path,
             fn_uuid=self.fn_uuid, # Preserve the UUID
-            properties=deepcopy(self.properties)
+            properties=self._properties,
+            payload=self.payload
         )
+        cloned_node.payload_loaded = self.payload_loaded
 
         # Recursively clone children and establish the new parent-child relationship
         for child in self.children:
@@ -39,6 +240,34 @@ class DatablockProxy:
 
         return cloned_node
 
+    @property
+    def has_unloaded_payload(self):
+        return not self.payload_loaded
+
+    def load_payload(self):
+        """Expands the deferred contents of this prim, if any. Returns True if something was loaded."""
+        if self.payload_loaded:
+            return False
+        self.payload_loaded = True
+        self.payload.loader(self)
+        self.notify_mutated()
+        return True
+
+    def get_root(self):
+        root = self
+        while root.parent:
+            root = root.parent
+        return root
+
+    def notify_mutated(self):
+        """
+        Must be called after modifying a scene in place (properties, children or paths).
+        Invalidates every cache that was computed for the scene this proxy belongs to.
+        """
+        root = self.get_root()
+        for callback in _mutation_callbacks:
+            callback(root)
+
     def find_child_by_path(self, search_path):
         """
         Finds a descendant proxy by its relative or absolute path.
@@ -109,10 +338,30 @@ class DatablockProxy:
             # Check if a prim with the same name exists at this level
             my_child_equivalent = self.find_child_by_path(child_name)
 
+            if my_child_equivalent:
+                if other_child.has_unloaded_payload and my_child_equivalent.payload_loaded and not my_child_equivalent.children:
+                    # Nothing to merge into yet: keep the incoming contents deferred.
+                    my_child_equivalent.payload = other_child.payload
+                    my_child_equivalent.payload_loaded = False
+                else:
+                    # Both sides need their contents to be merged child by child. The other
+                    # tree is an upstream input: its payload is loaded into a copy.
+                    if other_child.has_unloaded_payload:
+                        other_child = other_child.clone()
+                        other_child.load_payload()
+                    if other_child.children:
+                        my_child_equivalent.load_payload()
+
             if my_child_equivalent:
                 # If it exists, merge its properties and then recurse.
                 # Properties from other_child will overwrite those in my_child_equivalent.
-                my_child_equivalent.properties.update(deepcopy(other_child.properties))
+                my_properties = my_child_equivalent.properties_view
+                changed = {
+                    key: value for key, value in other_child.properties_view.items()
+                    if key not in my_properties or not values_equal(my_properties[key], value)
+                }
+                if changed:
+                    my_child_equivalent.properties.update(copy_properties(changed))
                 my_child_equivalent.merge(other_child)
             else:
                 # If it doesn't exist, clone the entire incoming branch and attach it.
@@ -0,0 +1,66 @@
+"""
+End-to-end test of the background render worker: starts `blender -b` on render_worker.py,
+sends it one job and checks the rendered image. Needs a Blender binary, found through the
+BLENDER environment variable or on the PATH; skipped otherwise.
+Run with `python -m unittest discover -s tests`: the addon itself only imports inside Blender.
+"""
+import os
+import json
+import uuid
+import shutil
+import tempfile
+import unittest
+import subprocess
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKER_SCRIPT = os.path.join(PACKAGE_DIR, "engine", "render_worker.py")
+MESSAGE_PREFIX = "FN_RENDER_WORKER:"
+BLENDER = os.environ.get("BLENDER") or shutil.which("blender")
+
+def _job(output_path):
+    """A scene with a camera, the camera set through an override like the user's edits are."""
+    scene_uuid, camera_data_uuid, camera_uuid = (str(uuid.uuid4()) for _ in range(3))
+    plan = [
+        {'path': "/root", 'uuid': scene_uuid, 'properties': {
+            'datablock_type': 'SCENE', 'name': 'worker_test_scene',
+            'render.engine': 'BLENDER_WORKBENCH',
+            'render.resolution_x': 16, 'render.resolution_y': 16,
+            'render.image_settings.file_format': 'PNG',
+        }},
+        {'path': "/root/camera_data", 'uuid': camera_data_uuid, 'properties': {
+            'datablock_type': 'CAMERA', 'name': 'worker_test_camera',
+        }},
+        {'path': "/root/camera", 'uuid': camera_uuid, 'properties': {
+            'datablock_type': 'OBJECT', 'name': 'worker_test_camera',
+            'location': [0.0, -5.0, 0.0],
+            '_fn_relationships': {'data': "/root/camera_data", 'collection_links': ["/root"]},
+        }},
+    ]
+    overrides = {scene_uuid: json.dumps({'camera': {'_type': 'UUID_POINTER', 'value': camera_uuid}})}
+    return {'index': 0, 'plan': plan, 'overrides': overrides, 'scene_uuid': scene_uuid, 'output': output_path}
+
+@unittest.skipUnless(BLENDER, "Blender binary not found (set BLENDER)")
+class RenderWorkerTest(unittest.TestCase):
+
+    def test_renders_one_job(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            command = [
+                BLENDER, "--background", "--factory-startup", "--python", WORKER_SCRIPT, "--",
+                "--addon-dir", os.path.dirname(PACKAGE_DIR), "--addon-module", os.path.basename(PACKAGE_DIR),
+                "--threads", "1",
+            ]
+            stdin = json.dumps(_job(os.path.join(output_dir, "variant_0"))) + "\nquit\n"
+            result = subprocess.run(command, input=stdin, capture_output=True, text=True, errors="replace", timeout=300)
+
+            messages = [
+                json.loads(line[len(MESSAGE_PREFIX):])
+                for line in result.stdout.splitlines() if line.startswith(MESSAGE_PREFIX)
+            ]
+            events = [message['event'] for message in messages]
+            self.assertEqual(events, ['ready', 'done'], result.stdout + result.stderr)
+            self.assertEqual(result.returncode, 0)
+            written_file = messages[-1]['file']
+            self.assertTrue(os.path.isfile(written_file), written_file)
+
+if __name__ == "__main__":
+    unittest.main()